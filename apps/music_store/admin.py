@@ -17,7 +17,11 @@ from apps.music_store.models import (
 from apps.music_store.views import (
     AlbumUploadArchiveView,
     AlbumUploadStatusView,
-    TaskStatusView
+    ArchiveUploadChunkView,
+    ArchiveUploadCompleteView,
+    ArchiveUploadView,
+    TaskProgressView,
+    TaskStatusView,
 )
 
 admin.site.register(PaymentMethod)
@@ -48,16 +52,34 @@ class TrackAdminForm(forms.ModelForm):
     """Custom form to display Track with small text boxes for 'full_version' and
     'free_Version' fields.
 
+    'full_version' is stored in TrackContent, so it's declared explicitly and
+    set to track on save.
+
     """
+    full_version = forms.CharField(
+        label=_('Full version'),
+        widget=Textarea(attrs={'rows': 2, 'cols': 50}),
+    )
 
     class Meta:
         model = Track
         widgets = {
-            'full_version': Textarea(attrs={'rows': 2, 'cols': 50}),
             'free_version': Textarea(attrs={'rows': 1, 'cols': 50}),
         }
         fields = '__all__'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial.setdefault(
+                'full_version', self.instance.full_version
+            )
+
+    def save(self, commit=True):
+        if 'full_version' in self.changed_data:
+            self.instance.full_version = self.cleaned_data['full_version']
+        return super().save(commit=commit)
+
 
 class TrackInline(admin.TabularInline):
     """Inline Track to display list of tracks inside Album."""
@@ -156,6 +178,29 @@ class AlbumAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(AlbumUploadArchiveView.as_view()),
                 name='album_upload_archive',
             ),
+            url(
+                r'^upload_archive/chunked/$',
+                self.admin_site.admin_view(ArchiveUploadView.as_view()),
+                name='album_upload_chunked_start',
+            ),
+            url(
+                r'^upload_archive/chunked/(?P<upload_id>[\w-]+)/$',
+                self.admin_site.admin_view(ArchiveUploadView.as_view()),
+                name='album_upload_chunked',
+            ),
+            url(
+                r'^upload_archive/chunked/(?P<upload_id>[\w-]+)/'
+                r'(?P<index>\d+)$',
+                self.admin_site.admin_view(ArchiveUploadChunkView.as_view()),
+                name='album_upload_chunk',
+            ),
+            url(
+                r'^upload_archive/chunked/(?P<upload_id>[\w-]+)/complete$',
+                self.admin_site.admin_view(
+                    ArchiveUploadCompleteView.as_view()
+                ),
+                name='album_upload_chunked_complete',
+            ),
             url(
                 r'^upload_archive/(?P<task_id>[\w,-]*)$',
                 self.admin_site.admin_view(AlbumUploadStatusView.as_view()),
@@ -166,6 +211,11 @@ class AlbumAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(TaskStatusView.as_view()),
                 name='album_upload_get_status',
             ),
+            url(
+                r'^upload_archive/(?P<task_id>[\w,-]*)/progress$',
+                self.admin_site.admin_view(TaskProgressView.as_view()),
+                name='album_upload_progress',
+            ),
         ]
         return my_urls + urls
 
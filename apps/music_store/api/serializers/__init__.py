@@ -1,5 +1,13 @@
-from .album_track import AlbumSerializer, TrackSerializer
-from .bought import BoughtAlbumSerializer, BoughtTrackSerializer
+from .album_track import (
+    AlbumSerializer,
+    TrackSerializer,
+    TrackShortSerializer,
+)
+from .bought import (
+    BoughtAlbumSerializer,
+    BoughtTrackSerializer,
+    CoPurchaseSerializer,
+)
 from .like_listen import LikeTrackSerializer, ListenTrackSerializer
 from .payment import (
     PaymentAccountSerializer,
@@ -12,8 +20,10 @@ from .search import GlobalSearchSerializer
 __all__ = (
     'AlbumSerializer',
     'TrackSerializer',
+    'TrackShortSerializer',
     'BoughtAlbumSerializer',
     'BoughtTrackSerializer',
+    'CoPurchaseSerializer',
     'LikeTrackSerializer',
     'ListenTrackSerializer',
     'PaymentAccountSerializer',
@@ -1,10 +1,12 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
 from apps.music_store.models import Album, Track
 
 __all__ = (
     'AlbumSerializer',
     'TrackSerializer',
+    'TrackShortSerializer',
 )
 
 
@@ -51,7 +53,7 @@ class AlbumSerializer(IsBoughtMixin, serializers.ModelSerializer):
 class TrackSerializer(IsBoughtMixin, serializers.ModelSerializer):
     """Serializer for Music Tracks"""
 
-    content = serializers.SerializerMethodField()
+    content_url = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     count_likes = serializers.SerializerMethodField()
 
@@ -65,30 +67,28 @@ class TrackSerializer(IsBoughtMixin, serializers.ModelSerializer):
             'title',
             'album',
             'price',
-            'content',
+            'content_url',
             'is_bought',
             'is_liked',
             'count_likes',
         )
 
-    def get_content(self, obj):
-        """Get free or full version of track.
+    def get_content_url(self, obj):
+        """Get URL of content of track.
 
-        Full version is provided when track is bought by user.
-        Otherwise free version is provided.
+        Content is streamed by separate endpoint, so lists of tracks don't
+        include it. Full version is provided there when track is bought by
+        user. Otherwise free version is provided.
 
         Args:
             obj (Track): an instance of Track.
 
         """
-        request = self.context.get('request', None)
-        if not request:
-            return obj.free_version
-
-        user = request.user
-        if user.is_authenticated and obj.is_bought(user):
-            return obj.full_version
-        return obj.free_version
+        return reverse(
+            'track-content',
+            kwargs={'pk': obj.pk},
+            request=self.context.get('request', None),
+        )
 
     def get_is_liked(self, obj):
         """Check if track is liked by authorized user"""
@@ -109,3 +109,16 @@ class TrackSerializer(IsBoughtMixin, serializers.ModelSerializer):
             return 0
 
         return obj.likes.count()
+
+
+class TrackShortSerializer(serializers.ModelSerializer):
+    """Compact representation of Music Tracks for lists"""
+
+    class Meta:
+        model = Track
+        fields = (
+            'id',
+            'author',
+            'title',
+            'album',
+        )
@@ -1,8 +1,12 @@
 from rest_framework import serializers
 
-from ...models import BoughtAlbum, BoughtTrack
+from ...models import BoughtAlbum, BoughtTrack, CoPurchase
 
-__all__ = ('BoughtTrackSerializer', 'BoughtAlbumSerializer',)
+__all__ = (
+    'BoughtTrackSerializer',
+    'BoughtAlbumSerializer',
+    'CoPurchaseSerializer',
+)
 
 
 class BoughtItemSerializer(serializers.ModelSerializer):
@@ -22,3 +26,16 @@ class BoughtTrackSerializer(BoughtItemSerializer):
 class BoughtAlbumSerializer(BoughtItemSerializer):
     class Meta(BoughtItemSerializer.Meta):
         model = BoughtAlbum
+
+
+class CoPurchaseSerializer(serializers.ModelSerializer):
+    """Serializer for items bought together with some item"""
+    type = serializers.ReadOnlyField(source='other_type_name')
+    id = serializers.ReadOnlyField(source='other_id')
+    author = serializers.ReadOnlyField(source='other.author')
+    title = serializers.ReadOnlyField(source='other.title')
+    price = serializers.ReadOnlyField(source='other.price')
+
+    class Meta:
+        model = CoPurchase
+        fields = ('type', 'id', 'author', 'title', 'price', 'count')
@@ -17,5 +17,6 @@ router.register(r'transactions', views.PaymentTransactionViewSet)
 urlpatterns = [
     url(r'^', include(router.urls)),
     url(r'^account/$', views.AccountView.as_view()),
+    url(r'^me/recently_played/$', views.RecentlyPlayedView.as_view()),
     url(r'^search/$', views.GlobalSearchList.as_view()),
 ]
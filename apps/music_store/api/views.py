@@ -1,29 +1,45 @@
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import urlquote
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, permissions, viewsets, status
 from rest_framework.decorators import detail_route
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 
 from apps.music_store.api.serializers import (
     AlbumSerializer,
     TrackSerializer,
+    TrackShortSerializer,
     LikeTrackSerializer,
     ListenTrackSerializer,
     BoughtAlbumSerializer,
     BoughtTrackSerializer,
+    CoPurchaseSerializer,
     PaymentAccountSerializer,
     PaymentMethodSerializer,
     PaymentTransactionSerializer,
     GlobalSearchSerializer
 )
 from apps.users.models import AppUser
+from libs.api.negotiation import IgnoreClientContentNegotiation
+from libs.files import stream_zip
+from libs.http import content_response
+from ...music_store.caches import album_cache, track_cache
+from ...music_store.history import RecentlyPlayed
 from ...music_store.models import (
     Album,
     BoughtAlbum,
     BoughtTrack,
+    CoPurchase,
     LikeTrack,
     ListenTrack,
     Track,
@@ -33,6 +49,7 @@ from ...music_store.models import (
     NotEnoughMoney,
     ItemAlreadyBought
 )
+from ...music_store.utils import iter_album_files
 
 
 class ItemsPagination(PageNumberPagination):
@@ -115,6 +132,42 @@ class BoughtAlbumViewSet(BoughtTrackViewSet):
 class ItemViewSet(viewsets.mixins.ListModelMixin,
                   viewsets.mixins.RetrieveModelMixin,
                   viewsets.GenericViewSet):
+    # cache of items by primary key (see ``libs.object_cache``)
+    object_cache = None
+
+    def get_object(self):
+        """Get item from object cache.
+
+        Cache keeps items of any price, so items hidden from catalog by
+        ``queryset`` (without price or with negative price) are not found.
+        Cached item may be stale, so it's used by read-only routes only.
+
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            item = self.object_cache.get(self.kwargs[lookup_url_kwarg])
+        except (ObjectDoesNotExist, DjangoValidationError):
+            raise Http404
+        if item.price is None or item.price < 0:
+            raise Http404
+
+        self.check_object_permissions(self.request, item)
+        return item
+
+    def get_object_for_update(self):
+        """Get item from DB locking its row until end of transaction.
+
+        Used by routes which charge item's price, so concurrent change of
+        price is waited for and the current price is charged.
+
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        item = generics.get_object_or_404(
+            self.get_queryset().select_for_update(),
+            pk=self.kwargs[lookup_url_kwarg],
+        )
+        self.check_object_permissions(self.request, item)
+        return item
 
     @detail_route(
         methods=['post'],
@@ -135,15 +188,15 @@ class ItemViewSet(viewsets.mixins.ListModelMixin,
     def buy_item(self, request, payment_id=None, **kwargs):
         """Method to buy item with using payment `payment_id`"""
         user = request.user
-        item = self.get_object()
-
         payment_method = PaymentMethod.objects.filter(
             owner=user,
             id=payment_id
         ).first()
 
         try:
-            item.buy(user, payment_method)
+            with transaction.atomic():
+                item = self.get_object_for_update()
+                item.buy(user, payment_method)
         except (PaymentNotFound, NotEnoughMoney, ItemAlreadyBought) as e:
             return Response(
                 data={'message': e.message},
@@ -152,11 +205,37 @@ class ItemViewSet(viewsets.mixins.ListModelMixin,
         if isinstance(item, Track):
             return Response(
                 status=status.HTTP_200_OK,
-                data={'content': item.full_version},
+                data={'content_url': reverse(
+                    'track-content', kwargs={'pk': item.pk}, request=request,
+                )},
             )
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @detail_route(
+        methods=['get'],
+        url_path='also_bought',
+        url_name='also_bought',
+    )
+    def also_bought(self, request, **kwargs):
+        """Get items most often bought together with the item.
+
+        Counters are maintained on each purchase, see
+        ``CoPurchaseQuerySet.add_purchase``.
+
+        """
+        item = self.get_object()
+        co_purchases = CoPurchase.objects.for_item(item).prefetch_related(
+            'other',
+        )[:settings.CO_PURCHASE_TOP_ITEMS]
+
+        # skip items which were deleted after purchase
+        co_purchases = [
+            co_purchase for co_purchase in co_purchases if co_purchase.other
+        ]
+        serializer = CoPurchaseSerializer(co_purchases, many=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
     def get_queryset(self):
         """Prevent display Albums and Tracks with null price"""
         return super().get_queryset().filter(price__isnull=False)
@@ -169,12 +248,40 @@ class AlbumViewSet(ItemViewSet):
     # albums without price or with price < 0 are not displayed
     queryset = Album.objects.filter(price__gte=0)
     serializer_class = AlbumSerializer
+    object_cache = album_cache
 
     filter_backends = (filters.SearchFilter, DjangoFilterBackend)
     filter_fields = ('title', 'author', 'price')
     search_fields = ('title', 'author',)
     pagination_class = ItemsPagination
 
+    @detail_route(
+        methods=['get'],
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='download',
+        url_name='download',
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def download(self, request, **kwargs):
+        """Download ZIP archive with full versions of album tracks.
+
+        Archive is built while it's sent, so its size isn't known in
+        advance and memory used doesn't depend on number of tracks.
+
+        """
+        album = self.get_object()
+        if not album.is_bought(request.user):
+            raise PermissionDenied('Album is not bought')
+
+        response = StreamingHttpResponse(
+            stream_zip(iter_album_files(album)),
+            content_type='application/zip',
+        )
+        filename = urlquote(f'{album.author} - {album.title}.zip')
+        response['Content-Disposition'] = \
+            f"attachment; filename*=UTF-8''{filename}"
+        return response
+
 
 class TrackViewSet(ItemViewSet):
     """Operations on music tracks
@@ -183,12 +290,57 @@ class TrackViewSet(ItemViewSet):
     # tracks without price or with price < 0 are not displayed
     queryset = Track.objects.filter(price__gte=0)
     serializer_class = TrackSerializer
+    object_cache = track_cache
 
     filter_backends = (filters.SearchFilter, DjangoFilterBackend)
     filter_fields = ('title', 'author', 'album', 'price')
     search_fields = ('title', 'author',)
     pagination_class = ItemsPagination
 
+    @detail_route(
+        methods=['get'],
+        url_path='content',
+        url_name='content',
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def content(self, request, **kwargs):
+        """Stream free or full version of the track.
+
+        Full version is sent when track is bought by user. Otherwise free
+        version is sent. Conditional requests and requests of single byte
+        range are supported, so content is cached and resumed by clients.
+
+        Content depends on purchase of track, so it's validated by ETag
+        only. Last-Modified isn't sent, since time of track change doesn't
+        change when track is bought and free version cached by client
+        would be considered current.
+
+        """
+        track = self.get_object()
+        user = request.user
+        is_full = user.is_authenticated and track.is_bought(user)
+        # content is loaded only if client hasn't got it yet
+        if is_full:
+            etag = f'full-{track.content_hash}'
+        else:
+            etag = f'free-{Track.get_content_hash(track.free_version)}'
+
+        def get_content():
+            content = track.full_version if is_full else track.free_version
+            return content.encode()
+
+        response = content_response(
+            request,
+            get_content,
+            etag=etag,
+            content_type='text/plain; charset=utf-8',
+            chunk_size=settings.TRACK_CONTENT_CHUNK_SIZE,
+        )
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        if is_full:
+            patch_cache_control(response, private=True)
+        return response
+
     @detail_route(
         methods=['post', 'delete'],
         permission_classes=[permissions.IsAuthenticated],
@@ -239,6 +391,25 @@ class TrackViewSet(ItemViewSet):
             status=status.HTTP_200_OK
         )
 
+    @detail_route(
+        methods=['get'],
+        url_path='similar',
+        url_name='similar',
+    )
+    def similar(self, request, **kwargs):
+        """Get tracks listened and liked by the same users.
+
+        Neighbours are precomputed by ``tasks.build_similar_tracks``.
+
+        """
+        track = self.get_object()
+        tracks = self.get_queryset().filter(
+            similar_for__track=track,
+        ).order_by('-similar_for__score')
+
+        serializer = self.get_serializer(tracks, many=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
 
 # ##############################################################################
 # LIKES
@@ -270,6 +441,22 @@ class ListenTrackViewSet(viewsets.mixins.ListModelMixin,
     permission_classes = (permissions.IsAuthenticated,)
 
 
+class RecentlyPlayedView(APIView):
+    """Authorised user sees tracks he played recently, the latest first.
+
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        track_ids = RecentlyPlayed(request.user).get_track_ids()
+        tracks = Track.objects.in_bulk(track_ids)
+        serializer = TrackShortSerializer(
+            [tracks[pk] for pk in track_ids if pk in tracks],
+            many=True,
+        )
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
 # ##############################################################################
 # SEARCH
 # ##############################################################################
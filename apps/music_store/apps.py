@@ -7,3 +7,7 @@ class MusicStoreAppDefaultConfig(AppConfig):
 
     name = 'apps.music_store'
     verbose_name = 'MusicStore'
+
+    def ready(self):
+        # connect invalidation of cached objects
+        from . import caches  # noqa
@@ -0,0 +1,187 @@
+"""Readers of archives with albums and tracks.
+
+Archives are imported through readers (see ``tasks.get_tracks_from_zip``).
+Reader iterates over regular files of archive in order they are stored
+and yields their names and opened files:
+
+    with open_archive(file) as reader:
+        for filename, member in reader:
+            content = member.read()
+
+Member must be read before the next one is requested. Tar archives
+(plain, gzip, bzip2 and zstd compressed) are read in a single pass, so
+they are never seeked and may be read from non-seekable streams.
+
+"""
+import tarfile
+import zipfile
+
+import zstandard
+
+ZIP = 'zip'
+TAR = 'tar'
+TAR_GZ = 'gz'
+TAR_BZ2 = 'bz2'
+TAR_ZST = 'zst'
+
+TAR_FORMATS = (TAR, TAR_GZ, TAR_BZ2, TAR_ZST)
+
+# magic numbers at the start of files
+SIGNATURES = (
+    (b'PK\x03\x04', ZIP),
+    (b'PK\x05\x06', ZIP),
+    (b'\x1f\x8b', TAR_GZ),
+    (b'BZh', TAR_BZ2),
+    (b'\x28\xb5\x2f\xfd', TAR_ZST),
+)
+
+# extensions of supported archives, longer ones go first
+EXTENSIONS = (
+    '.tar.gz', '.tar.bz2', '.tar.zst', '.tgz', '.tbz2', '.tzst', '.tar',
+    '.zip',
+)
+
+
+def get_extension(filename):
+    """Get extension of archive from its filename.
+
+    Args:
+        filename (str): name of archive file.
+
+    Returns:
+        str: extension in lower case with leading dot, empty string if
+            extension isn't supported.
+
+    """
+    filename = filename.lower()
+    for extension in EXTENSIONS:
+        if filename.endswith(extension):
+            return extension
+    return ''
+
+
+def detect_format(file):
+    """Detect format of archive by its first bytes.
+
+    File is rewound to the start after detection.
+
+    Args:
+        file (file): seekable file opened in binary mode.
+
+    Returns:
+        str: one of format constants, None if format isn't supported.
+
+    """
+    header = file.read(tarfile.BLOCKSIZE)
+    file.seek(0)
+    for signature, archive_format in SIGNATURES:
+        if header.startswith(signature):
+            return archive_format
+    # uncompressed tar has magic inside header of the first member
+    if header[257:262] == b'ustar':
+        return TAR
+    # ZIP may have data before the first member (like self-extracting
+    # archives), it's found by central directory at the end
+    is_zip = zipfile.is_zipfile(file)
+    file.seek(0)
+    return ZIP if is_zip else None
+
+
+class ArchiveReader:
+    """Base class for readers of archives."""
+
+    def __iter__(self):
+        """Yield names and files of regular members of archive"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources of reader"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ZipReader(ArchiveReader):
+    """Reader of ZIP archives in order of central directory.
+
+    Members of ZIP are read in any order, so importers may use opened
+    ``zip_file`` directly (see ``AlbumUnpacker``).
+
+    """
+
+    def __init__(self, file):
+        self.zip_file = zipfile.ZipFile(file)
+
+    def __iter__(self):
+        for info in self.zip_file.infolist():
+            if not info.is_dir():
+                with self.zip_file.open(info) as member:
+                    yield info.filename, member
+
+    def close(self):
+        self.zip_file.close()
+
+
+class TarReader(ArchiveReader):
+    """Single pass reader of tar archives.
+
+    Examples:
+
+        with TarReader(file, compression=TAR_ZST) as reader:
+            for filename, member in reader:
+                ...
+
+    """
+
+    def __init__(self, file, compression=TAR):
+        """
+        Args:
+            file (file): file opened in binary mode, may be non-seekable.
+            compression (str): one of TAR_FORMATS.
+        """
+        self.decompressor = None
+        if compression == TAR_ZST:
+            self.decompressor = zstandard.ZstdDecompressor().stream_reader(
+                file
+            )
+            file = self.decompressor.__enter__()
+            compression = TAR
+        mode = 'r|' if compression == TAR else f'r|{compression}'
+        self.tar_file = tarfile.open(fileobj=file, mode=mode)
+
+    def __iter__(self):
+        for info in self.tar_file:
+            if info.isfile():
+                # names may be stored like './album/track'
+                filename = info.name[2:] if info.name.startswith('./') \
+                    else info.name
+                yield filename, self.tar_file.extractfile(info)
+            # tarfile keeps headers of all read members, it's needless
+            # for single pass and takes memory for huge archives
+            self.tar_file.members = []
+
+    def close(self):
+        self.tar_file.close()
+        if self.decompressor is not None:
+            self.decompressor.__exit__(None, None, None)
+
+
+def open_archive(file):
+    """Get reader of archive of detected format.
+
+    Args:
+        file (file): seekable file opened in binary mode.
+
+    Raises:
+        TypeError: if format of archive isn't supported.
+
+    """
+    archive_format = detect_format(file)
+    if archive_format == ZIP:
+        return ZipReader(file)
+    if archive_format in TAR_FORMATS:
+        return TarReader(file, compression=archive_format)
+    raise TypeError(f'{file} is not a supported archive')
@@ -0,0 +1,207 @@
+"""Benchmarks of music store, run with ``benchmark`` management command."""
+import hashlib
+import io
+import resource
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import override_settings
+
+from libs.benchmarks import register
+from libs.files import RangeFile, stream_zip
+from libs.object_cache import ObjectCache
+from libs.testing.utils import LocalS3Object
+
+from .models import Album, Track
+from .tasks import get_tracks_from_zip
+from .utils import iter_album_files
+
+
+def make_archive(tracks, album_size=10, track_size=4096):
+    """Create ZIP archive with albums of synthetic tracks in memory.
+
+    Args:
+        tracks (int): number of tracks in archive.
+        album_size (int): number of tracks in each album.
+        track_size (int): size of track content in bytes.
+
+    """
+    archive = io.BytesIO()
+    content = b'x' * track_size
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for number in range(tracks):
+            album = number // album_size
+            zip_file.writestr(
+                f'Artist {album} - Album {album}/Track {number}.txt',
+                content,
+            )
+    archive.seek(0)
+    return archive
+
+
+@register('album_import', default_size=2000)
+def album_import(size):
+    """End-to-end import of archive by `get_tracks_from_zip` task"""
+    filename = default_storage.save(
+        f'benchmark-{uuid.uuid4()}.zip',
+        make_archive(size),
+    )
+    try:
+        start = time.perf_counter()
+        result = get_tracks_from_zip.apply(args=[filename]).get()
+        elapsed = time.perf_counter() - start
+    finally:
+        default_storage.delete(filename)
+
+    return {
+        'result': result,
+        'seconds': elapsed,
+        'tracks_per_second': size / elapsed,
+    }
+
+
+@register('remote_archive_read', default_size=2048)
+def remote_archive_read(size):
+    """Read of archive member through `RangeFile` from local S3 stand-in.
+
+    Archive of ``size`` megabytes is written to temporary file, then its
+    central directory and the last member are read with range requests.
+    Peak RSS must not grow with size of archive.
+
+    """
+    member_size = 64 * 2 ** 20
+    block = b'x' * 2 ** 20
+    with tempfile.TemporaryFile() as archive:
+        with zipfile.ZipFile(archive, 'w', allowZip64=True) as zip_file:
+            for number in range(max(size * 2 ** 20 // member_size, 1)):
+                info = zipfile.ZipInfo(f'Artist - Album/Track {number}.bin')
+                with zip_file.open(info, 'w', force_zip64=True) as member:
+                    for _ in range(member_size // len(block)):
+                        member.write(block)
+
+        start = time.perf_counter()
+        remote_file = RangeFile(LocalS3Object(archive))
+        with zipfile.ZipFile(io.BufferedReader(remote_file)) as zip_file:
+            last = zip_file.infolist()[-1]
+            digest = hashlib.sha256()
+            with zip_file.open(last) as member:
+                for chunk in iter(lambda: member.read(2 ** 20), b''):
+                    digest.update(chunk)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'archive_mb': archive.seek(0, io.SEEK_END) / 2 ** 20,
+            'fetched_mb': remote_file.fetched_bytes / 2 ** 20,
+            'requests': remote_file.requests_count,
+            'seconds': elapsed,
+            # ru_maxrss is measured in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss / 2 ** 10,
+        }
+
+
+@register('album_download', default_size=500)
+def album_download(size):
+    """Streaming ZIP download of album with ``size`` tracks of 64 KB.
+
+    Archive is only counted, not kept, like it's sent to client. Peak RSS
+    must not grow with size of album.
+
+    """
+    album = Album.objects.create(author='Artist', title='Album', price=10)
+    tracks = []
+    for number in range(size):
+        track = Track(
+            album=album,
+            author=album.author,
+            title=f'Track {number}.txt',
+            price=1,
+            full_version=uuid.uuid4().hex * 2 ** 11,
+        )
+        track.fill_derived_fields()
+        tracks.append(track)
+    Track.objects.bulk_create(tracks)
+
+    start = time.perf_counter()
+    archive_size = sum(
+        len(part) for part in stream_zip(iter_album_files(album))
+    )
+    elapsed = time.perf_counter() - start
+
+    return {
+        'archive_mb': archive_size / 2 ** 20,
+        'seconds': elapsed,
+        'tracks_per_second': size / elapsed,
+        'content_mb_per_second': size * 2 ** 16 / 2 ** 20 / elapsed,
+        # ru_maxrss is measured in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss / 2 ** 10,
+    }
+
+
+def _run_storm(object_cache, pk, threads_count):
+    """Get instance from cache by concurrent threads at once"""
+    barrier = threading.Barrier(threads_count)
+
+    def request():
+        barrier.wait()
+        try:
+            object_cache.get(pk)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=request) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@register('object_cache_storm', default_size=50)
+def object_cache_storm(size):
+    """Concurrent requests of album by ``size`` threads after its expiry.
+
+    Album is requested right after it's expired (stale copy is in Redis)
+    and right after it's invalidated (nothing is in Redis), with and
+    without single-flight. Process cache is disabled, so each thread acts
+    like a separate process. Benchmark needs an album in DB, since threads
+    don't see data of benchmark transaction.
+
+    """
+    album = Album.objects.order_by('id').first()
+    if album is None:
+        raise ValueError('Create an album to run the benchmark')
+
+    metrics = {}
+    with override_settings(OBJECT_CACHE_ENABLED=True):
+        for single_flight in (False, True):
+            object_cache = ObjectCache(Album, local_size=0,
+                                       single_flight=single_flight)
+            key = object_cache.get_key(album.pk)
+            name = 'single_flight' if single_flight else 'no_single_flight'
+
+            # expired album is kept in Redis
+            object_cache.get(album.pk)
+            stale_data = cache.get(key)[1]
+            cache.set(key, (time.time() - 1, stale_data))
+            misses = object_cache.misses
+            _run_storm(object_cache, album.pk, size)
+            metrics[f'{name}_expired_db_queries'] = \
+                object_cache.misses - misses
+
+            # invalidated album is missing in Redis
+            cache.delete(key)
+            misses = object_cache.misses
+            _run_storm(object_cache, album.pk, size)
+            metrics[f'{name}_invalidated_db_queries'] = \
+                object_cache.misses - misses
+            metrics[f'{name}_stats'] = object_cache.get_stats()
+
+            cache.delete(key)
+    return metrics
@@ -0,0 +1,13 @@
+"""Caches of hot catalog objects.
+
+Caches are created on start of application (see ``apps.py``), so instances
+are invalidated when they're changed by any process, like admin or
+workers importing albums.
+
+"""
+from libs.object_cache import ObjectCache
+
+from .models import Album, Track
+
+album_cache = ObjectCache(Album)
+track_cache = ObjectCache(Track)
@@ -0,0 +1,342 @@
+"""Stream of domain events: listens, likes and purchases.
+
+Events are published to Kafka topic ``settings.KAFKA['EVENTS_TOPIC']``.
+Publishing doesn't block request: events are put into in-process queue
+after commit of the action and sent to broker in batches from background
+thread.
+
+Downstream aggregators (charts, rollups, recommendations) subclass
+``EventConsumer`` and are run with ``consume_events`` management
+command.
+
+Each event is encoded as compact JSON array:
+
+    [type, user_id, item_type, item_id, timestamp]
+
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+EVENT_LISTEN = 'listen'
+EVENT_LIKE = 'like'
+EVENT_UNLIKE = 'unlike'
+EVENT_PURCHASE = 'purchase'
+
+
+class Event(namedtuple('Event', ['type', 'user_id', 'item_type', 'item_id',
+                                 'timestamp'])):
+    """Domain event.
+
+    Attributes:
+        type (str): one of EVENT_* constants.
+        user_id (int): id of user who made an action.
+        item_type (str): model name of item, `track` or `album`.
+        item_id (int): id of item.
+        timestamp (float): unix time of action.
+
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, event_type, user, item):
+        """Create event about user's action with item"""
+        return cls(
+            type=event_type,
+            user_id=user.pk,
+            item_type=item._meta.model_name,
+            item_id=item.pk,
+            timestamp=time.time(),
+        )
+
+    def encode(self):
+        """Encode event to bytes"""
+        return json.dumps(list(self), separators=(',', ':')).encode()
+
+    @classmethod
+    def decode(cls, message):
+        """Decode event from bytes"""
+        return cls(*json.loads(message.decode()))
+
+
+class KafkaBroker:
+    """Broker sending and receiving messages with Kafka."""
+
+    def __init__(self, servers, group):
+        self.servers = servers
+        self.group = group
+        self._producer = None
+        self._consumers = {}
+
+    @property
+    def producer(self):
+        if self._producer is None:
+            from kafka import KafkaProducer
+            self._producer = KafkaProducer(bootstrap_servers=self.servers)
+        return self._producer
+
+    def get_consumer(self, topic, group):
+        if (topic, group) not in self._consumers:
+            from kafka import KafkaConsumer
+            self._consumers[topic, group] = KafkaConsumer(
+                topic,
+                bootstrap_servers=self.servers,
+                group_id=group or self.group,
+                enable_auto_commit=False,
+            )
+        return self._consumers[topic, group]
+
+    def send_batch(self, topic, messages):
+        """Send messages and wait until they are acknowledged"""
+        for message in messages:
+            self.producer.send(topic, message)
+        self.producer.flush()
+
+    def poll(self, topic, group, max_records, timeout):
+        """Get messages not consumed by the group yet"""
+        records = self.get_consumer(topic, group).poll(
+            timeout_ms=int(timeout * 1000),
+            max_records=max_records,
+        )
+        return [
+            record.value
+            for partition_records in records.values()
+            for record in partition_records
+        ]
+
+    def commit(self, topic, group):
+        """Mark polled messages as consumed by the group"""
+        self.get_consumer(topic, group).commit()
+
+
+class InMemoryBroker:
+    """In-process stand-in for Kafka used in tests.
+
+    Keeps messages of each topic in a list and offsets of consumer groups
+    like Kafka does.
+
+    """
+
+    def __init__(self, servers=None, group=None):
+        self.group = group
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Remove all messages and offsets"""
+        with self.lock:
+            self.topics = defaultdict(list)
+            self.positions = defaultdict(int)
+            self.offsets = defaultdict(int)
+
+    def send_batch(self, topic, messages):
+        with self.lock:
+            self.topics[topic].extend(messages)
+
+    def poll(self, topic, group, max_records, timeout):
+        with self.lock:
+            key = (topic, group or self.group)
+            start = self.positions[key] = self.offsets[key]
+            messages = self.topics[topic][start:start + max_records]
+            self.positions[key] += len(messages)
+            return messages
+
+    def commit(self, topic, group):
+        with self.lock:
+            key = (topic, group or self.group)
+            self.offsets[key] = self.positions[key]
+
+
+class EventPublisher:
+    """Publisher of events sending them in batches from background thread.
+
+    Thread is started on first publishing in each process, so publisher
+    keeps working in forked workers.
+
+    """
+
+    def __init__(self, broker, topic, batch_size, linger, queue_size):
+        """
+        Args:
+            broker (KafkaBroker|InMemoryBroker): broker to send events to.
+            topic (str): topic of events.
+            batch_size (int): max number of events sent at once.
+            linger (float): max time (in seconds) event waits for batch.
+            queue_size (int): max number of events waiting to be sent.
+        """
+        self.broker = broker
+        self.topic = topic
+        self.batch_size = batch_size
+        self.linger = linger
+        self.queue_size = queue_size
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        """Put event to the queue of events to send.
+
+        Never blocks: event is dropped if queue is full.
+
+        """
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            logger.warning('Queue of events is full, %s is dropped', event)
+
+    def flush(self):
+        """Wait until all published events are sent"""
+        if self._pid == os.getpid():
+            self.queue.join()
+
+    def _ensure_started(self):
+        """Start sending thread if it's not started in this process"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        """Send events from the queue in batches"""
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                self.broker.send_batch(
+                    self.topic,
+                    [event.encode() for event in batch],
+                )
+            except Exception:
+                logger.exception('%s events are not sent', len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Get broker configured with ``settings.KAFKA``"""
+    broker_class = import_string(settings.KAFKA['BROKER'])
+    return broker_class(
+        servers=settings.KAFKA['SERVERS'],
+        group=settings.KAFKA['GROUP'],
+    )
+
+
+@lru_cache(maxsize=None)
+def get_publisher():
+    """Get publisher configured with ``settings.KAFKA``"""
+    return EventPublisher(
+        broker=get_broker(),
+        topic=settings.KAFKA['EVENTS_TOPIC'],
+        batch_size=settings.KAFKA['BATCH_SIZE'],
+        linger=settings.KAFKA['LINGER'],
+        queue_size=settings.KAFKA['QUEUE_SIZE'],
+    )
+
+
+def publish(event_type, user, item):
+    """Publish event about user's action with item.
+
+    Event is published after commit of the current transaction (at once in
+    autocommit mode), so actions rolled back aren't published and
+    consumers see saved actions only.
+
+    Args:
+        event_type (str): one of EVENT_* constants.
+        user (AppUser): user who made an action.
+        item (Album|Track): item of action.
+
+    """
+    event = Event.create(event_type, user, item)
+    transaction.on_commit(lambda: get_publisher().publish(event))
+
+
+class EventConsumer:
+    """Base class for downstream aggregators of events.
+
+    Subclasses define consumer ``group`` and implement ``handle_batch``
+    (or ``handle`` for a single event). Events are marked as consumed after
+    the whole batch is handled, so failed batch is handled again.
+
+    Examples:
+
+        class ListensCounter(EventConsumer):
+            group = 'listens_counter'
+            event_types = (EVENT_LISTEN,)
+
+            def handle(self, event):
+                # increment counter of event.item_id
+
+        ListensCounter().run()
+
+    """
+    group = None
+    # types of handled events, all events are handled if None
+    event_types = None
+    max_records = 500
+    timeout = 1.0
+
+    def __init__(self, broker=None, topic=None):
+        self.broker = broker or get_broker()
+        self.topic = topic or settings.KAFKA['EVENTS_TOPIC']
+
+    def handle(self, event):
+        """Handle a single event"""
+        raise NotImplementedError
+
+    def handle_batch(self, events):
+        """Handle events polled at once"""
+        for event in events:
+            self.handle(event)
+
+    def poll(self):
+        """Poll and handle the next batch of events.
+
+        Returns:
+            int: number of polled events.
+
+        """
+        messages = self.broker.poll(
+            self.topic, self.group, self.max_records, self.timeout,
+        )
+        events = [Event.decode(message) for message in messages]
+        if self.event_types is not None:
+            events = [
+                event for event in events if event.type in self.event_types
+            ]
+        self.handle_batch(events)
+        self.broker.commit(self.topic, self.group)
+        return len(messages)
+
+    def run(self, max_batches=None):
+        """Handle events until ``max_batches`` batches are polled"""
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            self.poll()
+            batches += 1
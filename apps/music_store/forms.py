@@ -1,6 +1,16 @@
-from django.forms import forms
+from django import forms
+
+from .models import ArchiveUpload
 
 
 class AlbumUploadArchiveForm(forms.Form):
     """Form for upload archive"""
     file = forms.FileField()
+
+
+class ArchiveUploadForm(forms.ModelForm):
+    """Form to start chunked upload of archive"""
+
+    class Meta:
+        model = ArchiveUpload
+        fields = ('filename', 'size')
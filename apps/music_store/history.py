@@ -0,0 +1,97 @@
+import logging
+
+from django.conf import settings
+from django.db.models import Max
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class RecentlyPlayed:
+    """Capped list of tracks recently played by the user.
+
+    Ids of tracks are stored in Redis list, the latest one first.
+    Each track is kept in the list once. List expires in
+    ``RECENTLY_PLAYED_TIMEOUT`` after it's updated. When list is missing
+    in Redis (expired, flushed or Redis is unavailable) it's restored from
+    listens stored in database.
+
+    """
+    key_template = 'music_store:recently_played:{user_id}'
+
+    def __init__(self, user, size=None):
+        """
+        Args:
+            user (AppUser): user who listens to tracks.
+            size (int): max number of tracks in the list.
+        """
+        self.user = user
+        self.size = size or settings.RECENTLY_PLAYED_SIZE
+        self.key = self.key_template.format(user_id=user.pk)
+
+    @property
+    def redis(self):
+        return get_redis_connection('default')
+
+    def push(self, track_id):
+        """Put track on top of the list.
+
+        Missing list is not created here (LPUSHX), so it's restored from
+        database with the listened track on the next read.
+
+        """
+        try:
+            pipe = self.redis.pipeline()
+            pipe.lrem(self.key, 0, track_id)
+            pipe.lpushx(self.key, track_id)
+            pipe.ltrim(self.key, 0, self.size - 1)
+            pipe.expire(self.key, settings.RECENTLY_PLAYED_TIMEOUT)
+            pipe.execute()
+        except RedisError:
+            logger.warning('Recently played tracks are not updated',
+                           exc_info=True)
+
+    def get_track_ids(self):
+        """Get ids of recently played tracks, the latest one first"""
+        try:
+            track_ids = self.redis.lrange(self.key, 0, self.size - 1)
+        except RedisError:
+            logger.warning('Recently played tracks are read from database',
+                           exc_info=True)
+            return self._get_track_ids_from_db()
+
+        if track_ids:
+            return [int(track_id) for track_id in track_ids]
+
+        track_ids = self._get_track_ids_from_db()
+        if track_ids:
+            self._fill(track_ids)
+        return track_ids
+
+    def clear(self):
+        """Remove the list from Redis"""
+        self.redis.delete(self.key)
+
+    def _get_track_ids_from_db(self):
+        """Get ids of latest listened tracks from database"""
+        return list(
+            self.user.listentrack_set.values('track_id').annotate(
+                listened=Max('created'),
+            ).order_by('-listened').values_list(
+                'track_id', flat=True,
+            )[:self.size]
+        )
+
+    def _fill(self, track_ids):
+        """Store list of track ids in Redis"""
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete(self.key)
+            pipe.rpush(self.key, *track_ids)
+            pipe.expire(self.key, settings.RECENTLY_PLAYED_TIMEOUT)
+            pipe.execute()
+        except RedisError:
+            logger.warning('Recently played tracks are not cached',
+                           exc_info=True)
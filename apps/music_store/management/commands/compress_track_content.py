@@ -0,0 +1,127 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+import zstandard
+
+from apps.music_store.models import ContentDictionary, TrackContent
+
+
+class Command(BaseCommand):
+    """Compress stored contents of tracks with the current dictionary.
+
+    Converts contents stored uncompressed or compressed with older
+    dictionaries batch by batch, each batch is committed separately, so
+    command may be stopped and run again. Reports storage saved and cost of
+    decompression.
+
+    Examples:
+
+        ./manage.py compress_track_content --train --samples 10000
+
+    """
+    help = 'Compress stored contents of tracks with zstd dictionary'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--train',
+            action='store_true',
+            help='Train new dictionary on samples of contents first',
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=10000,
+            help='Number of contents used to train dictionary',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of contents converted in one transaction',
+        )
+
+    def handle(self, *args, **options):
+        if options['train']:
+            self.train(options['samples'])
+
+        dictionary = ContentDictionary.objects.current()
+        compressor = ContentDictionary.get_compressor(
+            dictionary and dictionary.id
+        )
+        decompressor = ContentDictionary.get_decompressor(
+            dictionary and dictionary.id
+        )
+        contents = TrackContent.objects.exclude(
+            dictionary=dictionary,
+            compressed_version__isnull=False,
+        ).order_by('track_id')
+
+        converted = stored_before = stored_after = content_size = 0
+        decode_seconds = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    contents.filter(track_id__gt=last_id)
+                    .select_for_update()[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                for content in batch:
+                    stored_before += self.get_stored_size(content)
+                    content.compress(compressor, dictionary)
+                    TrackContent.objects.filter(pk=content.pk).update(
+                        raw_version='',
+                        compressed_version=content.compressed_version,
+                        dictionary=dictionary,
+                    )
+                    stored_after += len(content.compressed_version)
+                    content_size += len(content.full_version.encode())
+
+                    start = time.perf_counter()
+                    decompressor.decompress(content.compressed_version)
+                    decode_seconds += time.perf_counter() - start
+            converted += len(batch)
+            last_id = batch[-1].pk
+            self.stdout.write(f'{converted} contents converted')
+
+        self.report(converted, stored_before, stored_after, content_size,
+                    decode_seconds)
+
+    def train(self, samples_count):
+        """Train new dictionary on the latest contents"""
+        contents = TrackContent.objects.order_by('-track_id')[:samples_count]
+        samples = [content.full_version.encode() for content in contents]
+        try:
+            dictionary = ContentDictionary.train(samples)
+        except zstandard.ZstdError as e:
+            raise CommandError(f'Dictionary is not trained: {e}')
+        self.stdout.write(
+            f'Dictionary {dictionary} is trained on {len(samples)} samples'
+        )
+
+    @staticmethod
+    def get_stored_size(content):
+        """Get number of bytes taken by stored content"""
+        if content.compressed_version is None:
+            return len(content.raw_version.encode())
+        return len(content.compressed_version)
+
+    def report(self, converted, stored_before, stored_after, content_size,
+               decode_seconds):
+        """Write statistics of conversion"""
+        megabyte = 2 ** 20
+        self.stdout.write(
+            f'{converted} contents converted, '
+            f'{stored_before / megabyte:.2f} MB -> '
+            f'{stored_after / megabyte:.2f} MB stored, '
+            f'{(stored_before - stored_after) / megabyte:.2f} MB saved'
+        )
+        if content_size:
+            self.stdout.write(
+                f'Decompression takes '
+                f'{decode_seconds * 1000 / (content_size / megabyte):.2f} ms '
+                f'per MB of content'
+            )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    """Run consumer of domain events.
+
+    Examples:
+
+        ./manage.py consume_events apps.charts.consumers.ChartsConsumer
+
+    """
+    help = 'Run consumer of listens, likes and purchases events'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'consumer',
+            help='Dotted path to subclass of events.EventConsumer',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after given number of batches',
+        )
+
+    def handle(self, *args, **options):
+        consumer = import_string(options['consumer'])()
+        self.stdout.write(f'Consuming events by {options["consumer"]}...')
+        consumer.run(max_batches=options['max_batches'])
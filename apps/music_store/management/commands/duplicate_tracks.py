@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from apps.music_store.models import Track
+
+
+class Command(BaseCommand):
+    """List clusters of tracks with the same content.
+
+    Tracks are compared by ``content_hash``, the largest clusters first.
+
+    Examples:
+
+        ./manage.py duplicate_tracks --limit 20
+
+    """
+    help = 'List clusters of tracks with the same content'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Max number of listed clusters',
+        )
+
+    def handle(self, *args, **options):
+        clusters = Track.objects.exclude(content_hash='').values(
+            'content_hash',
+        ).annotate(
+            tracks_count=Count('id'),
+        ).filter(
+            tracks_count__gt=1,
+        ).order_by('-tracks_count', 'content_hash')[:options['limit']]
+
+        clusters = list(clusters)
+        tracks = Track.objects.filter(
+            content_hash__in=[cluster['content_hash'] for cluster in clusters],
+        ).order_by('id')
+        tracks_by_hash = {}
+        for track in tracks:
+            tracks_by_hash.setdefault(track.content_hash, []).append(track)
+
+        for cluster in clusters:
+            content_hash = cluster['content_hash']
+            self.stdout.write(
+                f'{content_hash} ({cluster["tracks_count"]} tracks)'
+            )
+            for track in tracks_by_hash[content_hash]:
+                self.stdout.write(f'  {track.id}: {track}')
+
+        self.stdout.write(f'{len(clusters)} clusters of duplicates found')
@@ -0,0 +1,139 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+
+from apps.music_store.api.views import AlbumViewSet, TrackViewSet
+from apps.music_store.caches import album_cache, track_cache
+from apps.music_store.models import Album, Track
+
+# number of objects warmed by one task
+BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    """Fill caches of catalog after deploy.
+
+    Warms Redis tier of object caches with the most bought tracks and
+    albums and cacheops querysets of the first pages of catalog lists seen
+    by anonymous users. Work is split into small tasks run by a thread pool,
+    tasks not started within the time budget are skipped.
+
+    Examples:
+
+        ./manage.py warm_caches --items 5000 --pages 10 --concurrency 16
+
+    """
+    help = 'Warm caches of tracks, albums and catalog pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=1000,
+            help='Number of the most bought tracks and albums to warm',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=5,
+            help='Number of the first pages of catalog lists to warm',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Number of threads warming caches',
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            default=60,
+            help='Max time (in seconds) of warming',
+        )
+
+    def handle(self, *args, **options):
+        tasks = self.get_tasks(options['items'], options['pages'])
+        warmed = Counter()
+        failed = Counter()
+        start = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = {
+                pool.submit(self.run_task, func, *args): name
+                for name, func, args in tasks
+            }
+            done, not_done = wait(futures, timeout=options['time_budget'])
+            # tasks which are already running are finished anyway
+            skipped = sum(future.cancel() for future in not_done)
+
+        for future in done:
+            name = futures[future]
+            try:
+                warmed[name] += future.result()
+            except Exception as e:
+                failed[name] += 1
+                self.stderr.write(f'Warming of {name} failed: {e!r}')
+
+        elapsed = time.monotonic() - start
+        for name in sorted(set(futures.values())):
+            self.stdout.write(
+                f'{name}: {warmed[name]} warmed, {failed[name]} tasks failed'
+            )
+        self.stdout.write(
+            f'Caches are warmed in {elapsed:.1f} s, '
+            f'{skipped} tasks skipped by time budget'
+        )
+
+    def get_tasks(self, items, pages):
+        """Get names, functions and arguments of warming tasks"""
+        tasks = []
+        for name, model, object_cache in (('tracks', Track, track_cache),
+                                          ('albums', Album, album_cache)):
+            pks = list(
+                model.objects.filter(price__gte=0)
+                .annotate(purchases=Count('bought_users'))
+                .order_by('-purchases', 'pk')
+                .values_list('pk', flat=True)[:items]
+            )
+            for index in range(0, len(pks), BATCH_SIZE):
+                batch = pks[index:index + BATCH_SIZE]
+                tasks.append((name, self.warm_objects, (object_cache, batch)))
+
+        for name, viewset in (('track pages', TrackViewSet),
+                              ('album pages', AlbumViewSet)):
+            for page in range(1, pages + 1):
+                tasks.append((name, self.warm_page, (viewset, page)))
+        return tasks
+
+    @staticmethod
+    def run_task(func, *args):
+        """Run task in thread of pool and close its DB connection"""
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def warm_objects(object_cache, pks):
+        """Put objects to object cache"""
+        warmed = 0
+        for pk in pks:
+            try:
+                object_cache.get(pk)
+            except object_cache.model.DoesNotExist:
+                continue
+            warmed += 1
+        return warmed
+
+    @staticmethod
+    def warm_page(viewset, page):
+        """Request page of catalog list as anonymous user"""
+        view = viewset.as_view({'get': 'list'})
+        request = RequestFactory().get('/', {'page': page})
+        response = view(request)
+        return int(response.status_code == 200)
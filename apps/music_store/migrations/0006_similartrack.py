@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2018-05-21 07:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_store', '0005_auto_20180510_0546'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarTrack',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='score')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_for', to='music_store.Track', verbose_name='similar track')),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_tracks', to='music_store.Track', verbose_name='track')),
+            ],
+            options={
+                'verbose_name': 'Similar track',
+                'verbose_name_plural': 'Similar tracks',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='similartrack',
+            unique_together=set([('track', 'similar')]),
+        ),
+    ]
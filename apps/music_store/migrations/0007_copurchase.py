@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2018-05-22 05:31
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('music_store', '0006_similartrack'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoPurchase',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.PositiveIntegerField()),
+                ('other_id', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+                ('item_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType')),
+                ('other_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType')),
+            ],
+            options={
+                'verbose_name': 'Co-purchase',
+                'verbose_name_plural': 'Co-purchases',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='copurchase',
+            unique_together=set([('item_type', 'item_id', 'other_type', 'other_id')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2018-05-23 08:47
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_store', '0007_copurchase'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listentrack',
+            index=models.Index(fields=['user', '-created'], name='music_store_user_id_8b7e4f_idx'),
+        ),
+    ]
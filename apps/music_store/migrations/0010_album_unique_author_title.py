@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2018-05-28 08:41
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_albums(apps, schema_editor):
+    """Merge albums with the same author and title into the oldest one.
+
+    Tracks, purchases and payments of duplicates are moved to the kept
+    album. User who bought several duplicates keeps one purchase (of the
+    kept album or the earliest one), others are deleted, as album can be
+    bought once. Payments of deleted purchases are kept. Counters of items
+    bought together with duplicates are dropped, they're approximate and
+    are counted again on new purchases.
+
+    """
+    Album = apps.get_model('music_store', 'Album')
+    Track = apps.get_model('music_store', 'Track')
+    BoughtAlbum = apps.get_model('music_store', 'BoughtAlbum')
+    PaymentTransaction = apps.get_model('music_store', 'PaymentTransaction')
+    CoPurchase = apps.get_model('music_store', 'CoPurchase')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    album_type = ContentType.objects.filter(
+        app_label='music_store', model='album',
+    ).first()
+    duplicates = Album.objects.values('author', 'title').annotate(
+        albums_count=Count('id'),
+        kept_id=Min('id'),
+    ).filter(albums_count__gt=1)
+
+    for duplicate in duplicates.iterator():
+        kept_id = duplicate['kept_id']
+        removed_ids = list(Album.objects.filter(
+            author=duplicate['author'],
+            title=duplicate['title'],
+        ).exclude(id=kept_id).values_list('id', flat=True))
+
+        Track.objects.filter(album_id__in=removed_ids).update(
+            album_id=kept_id,
+        )
+        buyers = set(BoughtAlbum.objects.filter(
+            item_id=kept_id,
+        ).values_list('user_id', flat=True))
+        repeated_purchases = []
+        purchases = BoughtAlbum.objects.filter(
+            item_id__in=removed_ids,
+        ).order_by('id').values_list('id', 'user_id')
+        for purchase_id, user_id in purchases:
+            if user_id in buyers:
+                repeated_purchases.append(purchase_id)
+            buyers.add(user_id)
+        BoughtAlbum.objects.filter(id__in=repeated_purchases).delete()
+        BoughtAlbum.objects.filter(item_id__in=removed_ids).update(
+            item_id=kept_id,
+        )
+        if album_type is not None:
+            PaymentTransaction.objects.filter(
+                content_type=album_type,
+                object_id__in=removed_ids,
+            ).update(object_id=kept_id)
+            CoPurchase.objects.filter(
+                item_type=album_type,
+                item_id__in=removed_ids,
+            ).delete()
+            CoPurchase.objects.filter(
+                other_type=album_type,
+                other_id__in=removed_ids,
+            ).delete()
+        Album.objects.filter(id__in=removed_ids).delete()
+
+
+class Migration(migrations.Migration):
+    # albums are merged in their own transaction, so deferred checks of
+    # foreign keys don't block altering of the table
+    atomic = False
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('music_store', '0009_outboxevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_albums,
+            migrations.RunPython.noop,
+            atomic=True,
+        ),
+        migrations.AlterUniqueTogether(
+            name='album',
+            unique_together=set([('author', 'title')]),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import migrations, transaction
+
+# number of tracks hashed in one transaction
+BATCH_SIZE = 1000
+
+
+def fill_content_hash(apps, schema_editor):
+    """Compute hashes of content of existing tracks in batches.
+
+    Each batch is updated with single query in its own transaction, so
+    rows are locked briefly. Only tracks without hash are read, so
+    migration continues from the last batch if it's restarted.
+
+    """
+    Track = apps.get_model('music_store', 'Track')
+    db_alias = schema_editor.connection.alias
+    table = schema_editor.quote_name(Track._meta.db_table)
+    last_id = 0
+    while True:
+        tracks = list(
+            Track.objects.using(db_alias).filter(
+                content_hash='', id__gt=last_id,
+            ).order_by('id').values_list('id', 'full_version')[:BATCH_SIZE]
+        )
+        if not tracks:
+            break
+        params = []
+        for track_id, content in tracks:
+            params.extend(
+                (track_id, hashlib.sha256(content.encode()).hexdigest())
+            )
+        values = ', '.join(['(%s, %s)'] * len(tracks))
+        with transaction.atomic(using=db_alias), \
+                schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS track SET content_hash = hashes.hash '
+                f'FROM (VALUES {values}) AS hashes (id, hash) '
+                f'WHERE track.id = hashes.id',
+                params,
+            )
+        last_id = tracks[-1][0]
+
+
+class Migration(migrations.Migration):
+    # tracks are hashed in batches committed as they go
+    atomic = False
+
+    dependencies = [
+        ('music_store', '0011_track_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2018-05-30 10:24
+from __future__ import unicode_literals
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('music_store', '0011_fill_track_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveUpload',
+            fields=[
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='filename')),
+                ('size', models.BigIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='size')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='chunk size')),
+                ('archive', models.CharField(blank=True, max_length=255, verbose_name='archive')),
+                ('task_id', models.CharField(blank=True, max_length=255, verbose_name='task id')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_uploads', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'Archive upload',
+                'verbose_name_plural': 'Archive uploads',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchiveUploadChunk',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='index')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('checksum', models.CharField(max_length=64, verbose_name='checksum')),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='music_store.ArchiveUpload', verbose_name='upload')),
+            ],
+            options={
+                'verbose_name': 'Archive upload chunk',
+                'verbose_name_plural': 'Archive upload chunks',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='archiveuploadchunk',
+            unique_together=set([('upload', 'index')]),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, transaction
+
+# number of tracks moved in one transaction
+BATCH_SIZE = 1000
+
+
+def move_content(apps, schema_editor):
+    """Copy content of tracks to TrackContent batch by batch.
+
+    Each batch is committed, only tracks without TrackContent are read,
+    so migration continues from the last batch if it's restarted.
+
+    """
+    Track = apps.get_model('music_store', 'Track')
+    TrackContent = apps.get_model('music_store', 'TrackContent')
+    db_alias = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        tracks = list(
+            Track.objects.using(db_alias)
+            .filter(id__gt=last_id, track_content__isnull=True)
+            .order_by('id')
+            .values_list('id', 'full_version')[:BATCH_SIZE]
+        )
+        if not tracks:
+            return
+        with transaction.atomic(using=db_alias):
+            TrackContent.objects.using(db_alias).bulk_create(
+                TrackContent(track_id=track_id, full_version=full_version)
+                for track_id, full_version in tracks
+            )
+        last_id = tracks[-1][0]
+
+
+def move_content_back(apps, schema_editor):
+    """Copy content of tracks back to Track table batch by batch"""
+    Track = apps.get_model('music_store', 'Track')
+    TrackContent = apps.get_model('music_store', 'TrackContent')
+    db_alias = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        contents = list(
+            TrackContent.objects.using(db_alias)
+            .filter(track_id__gt=last_id)
+            .order_by('track_id')
+            .values_list('track_id', 'full_version')[:BATCH_SIZE]
+        )
+        if not contents:
+            return
+        with transaction.atomic(using=db_alias):
+            for track_id, full_version in contents:
+                Track.objects.using(db_alias).filter(id=track_id).update(
+                    full_version=full_version,
+                )
+        last_id = contents[-1][0]
+
+
+class Migration(migrations.Migration):
+    # content is moved in batches committed one by one, schema changes are
+    # in separate atomic migrations
+    atomic = False
+
+    dependencies = [
+        ('music_store', '0013_trackcontent'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_content, move_content_back),
+    ]
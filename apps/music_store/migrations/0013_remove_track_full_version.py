@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_store', '0013_move_track_content'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='track',
+            name='full_version',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2018-06-01 09:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_store', '0012_archiveupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackContent',
+            fields=[
+                ('track', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='track_content', serialize=False, to='music_store.Track', verbose_name='track')),
+                ('full_version', models.TextField(verbose_name='full version')),
+            ],
+            options={
+                'verbose_name': 'Track content',
+                'verbose_name_plural': 'Track contents',
+            },
+        ),
+    ]
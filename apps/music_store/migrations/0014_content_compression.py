@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2018-06-08 10:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_store', '0013_remove_track_full_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentDictionary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField(verbose_name='data')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='created')),
+            ],
+            options={
+                'verbose_name': 'Content dictionary',
+                'verbose_name_plural': 'Content dictionaries',
+            },
+        ),
+        # column keeps its name, so existing content isn't rewritten
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='trackcontent',
+                    old_name='full_version',
+                    new_name='raw_version',
+                ),
+                migrations.AlterField(
+                    model_name='trackcontent',
+                    name='raw_version',
+                    field=models.TextField(blank=True, db_column='full_version', verbose_name='raw version'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='trackcontent',
+            name='compressed_version',
+            field=models.BinaryField(null=True, verbose_name='compressed version'),
+        ),
+        migrations.AddField(
+            model_name='trackcontent',
+            name='dictionary',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='contents', to='music_store.ContentDictionary', verbose_name='dictionary'),
+        ),
+    ]
@@ -1,23 +1,43 @@
+import hashlib
+import uuid
+from functools import partial
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.db.models.query import QuerySet
 from django.db.models import Sum
+from django.utils.encoding import force_text
 from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.models import TimeStampedModel, TitleDescriptionModel
 
+import zstandard
+
+from libs.files import ConcatenatedFile, HashingFile
+
 from apps.music_store.exceptions import PaymentNotFound, NotEnoughMoney, \
     ItemAlreadyBought
+from apps.music_store import archives, events
+from apps.music_store.history import RecentlyPlayed
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.fields import JSONField
 
 
 class SoftDeletionQuerySet(QuerySet):
     """Queryset for models with support of soft deletion. """
     def delete(self):
-        """Soft deletion. Mark objects with deleted_at date and time"""
-        return super().update(deleted_at=timezone.now())
+        """Soft deletion. Mark objects with deleted_at date and time.
+
+        Bulk update isn't seen by cacheops, so objects are updated with
+        ``invalidated_update`` to drop cached querysets with them.
+
+        """
+        return self.invalidated_update(deleted_at=timezone.now())
 
     def hard_delete(self):
         """Complete deletion of objects."""
@@ -129,6 +149,9 @@ class MusicItem(TitleDescriptionModel, TimeStampedModel):
     def buy(self, user, payment_method=None):
         """ Method for buy this item
 
+        Purchase and its side effects (see ``OutboxEvent``) are saved in
+        a single DB transaction.
+
         Raises:
             exceptions.ValidationError: User does not have enough money
             exceptions.ValidationError: User don't have payment method
@@ -145,17 +168,28 @@ class MusicItem(TitleDescriptionModel, TimeStampedModel):
         if self.bought_model.objects.filter(user=user, item=self).exists():
             raise ItemAlreadyBought
 
-        transaction = PaymentTransaction.objects.create(
-            user=user,
-            amount=-self.price,
-            payment_method=payment_method,
-            content_object=self,
-        )
-        self.bought_model.objects.create(
-            user=user,
-            item=self,
-            transaction=transaction,
-        )
+        with transaction.atomic():
+            payment = PaymentTransaction.objects.create(
+                user=user,
+                amount=-self.price,
+                payment_method=payment_method,
+                content_object=self,
+            )
+            bought = self.bought_model.objects.create(
+                user=user,
+                item=self,
+                transaction=payment,
+            )
+            # counters of items bought together are updated by worker
+            CoPurchase.enqueue_purchase(bought)
+            # event is sent to Kafka by outbox relay after commit
+            OutboxEvent.objects.create(
+                destination=OutboxEvent.KAFKA,
+                name=settings.KAFKA['EVENTS_TOPIC'],
+                payload=events.Event.create(
+                    events.EVENT_PURCHASE, user, self,
+                ),
+            )
 
 
 class Album(MusicItem):
@@ -179,6 +213,8 @@ class Album(MusicItem):
     class Meta(MusicItem.Meta):
         verbose_name = _('Album')
         verbose_name_plural = _('Albums')
+        # albums are deduplicated by concurrent imports of archives
+        unique_together = (('author', 'title'),)
 
     @property
     def is_empty(self):
@@ -186,14 +222,40 @@ class Album(MusicItem):
         return not self.tracks.exists()
 
 
+class TrackQuerySet(QuerySet):
+    """QuerySet of tracks saving their content on bulk creation."""
+
+    def bulk_create(self, objs, batch_size=None):
+        """Create tracks and then their content"""
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, batch_size)
+            contents = []
+            for track in objs:
+                if track._content_changed:
+                    track._track_content.track = track
+                    track._content_changed = False
+                    contents.append(track._track_content)
+            TrackContent.objects.using(self.db).bulk_create(
+                contents, batch_size,
+            )
+        return objs
+
+
 class Track(MusicItem):
     """Music track with its title, price and album if exists.
 
+    Content of track is stored in separate ``TrackContent`` table, so
+    lists of tracks don't load it. It's loaded on first access to
+    ``full_version`` (use ``select_related('track_content')`` to load it
+    with tracks) and saved with the track.
+
     Attributes:
         album (Album): album that contains the track.
         full_version (str): full version of track content.
         free_version (str): free shortened version of track content.
             Equal to full_version[:25].
+        content_hash (str): hex SHA-256 of full_version encoded in UTF-8,
+            used to find tracks with the same content.
 
     """
     bought_users = models.ManyToManyField(
@@ -208,27 +270,89 @@ class Track(MusicItem):
         null=True,
         related_name='tracks'
     )
-    full_version = models.TextField(
-        verbose_name=_('full version'),
-    )
     free_version = models.TextField(
         verbose_name=_('free version'),
         default='free version'
     )
+    content_hash = models.CharField(
+        verbose_name=_('content hash'),
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+
+    objects = TrackQuerySet.as_manager()
+
+    # content loaded from DB or set, but not saved yet
+    _track_content = None
+    _content_changed = False
 
     class Meta(MusicItem.Meta):
         verbose_name = _('Track')
         verbose_name_plural = _('Tracks')
 
+    @property
+    def full_version(self):
+        return self._get_track_content().full_version
+
+    @full_version.setter
+    def full_version(self, content):
+        """Set content and fields derived from it.
+
+        Bytes are decoded from UTF-8, so preview and hash are computed from
+        text, not from its encoding.
+
+        """
+        content = force_text(content)
+        self._get_track_content().full_version = content
+        self._content_changed = True
+        self.free_version = content[:25]
+        self.content_hash = self.get_content_hash(content)
+
     def save(self, *args, **kwargs):
-        """Saves reduced data to free_version field.
+        """Saves track and its content if it's changed.
+
+        """
+        self.fill_derived_fields()
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+            if self._content_changed:
+                self._track_content.track = self
+                self._track_content.save()
+                self._content_changed = False
+
+    def fill_derived_fields(self):
+        """Fill fields computed from other ones.
+
+        Called on save. Must be called explicitly for ``bulk_create``.
+        Fields derived from content are filled on its change.
 
         """
-        self.free_version = self.full_version[:25]
         # Get author's name from related album if its not defined
         if not self.author and self.album:
             self.author = self.album.author
-        super().save(*args, **kwargs)
+
+    def _get_track_content(self):
+        """Get content of track, it's loaded from DB on first access"""
+        if self._track_content is None:
+            try:
+                self._track_content = self.track_content
+            except TrackContent.DoesNotExist:
+                self._track_content = TrackContent()
+        return self._track_content
+
+    @staticmethod
+    def get_content_hash(content):
+        """Get hex SHA-256 of track content.
+
+        Args:
+            content (str|bytes): content of track, str is encoded in UTF-8.
+
+        """
+        if isinstance(content, str):
+            content = content.encode()
+        return hashlib.sha256(content).hexdigest()
 
     def is_liked(self, user):
         """Check if the track is liked by the user.
@@ -247,7 +371,9 @@ class Track(MusicItem):
 
         """
         if not self.is_liked(user):
-            return LikeTrack.objects.create(user=user, track=self)
+            like = LikeTrack.objects.create(user=user, track=self)
+            events.publish(events.EVENT_LIKE, user, self)
+            return like
 
     def unlike(self, user):
         """Remove 'Like' from the track by some user.
@@ -257,7 +383,9 @@ class Track(MusicItem):
 
         """
         if self.is_liked(user):
-            return LikeTrack.objects.filter(user=user, track=self).delete()
+            deleted = LikeTrack.objects.filter(user=user, track=self).delete()
+            events.publish(events.EVENT_UNLIKE, user, self)
+            return deleted
 
     def listen(self, user):
         """Note about the track was listened by some user
@@ -266,7 +394,10 @@ class Track(MusicItem):
             user (AppUser): user who listened to the track.
 
         """
-        return ListenTrack.objects.create(user=user, track=self)
+        listen = ListenTrack.objects.create(user=user, track=self)
+        RecentlyPlayed(user).push(self.id)
+        events.publish(events.EVENT_LISTEN, user, self)
+        return listen
 
     def is_bought(self, user):
         """Note about the track was listened by some user
@@ -282,6 +413,209 @@ class Track(MusicItem):
         return self.album and self.album.is_bought(user)
 
 
+class ContentDictionaryQuerySet(QuerySet):
+    """QuerySet of dictionaries for compression of track content."""
+
+    def current(self):
+        """Get dictionary used for new content, None if none is trained"""
+        return self.order_by('-id').first()
+
+
+class ContentDictionary(models.Model):
+    """Zstandard dictionary trained on samples of track content.
+
+    Contents of tracks are short and similar, so they are compressed much
+    better with a shared dictionary. The latest dictionary is used for new
+    content, older ones are kept to decompress content compressed with them.
+
+    Attributes:
+        data (bytes): zstd dictionary.
+        created (datetime): time of training.
+
+    """
+    data = models.BinaryField(
+        verbose_name=_('data'),
+    )
+    created = models.DateTimeField(
+        verbose_name=_('created'),
+        auto_now_add=True,
+    )
+
+    objects = ContentDictionaryQuerySet.as_manager()
+
+    # zstd dictionaries by ids, dictionaries are never changed
+    _zstd_dicts = {}
+
+    class Meta:
+        verbose_name = _('Content dictionary')
+        verbose_name_plural = _('Content dictionaries')
+
+    def __str__(self):
+        return f'{self.id} ({len(self.data)} bytes)'
+
+    @classmethod
+    def train(cls, samples, size=None):
+        """Train and save new dictionary.
+
+        Args:
+            samples (list): contents of tracks (bytes).
+            size (int): max size of dictionary in bytes.
+
+        """
+        size = size or settings.TRACK_CONTENT_DICTIONARY_SIZE
+        zstd_dict = zstandard.train_dictionary(size, samples)
+        dictionary = cls.objects.create(data=zstd_dict.as_bytes())
+        cls._zstd_dicts[dictionary.id] = zstd_dict
+        return dictionary
+
+    @classmethod
+    def get_zstd_dict(cls, dictionary_id):
+        """Get zstd dictionary by id, it's loaded from DB once"""
+        if dictionary_id is None:
+            return None
+        if dictionary_id not in cls._zstd_dicts:
+            data = cls.objects.values_list('data', flat=True).get(
+                id=dictionary_id,
+            )
+            cls._zstd_dicts[dictionary_id] = zstandard.ZstdCompressionDict(
+                bytes(data)
+            )
+        return cls._zstd_dicts[dictionary_id]
+
+    @classmethod
+    def get_compressor(cls, dictionary_id=None):
+        """Get compressor of content with the dictionary"""
+        zstd_dict = cls.get_zstd_dict(dictionary_id)
+        return zstandard.ZstdCompressor(
+            level=settings.TRACK_CONTENT_COMPRESSION_LEVEL,
+            dict_data=zstd_dict,
+            write_content_size=True,
+        )
+
+    @classmethod
+    def get_decompressor(cls, dictionary_id=None):
+        """Get decompressor of content compressed with the dictionary"""
+        return zstandard.ZstdDecompressor(
+            dict_data=cls.get_zstd_dict(dictionary_id),
+        )
+
+
+class TrackContentQuerySet(QuerySet):
+    """QuerySet of contents compressing them on bulk creation."""
+
+    def bulk_create(self, objs, batch_size=None):
+        """Compress contents with the current dictionary and create them"""
+        objs = list(objs)
+        dictionary = ContentDictionary.objects.using(self.db).current()
+        compressor = ContentDictionary.get_compressor(
+            dictionary and dictionary.id
+        )
+        for content in objs:
+            if content.compressed_version is None:
+                content.compress(compressor, dictionary)
+        return super().bulk_create(objs, batch_size)
+
+
+class TrackContent(models.Model):
+    """Content of track stored apart from catalog data of track.
+
+    Content is stored compressed with zstd and ``dictionary``, it's
+    decompressed on first access to ``full_version``. Content saved before
+    compression was added stays in ``raw_version`` until it's converted by
+    ``compress_track_content`` command.
+
+    Attributes:
+        track (Track): track of the content.
+        full_version (str): full version of track content.
+        raw_version (str): uncompressed content of not converted track.
+        compressed_version (bytes): compressed content.
+        dictionary (ContentDictionary): dictionary used for compression,
+            None if content is compressed without dictionary.
+
+    """
+    track = models.OneToOneField(
+        'Track',
+        verbose_name=_('track'),
+        primary_key=True,
+        related_name='track_content',
+        on_delete=models.CASCADE,
+    )
+    raw_version = models.TextField(
+        verbose_name=_('raw version'),
+        blank=True,
+        db_column='full_version',
+    )
+    compressed_version = models.BinaryField(
+        verbose_name=_('compressed version'),
+        null=True,
+    )
+    dictionary = models.ForeignKey(
+        'ContentDictionary',
+        verbose_name=_('dictionary'),
+        null=True,
+        blank=True,
+        related_name='contents',
+        on_delete=models.PROTECT,
+    )
+
+    objects = TrackContentQuerySet.as_manager()
+
+    # decompressed or set content
+    _full_version = None
+
+    class Meta:
+        verbose_name = _('Track content')
+        verbose_name_plural = _('Track contents')
+
+    def __str__(self):
+        return str(self.track)
+
+    @property
+    def full_version(self):
+        if self._full_version is None:
+            if self.compressed_version is None:
+                self._full_version = self.raw_version
+            else:
+                decompressor = ContentDictionary.get_decompressor(
+                    self.dictionary_id
+                )
+                self._full_version = decompressor.decompress(
+                    bytes(self.compressed_version)
+                ).decode()
+        return self._full_version
+
+    @full_version.setter
+    def full_version(self, content):
+        """Set content (str), it's compressed on save"""
+        self._full_version = content
+        self.raw_version = ''
+        self.compressed_version = None
+        self.dictionary = None
+
+    def save(self, *args, **kwargs):
+        """Compress set content with the current dictionary and save it"""
+        if self.compressed_version is None and self._full_version is not None:
+            dictionary = ContentDictionary.objects.current()
+            self.compress(
+                ContentDictionary.get_compressor(dictionary and dictionary.id),
+                dictionary,
+            )
+        super().save(*args, **kwargs)
+
+    def compress(self, compressor, dictionary=None):
+        """Compress content.
+
+        Args:
+            compressor (ZstdCompressor): compressor with the dictionary.
+            dictionary (ContentDictionary): dictionary of the compressor.
+
+        """
+        content = self.full_version
+        self.compressed_version = compressor.compress(content.encode())
+        self.dictionary = dictionary
+        self.raw_version = ''
+
+
 class PaymentMethod(SoftDeletionModel, models.Model):
     """Model to store payment methods."""
     owner = models.ForeignKey(
@@ -311,7 +645,9 @@ class PaymentMethod(SoftDeletionModel, models.Model):
                 owner=self.owner,
                 is_default=True,
             )
-            default_methods.exclude(pk=self.pk).update(is_default=False)
+            default_methods.exclude(pk=self.pk).invalidated_update(
+                is_default=False,
+            )
 
 
 class PaymentTransaction(TimeStampedModel):
@@ -368,11 +704,15 @@ class PaymentTransaction(TimeStampedModel):
         super().save(**kwargs)
         self.update_user_balance(self.user)
 
+    @classmethod
+    def get_good_name(cls, model):
+        """Provide name of type of goods, None if model isn't goods"""
+        return cls._goods.get(model)
+
     @property
     def purchase_type(self):
         """Provide type of purchased good"""
-        good_type = self.content_type.model_class()
-        return self._goods.get(good_type)
+        return self.get_good_name(self.content_type.model_class())
 
     @property
     def purchase_info(self):
@@ -486,6 +826,450 @@ class ListenTrack(TimeStampedModel):
     class Meta:
         verbose_name = _('Listen')
         verbose_name_plural = _('Listens')
+        indexes = (
+            # latest listens of the user
+            models.Index(fields=['user', '-created']),
+        )
 
     def __str__(self):
         return f'{self.user} listened {self.track}'
+
+
+class SimilarTrack(models.Model):
+    """Precomputed neighbour of the track by co-listening.
+
+    Rows are rebuilt by ``tasks.build_similar_tracks``.
+
+    Attributes:
+        track (Track): track for which neighbour is stored.
+        similar (Track): track listened or liked by the same users.
+        score (float): cosine similarity of tracks.
+
+    """
+    track = models.ForeignKey(
+        Track,
+        verbose_name=_('track'),
+        related_name='similar_tracks',
+    )
+    similar = models.ForeignKey(
+        Track,
+        verbose_name=_('similar track'),
+        related_name='similar_for',
+    )
+    score = models.FloatField(verbose_name=_('score'))
+
+    class Meta:
+        unique_together = (('track', 'similar'),)
+        verbose_name = _('Similar track')
+        verbose_name_plural = _('Similar tracks')
+
+    def __str__(self):
+        return f'{self.similar} is similar to {self.track}'
+
+
+class CoPurchaseQuerySet(QuerySet):
+    """Queryset for counters of items bought together."""
+
+    def for_item(self, item):
+        """Provide items bought with given one, most popular first"""
+        return self.filter(
+            item_type=ContentType.objects.get_for_model(item),
+            item_id=item.pk,
+        ).order_by('-count')
+
+    def add_purchase(self, user, item, purchased=None):
+        """Increment counters of pairs formed by item and user's purchases.
+
+        Only ``settings.CO_PURCHASE_MAX_USER_ITEMS`` latest purchases of
+        the user are taken into account to bound the number of updated
+        pairs.
+
+        Args:
+            user (AppUser|int): buyer of item or its id.
+            item (Album|Track): just bought item.
+            purchased (datetime): time of purchase of item, only earlier
+                purchases are paired with it if it's set.
+
+        """
+        item_type = ContentType.objects.get_for_model(item)
+        others = self._get_latest_purchases(user, exclude=item,
+                                            before=purchased)
+
+        keys = []
+        for other_type, other_id in others:
+            keys.append((item_type.id, item.pk, other_type.id, other_id))
+            keys.append((other_type.id, other_id, item_type.id, item.pk))
+        if not keys:
+            return
+
+        try:
+            with transaction.atomic():
+                self._increment(keys)
+        except IntegrityError:
+            # counters were created by concurrent purchase, so now
+            # all of them exist and may be simply incremented
+            self._increment(keys)
+
+    def _get_latest_purchases(self, user, exclude, before=None):
+        """Get types and ids of latest items bought by user"""
+        limit = settings.CO_PURCHASE_MAX_USER_ITEMS
+        purchases = []
+        for model in (BoughtAlbum, BoughtTrack):
+            item_model = model._meta.get_field('item').related_model
+            item_type = ContentType.objects.get_for_model(item_model)
+            queryset = model.objects.filter(user=user)
+            if isinstance(exclude, item_model):
+                queryset = queryset.exclude(item=exclude)
+            if before is not None:
+                queryset = queryset.filter(created__lt=before)
+            purchases.extend(
+                (created, item_type, item_id)
+                for created, item_id in queryset.order_by(
+                    '-created'
+                ).values_list('created', 'item_id')[:limit]
+            )
+        purchases.sort(key=lambda purchase: purchase[0], reverse=True)
+        return [purchase[1:] for purchase in purchases[:limit]]
+
+    def _increment(self, keys):
+        """Increment existing counters and create missing ones"""
+        lookup = models.Q()
+        for item_type_id, item_id, other_type_id, other_id in keys:
+            lookup |= models.Q(
+                item_type_id=item_type_id,
+                item_id=item_id,
+                other_type_id=other_type_id,
+                other_id=other_id,
+            )
+        existing = self.filter(lookup)
+        existing_keys = set(existing.values_list(
+            'item_type_id', 'item_id', 'other_type_id', 'other_id',
+        ))
+        existing.update(count=models.F('count') + 1)
+
+        self.bulk_create(
+            self.model(
+                item_type_id=item_type_id,
+                item_id=item_id,
+                other_type_id=other_type_id,
+                other_id=other_id,
+                count=1,
+            )
+            for item_type_id, item_id, other_type_id, other_id in keys
+            if (item_type_id, item_id, other_type_id, other_id)
+            not in existing_keys
+        )
+
+
+class CoPurchase(models.Model):
+    """Number of users who bought both items.
+
+    Counters are stored for both directions of the pair, so items bought
+    with some item are found by its type and id only.
+
+    Attributes:
+        item (Album|Track): item bought by users.
+        other (Album|Track): another item bought by the same users.
+        count (int): number of users who bought both items.
+
+    """
+    item_type = models.ForeignKey(ContentType, related_name='+')
+    item_id = models.PositiveIntegerField()
+    item = GenericForeignKey('item_type', 'item_id')
+
+    other_type = models.ForeignKey(ContentType, related_name='+')
+    other_id = models.PositiveIntegerField()
+    other = GenericForeignKey('other_type', 'other_id')
+
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('count'),
+    )
+
+    objects = CoPurchaseQuerySet.as_manager()
+
+    class Meta:
+        unique_together = (
+            ('item_type', 'item_id', 'other_type', 'other_id'),
+        )
+        verbose_name = _('Co-purchase')
+        verbose_name_plural = _('Co-purchases')
+
+    def __str__(self):
+        return f'{self.other} bought with {self.item} {self.count} times'
+
+    @staticmethod
+    def enqueue_purchase(bought):
+        """Write outbox event to count pairs of bought item by worker.
+
+        Event is written in the transaction of purchase and dispatched to
+        ``tasks.add_co_purchase`` by outbox relay, so counters don't slow
+        down purchase. Time of purchase is passed, so purchases made
+        before the event is relayed aren't paired twice.
+
+        Args:
+            bought (BoughtAlbum|BoughtTrack): just saved purchase.
+
+        """
+        OutboxEvent.objects.create(
+            destination=OutboxEvent.CELERY,
+            name='apps.music_store.tasks.add_co_purchase',
+            payload=[
+                bought.user_id,
+                bought.item._meta.label_lower,
+                bought.item_id,
+                bought.created.isoformat(),
+            ],
+        )
+
+    @property
+    def other_type_name(self):
+        """Provide type of item bought together"""
+        # content types are cached, so no query per counter
+        other_type = ContentType.objects.get_for_id(self.other_type_id)
+        return PaymentTransaction.get_good_name(other_type.model_class())
+
+
+class OutboxEvent(models.Model):
+    """Side effect of a purchase waiting to be dispatched.
+
+    Events are written in the same DB transaction as the purchase, so
+    they are never lost or sent for rolled back purchases. Events are
+    dispatched and deleted by ``outbox.relay_outbox``.
+
+    Attributes:
+        destination (str): where event is dispatched, Kafka or Celery.
+        name (str): Kafka topic or name of Celery task.
+        payload (list): encoded event or arguments of task.
+
+    """
+    KAFKA = 'kafka'
+    CELERY = 'celery'
+    DESTINATIONS = (
+        (KAFKA, _('Kafka')),
+        (CELERY, _('Celery')),
+    )
+
+    created = models.DateTimeField(auto_now_add=True)
+    destination = models.CharField(
+        max_length=10,
+        choices=DESTINATIONS,
+        verbose_name=_('destination'),
+    )
+    name = models.CharField(
+        max_length=200,
+        verbose_name=_('name'),
+    )
+    payload = JSONField(verbose_name=_('payload'))
+
+    class Meta:
+        verbose_name = _('Outbox event')
+        verbose_name_plural = _('Outbox events')
+
+    def __str__(self):
+        return f'{self.destination}: {self.name}'
+
+
+class ArchiveUpload(TimeStampedModel):
+    """Session of resumable chunked upload of archive with albums.
+
+    Archive is uploaded by chunks of ``chunk_size`` bytes in any order,
+    failed chunks are uploaded again. Chunks are streamed to storage and
+    joined into archive by ``assemble`` when all of them are uploaded.
+    Uploads are deleted with their files by
+    ``tasks.delete_expired_archive_uploads`` after
+    ``settings.ARCHIVE_UPLOAD_EXPIRATION`` since the last change.
+
+    Attributes:
+        user (AppUser): user who uploads archive.
+        filename (str): original name of archive file.
+        size (int): size of archive in bytes.
+        chunk_size (int): size of every chunk except the last one.
+        archive (str): name of assembled archive in storage.
+        task_id (str): id of celery task importing archive.
+
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+                          editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_('user'),
+        related_name='archive_uploads',
+    )
+    filename = models.CharField(
+        verbose_name=_('filename'),
+        max_length=255,
+    )
+    size = models.BigIntegerField(
+        verbose_name=_('size'),
+        validators=[MinValueValidator(1)],
+    )
+    chunk_size = models.PositiveIntegerField(
+        verbose_name=_('chunk size'),
+    )
+    archive = models.CharField(
+        verbose_name=_('archive'),
+        max_length=255,
+        blank=True,
+    )
+    task_id = models.CharField(
+        verbose_name=_('task id'),
+        max_length=255,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = _('Archive upload')
+        verbose_name_plural = _('Archive uploads')
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def chunks_count(self):
+        """int: number of chunks of archive"""
+        return -(-self.size // self.chunk_size)
+
+    @property
+    def received_chunks(self):
+        """list: indexes of uploaded chunks"""
+        return list(
+            self.chunks.order_by('index').values_list('index', flat=True)
+        )
+
+    @property
+    def is_complete(self):
+        """bool: True if all chunks are uploaded"""
+        return self.chunks.count() == self.chunks_count
+
+    def get_chunk_size(self, index):
+        """Get expected size of chunk, the last one may be smaller"""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def save_chunk(self, index, file, checksum, length=None):
+        """Stream chunk to storage and check it.
+
+        Chunk uploaded again replaces the previous one. Only one byte more
+        than expected size of chunk is read from file, so oversized chunk
+        is never written to storage entirely.
+
+        Args:
+            index (int): index of chunk starting from 0.
+            file (file): file to read content of chunk, like HttpRequest.
+            checksum (str): hex SHA-256 of content of chunk.
+            length (int): declared size of content (like Content-Length),
+                chunk of wrong size is rejected before it's read.
+
+        Raises:
+            ValidationError: if index is out of range, size or checksum of
+                content doesn't match.
+
+        """
+        if not 0 <= index < self.chunks_count:
+            raise ValidationError(_('Chunk index is out of range'))
+        expected_size = self.get_chunk_size(index)
+        if length is not None and length != expected_size:
+            raise ValidationError(_('Size of chunk does not match'))
+
+        content = HashingFile(file, hashlib.sha256(), limit=expected_size + 1)
+        name = default_storage.save(
+            f'archive_uploads/{self.id}/{index:06d}',
+            File(content),
+        )
+        if content.tell() != expected_size:
+            default_storage.delete(name)
+            raise ValidationError(_('Size of chunk does not match'))
+        if content.digest.hexdigest() != checksum.lower():
+            default_storage.delete(name)
+            raise ValidationError(_('Checksum of chunk does not match'))
+
+        previous = self.chunks.filter(index=index).first()
+        if previous:
+            default_storage.delete(previous.name)
+        ArchiveUploadChunk.objects.update_or_create(
+            upload=self,
+            index=index,
+            defaults={'name': name, 'checksum': checksum.lower()},
+        )
+        # upload in progress isn't expired
+        self.save(update_fields=['modified'])
+
+    def assemble(self):
+        """Join chunks into archive in storage and remove chunks.
+
+        Chunks are read one by one, so archive is never kept in memory.
+
+        Returns:
+            str: name of archive in storage.
+
+        """
+        if self.archive:
+            return self.archive
+
+        chunks = list(self.chunks.order_by('index'))
+        if len(chunks) != self.chunks_count:
+            raise ValidationError(_('Not all chunks are uploaded'))
+
+        content = ConcatenatedFile(
+            partial(default_storage.open, chunk.name) for chunk in chunks
+        )
+        extension = archives.get_extension(self.filename)
+        self.archive = default_storage.save(
+            f'archive_uploads/{self.id}{extension}',
+            File(content),
+        )
+        self.save(update_fields=['archive', 'modified'])
+
+        for chunk in chunks:
+            default_storage.delete(chunk.name)
+        self.chunks.all().delete()
+        return self.archive
+
+    def delete(self, *args, **kwargs):
+        """Delete upload with its chunks and archive in storage"""
+        for name in self.chunks.values_list('name', flat=True):
+            default_storage.delete(name)
+        if self.archive:
+            default_storage.delete(self.archive)
+        return super().delete(*args, **kwargs)
+
+    def get_info(self):
+        """Get state of upload to resume it"""
+        return {
+            'id': str(self.id),
+            'filename': self.filename,
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'chunks_count': self.chunks_count,
+            'received': self.received_chunks,
+            'task_id': self.task_id,
+        }
+
+
+class ArchiveUploadChunk(models.Model):
+    """Chunk of archive stored in storage until archive is assembled.
+
+    Attributes:
+        upload (ArchiveUpload): upload session.
+        index (int): index of chunk in archive starting from 0.
+        name (str): name of chunk in storage.
+        checksum (str): hex SHA-256 of content of chunk.
+
+    """
+    upload = models.ForeignKey(
+        'ArchiveUpload',
+        verbose_name=_('upload'),
+        related_name='chunks',
+        on_delete=models.CASCADE,
+    )
+    index = models.PositiveIntegerField(verbose_name=_('index'))
+    name = models.CharField(verbose_name=_('name'), max_length=255)
+    checksum = models.CharField(verbose_name=_('checksum'), max_length=64)
+
+    class Meta:
+        verbose_name = _('Archive upload chunk')
+        verbose_name_plural = _('Archive upload chunks')
+        unique_together = (('upload', 'index'),)
+
+    def __str__(self):
+        return f'{self.upload} #{self.index}'
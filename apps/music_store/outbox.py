@@ -0,0 +1,80 @@
+"""Relay of outbox events to Kafka and Celery.
+
+Relay may be run by several workers in parallel: each of them locks its
+own batch of events with ``SELECT ... FOR UPDATE SKIP LOCKED``, so events
+are not dispatched twice. Events are deleted in the same transaction they
+are locked in. If transaction fails after events are dispatched, they are
+dispatched again by the next relay (at-least-once delivery).
+
+"""
+import time
+from collections import defaultdict
+
+from django.db import transaction
+
+from config.celery import app
+
+from . import events
+from .models import OutboxEvent
+
+
+def dispatch(outbox_events):
+    """Send outbox events to their destinations.
+
+    Kafka messages are sent in a single batch per topic and acknowledged
+    by broker before return.
+
+    """
+    messages = defaultdict(list)
+    for event in outbox_events:
+        if event.destination == OutboxEvent.KAFKA:
+            messages[event.name].append(
+                events.Event(*event.payload).encode()
+            )
+        elif event.destination == OutboxEvent.CELERY:
+            app.send_task(event.name, args=event.payload)
+
+    broker = events.get_broker()
+    for topic, topic_messages in messages.items():
+        broker.send_batch(topic, topic_messages)
+
+
+def relay_batch(batch_size):
+    """Dispatch and delete one batch of outbox events.
+
+    Returns:
+        int: number of dispatched events.
+
+    """
+    with transaction.atomic():
+        batch = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        if batch:
+            dispatch(batch)
+            OutboxEvent.objects.filter(
+                id__in=[event.id for event in batch]
+            ).delete()
+    return len(batch)
+
+
+def relay_outbox(batch_size, time_limit):
+    """Dispatch outbox events until outbox is empty or time is over.
+
+    Args:
+        batch_size (int): number of events dispatched in one transaction.
+        time_limit (float): max time (in seconds) of relaying.
+
+    Returns:
+        int: number of dispatched events.
+
+    """
+    deadline = time.monotonic() + time_limit
+    total = 0
+    while time.monotonic() < deadline:
+        count = relay_batch(batch_size)
+        total += count
+        if count < batch_size:
+            break
+    return total
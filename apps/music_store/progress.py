@@ -0,0 +1,91 @@
+"""States of import tasks shared by workers with watchers.
+
+Workers save the latest state of task to Redis key of the task, watchers
+(``TaskProgressView``) read it with a single GET, so neither result
+backend is polled nor web workers are held waiting for updates. Each
+state is complete, so overwritten states don't matter:
+
+    {"id": "<task id>", "status": "UNPACKING", "result": {...}}
+
+"""
+import json
+import logging
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+STATE_TEMPLATE = 'music_store:task_progress:{task_id}:state'
+COUNTERS_TEMPLATE = 'music_store:task_progress:{task_id}:counters'
+# time (in seconds) states and counters of task are kept in Redis
+STATE_TIMEOUT = COUNTERS_TIMEOUT = 60 * 60 * 24
+
+
+def get_state_key(task_id):
+    """Get name of Redis key of state of task"""
+    return STATE_TEMPLATE.format(task_id=task_id)
+
+
+def publish(task_id, status, result):
+    """Save state of task for its watchers.
+
+    Args:
+        task_id (str): id of celery task.
+        status (str): state of task.
+        result (dict|str): progress or result of task.
+
+    """
+    state = json.dumps({'id': task_id, 'status': status, 'result': result})
+    try:
+        get_redis_connection('default').set(
+            get_state_key(task_id), state, ex=STATE_TIMEOUT,
+        )
+    except RedisError:
+        logger.warning('Progress of task %s is not published', task_id,
+                       exc_info=True)
+
+
+def get_state(task_id):
+    """Get the latest state of task published by workers.
+
+    Args:
+        task_id (str): id of celery task.
+
+    Returns:
+        dict: state of task, None if it isn't published or expired.
+
+    """
+    state = get_redis_connection('default').get(get_state_key(task_id))
+    if state is None:
+        return None
+    return json.loads(state)
+
+
+def add_counters(task_id, increments):
+    """Add increments of counters of part of task to totals of the task.
+
+    Parts of task running in parallel (like chunks of archive) add their
+    progress, so each of them can report progress of the whole task.
+
+    Args:
+        task_id (str): id of celery task.
+        increments (dict): increments of counters by their names.
+
+    Returns:
+        dict: totals of counters, None if they aren't updated.
+
+    """
+    key = COUNTERS_TEMPLATE.format(task_id=task_id)
+    pipeline = get_redis_connection('default').pipeline()
+    for name, increment in increments.items():
+        pipeline.hincrby(key, name, increment)
+    pipeline.expire(key, COUNTERS_TIMEOUT)
+    try:
+        *totals, _ = pipeline.execute()
+    except RedisError:
+        logger.warning('Counters of task %s are not updated', task_id,
+                       exc_info=True)
+        return None
+    return dict(zip(increments, totals))
+
@@ -0,0 +1,164 @@
+"""Item-to-item recommendations ("listeners also played").
+
+Tracks are compared by the users who listened to or liked them. The
+user x track interaction matrix is built with SciPy sparse matrices
+chunk by chunk, so the memory used depends on the number of distinct
+(user, track) pairs rather than on the number of listens.
+
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+import numpy as np
+from scipy import sparse
+
+from apps.users.models import AppUser
+
+from .models import LikeTrack, ListenTrack, SimilarTrack, Track
+
+
+def iter_interactions(queryset, chunk_size):
+    """Get user and track ids of interactions chunk by chunk.
+
+    Rows are fetched with keyset pagination by primary key, so every query
+    is cheap and only one chunk is kept in memory.
+
+    Args:
+        queryset (QuerySet): ListenTrack or LikeTrack queryset.
+        chunk_size (int): max number of rows in one chunk.
+
+    Yields:
+        tuple: arrays of user ids and track ids.
+
+    """
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'user_id', 'track_id')[:chunk_size]
+        )
+        if not rows:
+            return
+        chunk = np.array(rows, dtype=np.int64)
+        last_id = int(chunk[-1, 0])
+        yield chunk[:, 1], chunk[:, 2]
+
+
+def build_interaction_matrix(listens, likes, shape, like_weight):
+    """Build user x track matrix of interaction weights.
+
+    Listens of the same track by the same user are summed up and dampened
+    with ``log1p``, so heavy listeners don't dominate. Each like adds
+    ``like_weight``.
+
+    Args:
+        listens (iterable): chunks of (user_ids, track_ids) of listens.
+        likes (iterable): chunks of (user_ids, track_ids) of likes.
+        shape (tuple): shape of matrix (max user id + 1, max track id + 1).
+        like_weight (float): weight of a like.
+
+    Returns:
+        csc_matrix: matrix of weights with users as rows and tracks as
+            columns.
+
+    """
+    def accumulate(chunks):
+        matrix = sparse.csr_matrix(shape, dtype=np.float32)
+        for users, tracks in chunks:
+            ones = np.ones(len(users), dtype=np.float32)
+            # duplicates are summed up on conversion to CSR
+            matrix = matrix + sparse.coo_matrix(
+                (ones, (users, tracks)), shape=shape
+            ).tocsr()
+        return matrix
+
+    matrix = accumulate(listens)
+    matrix.data = np.log1p(matrix.data)
+    matrix = matrix + accumulate(likes) * like_weight
+    return matrix.tocsc()
+
+
+def compute_neighbours(matrix, top_k, block_size):
+    """Compute top-K cosine neighbours of every track with interactions.
+
+    Similarities are computed for ``block_size`` tracks at once, so the
+    intermediate result is limited to ``block_size`` rows.
+
+    Args:
+        matrix (csc_matrix): user x track matrix of interaction weights.
+        top_k (int): number of neighbours to keep for each track.
+        block_size (int): number of tracks processed at once.
+
+    Yields:
+        tuple: track id, similar track id and score.
+
+    """
+    norms = np.sqrt(np.asarray(matrix.power(2).sum(axis=0)).ravel())
+    active = np.flatnonzero(norms)
+    inverted = np.zeros_like(norms)
+    inverted[active] = 1 / norms[active]
+    normalized = (matrix @ sparse.diags(inverted)).tocsc()
+
+    for start in range(0, len(active), block_size):
+        block = active[start:start + block_size]
+        similarities = (normalized[:, block].T @ normalized).tocsr()
+        for row, track_id in enumerate(block):
+            begin, end = similarities.indptr[row:row + 2]
+            ids = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+
+            # track is not a neighbour of itself
+            mask = ids != track_id
+            ids, scores = ids[mask], scores[mask]
+            if len(ids) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                ids, scores = ids[best], scores[best]
+
+            for similar_id, score in zip(ids, scores):
+                yield int(track_id), int(similar_id), float(score)
+
+
+def build_similar_tracks(top_k=None, chunk_size=None, block_size=None):
+    """Rebuild table of similar tracks from listens and likes.
+
+    The table is replaced in a single transaction, so readers see either
+    old or new neighbours.
+
+    Returns:
+        int: number of saved neighbours.
+
+    """
+    top_k = top_k or settings.SIMILAR_TRACKS_TOP_K
+    chunk_size = chunk_size or settings.SIMILAR_TRACKS_CHUNK_SIZE
+    block_size = block_size or settings.SIMILAR_TRACKS_BLOCK_SIZE
+
+    max_user_id = AppUser.objects.aggregate(max_id=Max('id'))['max_id']
+    max_track_id = Track.objects.aggregate(max_id=Max('id'))['max_id']
+    if max_user_id is None or max_track_id is None:
+        return 0
+
+    matrix = build_interaction_matrix(
+        listens=iter_interactions(ListenTrack.objects.all(), chunk_size),
+        likes=iter_interactions(LikeTrack.objects.all(), chunk_size),
+        shape=(max_user_id + 1, max_track_id + 1),
+        like_weight=settings.SIMILAR_TRACKS_LIKE_WEIGHT,
+    )
+
+    count = 0
+    batch = []
+    with transaction.atomic():
+        SimilarTrack.objects.all().delete()
+        for track_id, similar_id, score in compute_neighbours(
+                matrix, top_k, block_size):
+            batch.append(SimilarTrack(
+                track_id=track_id,
+                similar_id=similar_id,
+                score=score,
+            ))
+            if len(batch) >= chunk_size:
+                count += len(SimilarTrack.objects.bulk_create(batch))
+                batch = []
+        count += len(SimilarTrack.objects.bulk_create(batch))
+    return count
@@ -1,45 +1,225 @@
-import time
-from random import randint
+from collections import Counter
+from datetime import timedelta
 
+from django.apps import apps
+from django.conf import settings
 from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from celery import current_task, shared_task
+from celery import chord, shared_task, states
+from celery.signals import task_postrun
 
-from .utils import AlbumUnpacker
+from libs.files import open_seekable
+
+from . import archives, outbox, progress, recommendations
+from .models import ArchiveUpload, CoPurchase
+from .utils import (
+    AlbumUnpacker,
+    ChunkImportProgress,
+    ImportProgress,
+    StreamingImporter,
+)
 
 
 # External state for celery task of getting tracks from zip archive
 UNPACKING_STATE = 'UNPACKING'
 
 
-@shared_task
-def get_tracks_from_zip(zip_filename):
-    """Get albums and tracks from ZIP file.
+@shared_task(bind=True)
+def get_tracks_from_zip(self, zip_filename):
+    """Get albums and tracks from ZIP file or tarball.
     Report status of getting tracks.
 
+    Progress is reported with UNPACKING state and meta like:
+
+        {'processed': 10, 'total': 100, 'albums_added': 1,
+         'tracks_added': 9, 'skipped': 1}
+
+    Archives with more than ``settings.ALBUM_IMPORT_CHUNK_SIZE`` tracks
+    are split into chunks imported by several workers in parallel. Task is
+    replaced with chord of chunks, so its result is the result of
+    ``collect_import_results`` callback.
+
+    Tarballs (plain, gzip, bzip2 or zstd compressed) are imported in a
+    single pass by ``StreamingImporter``, total of progress is unknown.
+
     Args:
         zip_filename (str): filename of uploaded zip_file.
 
     """
-    # delay to simulate unpacking takes a long time
-    time_to_sleep = randint(3, 6)
+    with open_seekable(default_storage, zip_filename) as archive_file, \
+            archives.open_archive(archive_file) as reader:
+
+        if not isinstance(reader, archives.ZipReader):
+            importer = StreamingImporter(reader)
+            importer.stream_import(
+                progress=ImportProgress(self, importer, UNPACKING_STATE),
+            )
+            return format_import_result(importer.counters)
 
-    with default_storage.open(zip_filename) as zip_file:
+        # members of ZIP are read in any order, so it's split into chunks
+        unpacker = AlbumUnpacker(reader)
+        chunks = unpacker.split_track_list(settings.ALBUM_IMPORT_CHUNK_SIZE)
+        progress = ImportProgress(self, unpacker, UNPACKING_STATE)
 
-        unpacker = AlbumUnpacker(zip_file)
+        if len(chunks) <= 1:
+            unpacker.bulk_import(progress=progress)
+            return format_import_result(unpacker.counters)
+
+    progress(0)
+    raise self.replace(chord(
+        (
+            import_tracks_chunk.s(zip_filename, chunk, self.request.id)
+            for chunk in chunks
+        ),
+        collect_import_results.s(),
+    ))
+
+
+@shared_task(bind=True)
+def import_tracks_chunk(self, zip_filename, track_list, task_id=None):
+    """Import part of tracks from ZIP file.
+
+    Progress of all chunks is reported as progress of ``task_id``.
+
+    Args:
+        zip_filename (str): filename of uploaded zip_file.
+        track_list (list): filenames of tracks in archive to import.
+        task_id (str): id of task importing the whole archive.
 
-        for track_filename in unpacker.track_list:
-            current_task.update_state(
-                state=UNPACKING_STATE,
-                meta=f'{track_filename} is unpacking...'
+    Returns:
+        dict: numbers of added albums, added and skipped tracks.
+
+    """
+    with open_seekable(default_storage, zip_filename) as archive_file, \
+            archives.open_archive(archive_file) as reader:
+        unpacker = AlbumUnpacker(reader)
+        progress = None
+        if task_id:
+            progress = ChunkImportProgress(
+                self, unpacker, UNPACKING_STATE, task_id,
             )
+        unpacker.bulk_import(track_list=track_list, progress=progress)
+        return unpacker.counters
+
+
+@shared_task
+def collect_import_results(results):
+    """Sum up counters of imported chunks of ZIP file"""
+    counters = Counter()
+    for result in results:
+        counters.update(result)
+    return format_import_result(counters)
+
+
+@task_postrun.connect
+def publish_import_result(sender=None, task_id=None, state=None, retval=None,
+                          args=None, **kwargs):
+    """Publish result of import to watchers of the task.
 
-            # simulate unpacking takes a long time
-            time.sleep(time_to_sleep)
+    Replaced `get_tracks_from_zip` is skipped, its result is published by
+    `collect_import_results` inheriting its id. Failed chunk fails the
+    chord, so its callback is never run and the failure is published as
+    result of the whole import.
+
+    """
+    if sender is import_tracks_chunk:
+        if state != states.FAILURE or len(args or ()) < 3:
+            return
+        task_id = args[2]
+    elif sender not in (get_tracks_from_zip, collect_import_results):
+        return
+    if state not in states.READY_STATES:
+        return
+    if isinstance(retval, Exception):
+        retval = str(retval)
+    progress.publish(task_id, state, retval)
+
+
+def format_import_result(counters):
+    """Get text report about import of ZIP file"""
+    return (
+        f'{counters["albums_added"]} albums added. '
+        f'{counters["tracks_added"]} tracks added. '
+        f'{counters["skipped"]} tracks skipped'
+    )
+
+
+@shared_task
+def assemble_archive_upload(upload_id):
+    """Join uploaded chunks of archive.
 
-            unpacker.track_handler(track_filename)
+    Chained with `get_tracks_from_zip`, so import starts only after the
+    archive is assembled.
 
-        return (
-            f'{unpacker.added_albums_count} albums added. '
-            f'{unpacker.added_tracks_count} tracks added'
-        )
+    Returns:
+        str: filename of assembled archive in storage.
+
+    """
+    return ArchiveUpload.objects.get(id=upload_id).assemble()
+
+
+@shared_task
+def delete_expired_archive_uploads():
+    """Delete archive uploads not changed for a long time.
+
+    Abandoned uploads are deleted with their chunks and imported ones with
+    assembled archives. Supposed to be run periodically, e.g. nightly.
+
+    """
+    expired = ArchiveUpload.objects.filter(
+        modified__lt=timezone.now() - timedelta(
+            seconds=settings.ARCHIVE_UPLOAD_EXPIRATION,
+        ),
+    )
+    count = 0
+    for upload in expired.iterator():
+        upload.delete()
+        count += 1
+    return f'{count} expired archive uploads deleted'
+
+
+@shared_task
+def build_similar_tracks():
+    """Rebuild table of similar tracks by co-listening.
+
+    Supposed to be run periodically, e.g. nightly.
+
+    """
+    count = recommendations.build_similar_tracks()
+    return f'{count} similar tracks saved'
+
+
+@shared_task
+def add_co_purchase(user_id, item_label, item_id, purchased):
+    """Increment counters of items bought together with bought item.
+
+    Sent through outbox on purchase, see ``CoPurchase.enqueue_purchase``.
+
+    Args:
+        user_id (int): id of buyer.
+        item_label (str): label of model of item, like 'music_store.track'.
+        item_id (int): id of bought item.
+        purchased (str): time of purchase in ISO 8601 format.
+
+    """
+    model = apps.get_model(item_label)
+    item = model._base_manager.get(pk=item_id)
+    CoPurchase.objects.add_purchase(
+        user_id, item, purchased=parse_datetime(purchased),
+    )
+
+
+@shared_task
+def relay_outbox():
+    """Dispatch side effects of purchases from outbox.
+
+    Supposed to be run every few seconds, several relays may run at once.
+
+    """
+    count = outbox.relay_outbox(
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        time_limit=settings.OUTBOX_RELAY_TIME_LIMIT,
+    )
+    return f'{count} outbox events dispatched'
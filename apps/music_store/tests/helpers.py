@@ -0,0 +1,14 @@
+from unittest.mock import patch
+
+from config.celery import app
+
+from ..outbox import relay_outbox
+
+
+def relay_outbox_in_process():
+    """Relay outbox events running Celery tasks in this process"""
+    def send_task(name, args):
+        return app.tasks[name].apply(args=args)
+
+    with patch('apps.music_store.outbox.app.send_task', side_effect=send_task):
+        relay_outbox(batch_size=100, time_limit=10)
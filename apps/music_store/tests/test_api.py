@@ -1,4 +1,11 @@
+import io
+import time
+import zipfile
 from operator import methodcaller
+from unittest.mock import patch
+
+from django.conf import settings
+from django.utils.http import http_date
 
 from faker import Faker
 from rest_framework import status
@@ -12,6 +19,7 @@ from ..factories import (
     AlbumFactory,
     BoughtTrackFactory,
     LikeTrackFactory,
+    ListenTrackFactory,
     TrackFactoryLongFullVersion,
     TrackFactory,
     BoughtAlbumFactory,
@@ -20,7 +28,10 @@ from ..factories import (
     UserWithBalanceFactory,
     TrackWithoutAlbumFactory
 )
-from ..models import Track
+from ..caches import track_cache
+from ..history import RecentlyPlayed
+from .helpers import relay_outbox_in_process
+from ..models import PaymentTransaction, SimilarTrack, Track
 from apps.music_store.api.serializers import TrackSerializer
 
 fake = Faker()
@@ -188,27 +199,96 @@ class TestAPITrack(APITestCase):
         response = self.client.get(f'{self.url}{self.track.id}/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_track_has_url_of_content(self):
+        """Content isn't included in track, it's provided by separate URL"""
+        response = self.client.get(f'{self.url}{self.track.id}/')
+        self.assertNotIn('content', response.data)
+        self.assertTrue(
+            response.data['content_url'].endswith(
+                f'{self.url}{self.track.id}/content/'
+            )
+        )
+
     def test_content_of_track_not_authorized(self):
         """If not logged in, content is free version"""
-        response = self.client.get(f'{self.url}{self.track.id}/')
-        content = response.data['content']
-        self.assertEqual(content, self.track.free_version)
+        response = self.client.get(f'{self.url}{self.track.id}/content/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._get_content(response), self.track.free_version)
 
     def test_content_of_track_authorized_not_bought(self):
         """If logged in and track not bought, content is free version"""
         self.client.force_authenticate(user=self.user)
-        response = self.client.get(f'{self.url}{self.track.id}/')
-        content = response.data['content']
-        self.assertEqual(content, self.track.free_version)
+        response = self.client.get(f'{self.url}{self.track.id}/content/')
+        self.assertEqual(self._get_content(response), self.track.free_version)
 
     def test_content_of_track_authorized_bought(self):
         """If logged in and track bought, content is full version"""
         self.client.force_authenticate(user=self.user)
         BoughtTrackFactory(user=self.user, item=self.track)
 
-        response = self.client.get(f'{self.url}{self.track.id}/')
-        content = response.data['content']
-        self.assertEqual(content, self.track.full_version)
+        response = self.client.get(f'{self.url}{self.track.id}/content/')
+        self.assertEqual(self._get_content(response), self.track.full_version)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_content_of_track_range(self):
+        """Single byte range of content is sent as partial content"""
+        self.client.force_authenticate(user=self.user)
+        BoughtTrackFactory(user=self.user, item=self.track)
+        content = self.track.full_version.encode()
+
+        response = self.client.get(
+            f'{self.url}{self.track.id}/content/',
+            HTTP_RANGE='bytes=10-',
+        )
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(
+            response['Content-Range'],
+            f'bytes 10-{len(content) - 1}/{len(content)}',
+        )
+        self.assertEqual(b''.join(response.streaming_content), content[10:])
+
+    def test_content_of_track_range_not_satisfiable(self):
+        response = self.client.get(
+            f'{self.url}{self.track.id}/content/',
+            HTTP_RANGE='bytes=1000-',
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+
+    def test_content_of_track_not_modified(self):
+        """Content isn't sent again if client has the same version"""
+        response = self.client.get(f'{self.url}{self.track.id}/content/')
+        response = self.client.get(
+            f'{self.url}{self.track.id}/content/',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_content_of_track_etag_depends_on_version(self):
+        """Free and full versions of content have different ETags"""
+        url = f'{self.url}{self.track.id}/content/'
+        etag = self.client.get(url)['ETag']
+
+        self.client.force_authenticate(user=self.user)
+        BoughtTrackFactory(user=self.user, item=self.track)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_content_of_track_is_sent_after_buy_to_client_with_date(self):
+        """Content cached before purchase isn't validated by date"""
+        url = f'{self.url}{self.track.id}/content/'
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+
+        self.client.force_authenticate(user=self.user)
+        BoughtTrackFactory(user=self.user, item=self.track)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._get_content(response), self.track.full_version)
 
     def test_track_is_liked_authorized(self):
         """Authorized user see if track is liked"""
@@ -245,6 +325,11 @@ class TestAPITrack(APITestCase):
 
         self.assertEqual(len(tracks), len(response.data['results']))
 
+    @staticmethod
+    def _get_content(response):
+        """Get content of track from streaming response"""
+        return b''.join(response.streaming_content).decode()
+
 
 class TestAPIAlbum(APITestCase):
     """Tests for Albums API."""
@@ -276,6 +361,39 @@ class TestAPIAlbum(APITestCase):
         response = self.client.get(f'{self.url}{self.album.id}/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_download_bought_album(self):
+        """Bought album is downloaded as ZIP archive with its tracks"""
+        album = AlbumFactory(author='Band', title='Debut')
+        first = TrackFactory(album=album, title='First')
+        TrackFactory(album=album, title='Second')
+        TrackFactory(album=album, title='Second')
+        self.client.force_authenticate(user=self.user)
+        BoughtAlbumFactory(user=self.user, item=album)
+
+        response = self.client.get(f'{self.url}{album.id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        archive = io.BytesIO(b''.join(response.streaming_content))
+        with zipfile.ZipFile(archive) as zip_file:
+            self.assertEqual(
+                sorted(zip_file.namelist()),
+                [
+                    'Band - Debut/First',
+                    'Band - Debut/Second',
+                    'Band - Debut/Second (2)',
+                ],
+            )
+            self.assertEqual(
+                zip_file.read('Band - Debut/First').decode(),
+                first.full_version,
+            )
+
+    def test_download_not_bought_album(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'{self.url}{self.album.id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class TestAPILikeTrackListView(APITestCase):
     """Tests for API list of liked tracks."""
@@ -411,6 +529,134 @@ class TestAPIListenTrack(APITestCase):
         )
 
 
+class TestAPISimilarTracks(APITestCase):
+    """Tests for API of tracks similar by co-listening."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = TrackFactory(price=10)
+        cls.best = TrackFactory(price=10)
+        cls.worst = TrackFactory(price=10)
+        cls.without_price = TrackFactory(price=None)
+        SimilarTrack.objects.create(track=cls.track, similar=cls.worst,
+                                    score=0.1)
+        SimilarTrack.objects.create(track=cls.track, similar=cls.best,
+                                    score=0.9)
+        SimilarTrack.objects.create(track=cls.track,
+                                    similar=cls.without_price, score=0.5)
+        cls.url = api_url(f'tracks/{cls.track.id}/similar/')
+
+    def test_similar_tracks_ordered_by_score(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [track['id'] for track in response.data],
+            [self.best.id, self.worst.id],
+        )
+
+    def test_no_similar_tracks(self):
+        response = self.client.get(api_url(f'tracks/{self.best.id}/similar/'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+
+class TestAPIAlsoBought(APITestCase):
+    """Tests for API of items bought together."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.album = AlbumFactory(price=10)
+        cls.track = TrackFactory(price=10)
+        cls.popular_track = TrackFactory(price=10)
+        for user in UserWithBalanceFactory.create_batch(2, balance=100):
+            cls.track.buy(user)
+            cls.popular_track.buy(user)
+        user = UserWithBalanceFactory(balance=100)
+        cls.album.buy(user)
+        cls.popular_track.buy(user)
+        # counters are updated by worker after purchases
+        relay_outbox_in_process()
+
+    def test_track_also_bought(self):
+        response = self.client.get(
+            api_url(f'tracks/{self.popular_track.id}/also_bought/')
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['type'], item['id'], item['count'])
+             for item in response.data],
+            [('Track', self.track.id, 2), ('Album', self.album.id, 1)],
+        )
+
+    def test_album_also_bought(self):
+        response = self.client.get(
+            api_url(f'albums/{self.album.id}/also_bought/')
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['id'], self.popular_track.id)
+
+
+class TestAPIRecentlyPlayed(APITestCase):
+    """Tests for API of tracks recently played by user."""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.tracks = TrackFactory.create_batch(3)
+        self.url = api_url('me/recently_played/')
+        RecentlyPlayed(self.user).clear()
+        self.addCleanup(RecentlyPlayed(self.user).clear)
+
+    def test_recently_played_forbidden_without_auth(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_recently_played_from_db(self):
+        """Listens are restored from database on cache miss"""
+        for track in self.tracks:
+            ListenTrackFactory(user=self.user, track=track)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(
+            [track['id'] for track in response.data],
+            [track.id for track in reversed(self.tracks)],
+        )
+
+    def test_recently_played_latest_first(self):
+        first, second, third = self.tracks
+        for track in (first, second, third, first):
+            track.listen(self.user)
+            # read list to have it cached
+            RecentlyPlayed(self.user).get_track_ids()
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(
+            [track['id'] for track in response.data],
+            [first.id, third.id, second.id],
+        )
+
+    def test_recently_played_size(self):
+        for track in self.tracks:
+            track.listen(self.user)
+
+        with self.settings(RECENTLY_PLAYED_SIZE=2):
+            self.client.force_authenticate(user=self.user)
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 2)
+
+    def test_recently_played_expires(self):
+        recently_played = RecentlyPlayed(self.user)
+        self.tracks[0].listen(self.user)
+        recently_played.get_track_ids()
+        self.tracks[1].listen(self.user)
+
+        ttl = recently_played.redis.ttl(recently_played.key)
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, settings.RECENTLY_PLAYED_TIMEOUT)
+
+
 class TestAPIMusicStoreBoughtTrack(APITestCase):
     """Test for API of ``music_store`` app for bought track. """
 
@@ -476,11 +722,30 @@ class TestAPIMusicStoreBoughtTrack(APITestCase):
         response = self._api_buy_track(self.track.pk, self.user, method.id)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_track_buy_charges_current_price(self):
+        """Price of track is read from DB, not from object cache"""
+        stale_track = Track.objects.get(pk=self.track.pk)
+        Track.objects.filter(pk=self.track.pk).update(
+            price=self.track.price + 1,
+        )
+
+        with patch.object(track_cache, 'get', return_value=stale_track):
+            response = self._api_buy_track(self.track.pk, self.user)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payment = PaymentTransaction.objects.get(
+            user=self.user, amount__lt=0,
+        )
+        self.assertEqual(payment.amount, -(self.track.price + 1))
+
     def test_track_get_full_content_after_buy(self):
         """Get full version of track right after buying it"""
         track = TrackFactoryLongFullVersion()
         response = self._api_buy_track(track.pk, self.user)
-        self.assertEqual(response.data['content'], track.full_version)
+
+        response = self.client.get(response.data['content_url'])
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content, track.full_version)
 
     def _api_buy_track(self, item_id, user=None, payment_id=None):
         """ Method for send request to bought Track Api"""
@@ -0,0 +1,78 @@
+import io
+
+from django.test import TestCase
+
+import zstandard
+
+from ..archives import (
+    TAR,
+    TAR_BZ2,
+    TAR_GZ,
+    TAR_ZST,
+    ZIP,
+    TarReader,
+    detect_format,
+    open_archive,
+)
+from .test_utils import make_tar, make_zip, real_unpacker
+
+
+class TestArchiveReaders(TestCase):
+    """Tests for readers of archives"""
+
+    def setUp(self):
+        self.files = {
+            'Band - Debut/First.txt': b'first',
+            './Intro.txt': b'intro',
+        }
+        self.expected = [
+            ('Band - Debut/First.txt', b'first'),
+            ('Intro.txt', b'intro'),
+        ]
+
+    def read(self, reader):
+        with reader:
+            return [(filename, member.read()) for filename, member in reader]
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format(make_zip({'a.txt': 'a'})), ZIP)
+        self.assertEqual(detect_format(make_tar(self.files)), TAR)
+        self.assertEqual(detect_format(make_tar(self.files, 'w:gz')), TAR_GZ)
+        self.assertEqual(
+            detect_format(make_tar(self.files, 'w:bz2')), TAR_BZ2,
+        )
+        with real_unpacker():
+            self.assertIsNone(detect_format(io.BytesIO(b'not an archive')))
+
+    def test_read_zip_with_prepended_data(self):
+        archive = io.BytesIO(
+            b'stub' + make_zip({'Intro.txt': 'intro'}).getvalue()
+        )
+        with real_unpacker():
+            self.assertEqual(detect_format(archive), ZIP)
+            self.assertEqual(self.read(open_archive(archive)),
+                             [('Intro.txt', b'intro')])
+
+    def test_read_compressed_tar(self):
+        for mode in ('w', 'w:gz', 'w:bz2'):
+            archive = make_tar(self.files, mode)
+            self.assertEqual(self.read(open_archive(archive)), self.expected)
+
+    def test_read_zstd_tar(self):
+        archive = io.BytesIO(zstandard.ZstdCompressor().compress(
+            make_tar(self.files).getvalue()
+        ))
+        self.assertEqual(detect_format(archive), TAR_ZST)
+        self.assertEqual(
+            self.read(TarReader(archive, compression=TAR_ZST)),
+            self.expected,
+        )
+
+    def test_tar_headers_are_not_kept(self):
+        reader = TarReader(make_tar(self.files))
+        list(reader)
+        self.assertEqual(reader.tar_file.members, [])
+
+    def test_unsupported_archive(self):
+        with real_unpacker(), self.assertRaises(TypeError):
+            open_archive(io.BytesIO(b'not an archive'))
@@ -0,0 +1,100 @@
+import pickle
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from django_redis import get_redis_connection
+
+from ..caches import track_cache
+from ..factories import TrackFactory
+from ..models import Track
+
+
+@override_settings(OBJECT_CACHE_ENABLED=True)
+class TestTrackCache(TestCase):
+    """Tests for two-tier cache of tracks"""
+
+    def setUp(self):
+        self.track = TrackFactory()
+        self.addCleanup(track_cache.invalidate, self.track.pk)
+
+    def test_cached_track_is_got_without_queries(self):
+        track_cache.get(self.track.pk)
+        with self.assertNumQueries(0):
+            track = track_cache.get(str(self.track.pk))
+        self.assertEqual(track, self.track)
+        self.assertEqual(track.title, self.track.title)
+
+    def test_track_is_read_from_redis_after_local_expiration(self):
+        track_cache.get(self.track.pk)
+        track_cache.local.clear()
+        remote_hits = track_cache.remote_hits
+        with self.assertNumQueries(0):
+            track_cache.get(self.track.pk)
+        self.assertEqual(track_cache.remote_hits, remote_hits + 1)
+
+    def test_saved_track_is_invalidated(self):
+        track_cache.get(self.track.pk)
+        self.track.title = 'New title'
+        self.track.save()
+
+        self.assertEqual(track_cache.get(self.track.pk).title, 'New title')
+
+    def test_deleted_track_is_invalidated(self):
+        track_cache.get(self.track.pk)
+        Track.objects.filter(pk=self.track.pk).delete()
+
+        with self.assertRaises(Track.DoesNotExist):
+            track_cache.get(self.track.pk)
+
+    def test_hit_rate(self):
+        track_cache.get(self.track.pk)
+        track_cache.get(self.track.pk)
+        stats = track_cache.get_stats()
+        self.assertGreater(stats['hit_rate'], 0)
+        self.assertLessEqual(stats['hit_rate'], 1)
+
+    def test_expired_track_is_reloaded(self):
+        key = track_cache.get_key(self.track.pk)
+        stale = Track(pk=self.track.pk, title='Old title')
+        cache.set(key, (time.time() - 1, pickle.dumps(stale)))
+
+        self.assertEqual(track_cache.get(self.track.pk).title,
+                         self.track.title)
+
+    def test_expired_track_is_served_while_its_reloaded(self):
+        """Stale track is returned when another request holds the lock"""
+        key = track_cache.get_key(self.track.pk)
+        stale = Track(pk=self.track.pk, title='Old title')
+        cache.set(key, (time.time() - 1, pickle.dumps(stale)))
+        lock = get_redis_connection('default').lock(f'{key}:lock', timeout=5)
+        lock.acquire()
+        self.addCleanup(lock.release)
+
+        stale_hits = track_cache.stale_hits
+        with self.assertNumQueries(0):
+            track = track_cache.get(self.track.pk)
+        self.assertEqual(track.title, 'Old title')
+        self.assertEqual(track_cache.stale_hits, stale_hits + 1)
+
+    def test_track_loaded_before_invalidation_is_not_cached(self):
+        """Old version read concurrently with change isn't written back"""
+        key = track_cache.get_key(self.track.pk)
+        get = track_cache.queryset.get
+
+        def get_and_change(**kwargs):
+            track = get(**kwargs)
+            # change is committed and invalidated after track is read
+            Track.objects.filter(pk=self.track.pk).update(title='New title')
+            track_cache.invalidate(self.track.pk)
+            return track
+
+        with patch.object(track_cache.queryset, 'get',
+                          side_effect=get_and_change):
+            track_cache.get(self.track.pk)
+        track_cache.local.clear()
+
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(track_cache.get(self.track.pk).title, 'New title')
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from ..factories import BoughtAlbumFactory, BoughtTrackFactory, TrackFactory
+from ..models import Album, Track, TrackContent
+
+
+class TestDuplicateTracksCommand(TestCase):
+    """Tests for ``duplicate_tracks`` management command"""
+
+    def test_duplicate_clusters_are_listed(self):
+        duplicates = TrackFactory.create_batch(2, full_version='same')
+        unique = TrackFactory(full_version='unique')
+
+        out = StringIO()
+        call_command('duplicate_tracks', stdout=out)
+        report = out.getvalue()
+
+        self.assertIn(f'{duplicates[0].content_hash} (2 tracks)', report)
+        self.assertIn(f'  {duplicates[1].id}: ', report)
+        self.assertNotIn(f'  {unique.id}: ', report)
+        self.assertIn('1 clusters of duplicates found', report)
+
+
+class TestCompressTrackContentCommand(TestCase):
+    """Tests for ``compress_track_content`` management command"""
+
+    def test_raw_contents_are_compressed(self):
+        track = TrackFactory(full_version='raw content ' * 100)
+        # content saved before compression was added
+        TrackContent.objects.filter(track=track).update(
+            raw_version=track.full_version,
+            compressed_version=None,
+        )
+
+        out = StringIO()
+        call_command('compress_track_content', stdout=out)
+
+        content = TrackContent.objects.get(track=track)
+        self.assertEqual(content.raw_version, '')
+        self.assertIsNotNone(content.compressed_version)
+        self.assertEqual(
+            Track.objects.get(pk=track.pk).full_version,
+            'raw content ' * 100,
+        )
+        self.assertIn('1 contents converted', out.getvalue())
+
+
+class TestWarmCachesCommand(TransactionTestCase):
+    """Tests for ``warm_caches`` management command.
+
+    Caches are warmed in threads with their own DB connections, so test
+    data must be committed to be seen by them.
+
+    """
+
+    def test_caches_are_warmed(self):
+        BoughtTrackFactory.create_batch(2)
+        BoughtAlbumFactory()
+        tracks_count = Track.objects.filter(price__gte=0).count()
+        albums_count = Album.objects.filter(price__gte=0).count()
+
+        out = StringIO()
+        call_command('warm_caches', '--pages', '1', '--concurrency', '1',
+                     stdout=out)
+        report = out.getvalue()
+
+        self.assertGreater(tracks_count, 0)
+        self.assertGreater(albums_count, 0)
+        self.assertIn(f'tracks: {tracks_count} warmed, 0 tasks failed',
+                      report)
+        self.assertIn(f'albums: {albums_count} warmed, 0 tasks failed',
+                      report)
+        self.assertIn('track pages: 1 warmed, 0 tasks failed', report)
+        self.assertIn('album pages: 1 warmed, 0 tasks failed', report)
+        self.assertIn('0 tasks skipped by time budget', report)
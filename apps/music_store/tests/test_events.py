@@ -0,0 +1,152 @@
+import time
+from unittest.mock import Mock, patch
+
+from django.db import transaction
+from django.test import TestCase
+
+from apps.users.factories import UserFactory
+from libs.testing.utils import run_on_commit_callbacks
+
+from .. import events
+from ..factories import TrackFactory, UserWithBalanceFactory
+from ..outbox import relay_batch
+
+
+class TestPublishEvents(TestCase):
+    """Tests for publishing of domain events"""
+
+    def setUp(self):
+        self.broker = events.get_broker()
+        # events of previous tests may be still in queue of publisher
+        events.get_publisher().flush()
+        self.broker.clear()
+        self.user = UserFactory()
+        self.track = TrackFactory(price=10)
+
+    def _get_published(self):
+        """Get events sent to the in-memory broker"""
+        publisher = events.get_publisher()
+        publisher.flush()
+        return [
+            events.Event.decode(message)
+            for message in self.broker.topics[publisher.topic]
+        ]
+
+    def test_listen_event(self):
+        with run_on_commit_callbacks():
+            self.track.listen(self.user)
+
+        event, = self._get_published()
+        self.assertEqual(event.type, events.EVENT_LISTEN)
+        self.assertEqual(event.user_id, self.user.id)
+        self.assertEqual(event.item_type, 'track')
+        self.assertEqual(event.item_id, self.track.id)
+
+    def test_like_unlike_events(self):
+        with run_on_commit_callbacks():
+            self.track.like(self.user)
+            # already liked track
+            self.track.like(self.user)
+            self.track.unlike(self.user)
+
+        self.assertEqual(
+            [event.type for event in self._get_published()],
+            [events.EVENT_LIKE, events.EVENT_UNLIKE],
+        )
+
+    def test_event_is_published_after_commit(self):
+        with run_on_commit_callbacks():
+            self.track.like(self.user)
+            self.assertEqual(self._get_published(), [])
+        self.assertEqual(len(self._get_published()), 1)
+
+    def test_rolled_back_action_is_not_published(self):
+        with run_on_commit_callbacks():
+            try:
+                with transaction.atomic():
+                    self.track.like(self.user)
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(self._get_published(), [])
+
+    def test_purchase_event(self):
+        """Purchase events are sent through outbox"""
+        user = UserWithBalanceFactory(balance=100)
+        self.track.album.buy(user)
+        self.assertEqual(self._get_published(), [])
+
+        with patch('apps.music_store.outbox.app.send_task'):
+            relay_batch(batch_size=10)
+        event, = self._get_published()
+        self.assertEqual(event.type, events.EVENT_PURCHASE)
+        self.assertEqual(event.item_type, 'album')
+
+
+class TestEventPublisher(TestCase):
+    """Tests for batching of events"""
+
+    def test_events_sent_in_batches(self):
+        broker = Mock()
+        publisher = events.EventPublisher(
+            broker, topic='test', batch_size=3, linger=1, queue_size=10,
+        )
+        for item_id in range(3):
+            publisher.publish(events.Event('listen', 1, 'track', item_id, 0))
+        publisher.flush()
+
+        broker.send_batch.assert_called_once()
+        topic, messages = broker.send_batch.call_args[0]
+        self.assertEqual(len(messages), 3)
+
+    def test_event_dropped_when_queue_is_full(self):
+        broker = Mock()
+        broker.send_batch.side_effect = lambda *args: time.sleep(0.1)
+        publisher = events.EventPublisher(
+            broker, topic='test', batch_size=1, linger=0, queue_size=1,
+        )
+        for item_id in range(5):
+            publisher.publish(events.Event('listen', 1, 'track', item_id, 0))
+        publisher.flush()
+
+        self.assertLess(broker.send_batch.call_count, 5)
+
+
+class TestEventConsumer(TestCase):
+    """Tests for base class of events consumers"""
+
+    class ListensConsumer(events.EventConsumer):
+        group = 'test'
+        event_types = (events.EVENT_LISTEN,)
+        max_records = 2
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.handled = []
+
+        def handle(self, event):
+            self.handled.append(event.item_id)
+
+    def setUp(self):
+        self.broker = events.InMemoryBroker()
+        self.broker.send_batch('test', [
+            events.Event('listen', 1, 'track', 1, 0).encode(),
+            events.Event('like', 1, 'track', 2, 0).encode(),
+            events.Event('listen', 1, 'track', 3, 0).encode(),
+        ])
+
+    def test_consume_filtered_events(self):
+        consumer = self.ListensConsumer(self.broker, 'test')
+        consumer.run(max_batches=3)
+        self.assertEqual(consumer.handled, [1, 3])
+
+    def test_failed_batch_is_polled_again(self):
+        consumer = self.ListensConsumer(self.broker, 'test')
+        consumer.handle = Mock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            consumer.poll()
+
+        consumer = self.ListensConsumer(self.broker, 'test')
+        consumer.poll()
+        self.assertEqual(consumer.handled, [1])
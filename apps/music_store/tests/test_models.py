@@ -1,4 +1,8 @@
+import hashlib
+import io
+
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 from django.db import IntegrityError
 from django.test import TestCase
 
@@ -19,9 +23,11 @@ from apps.music_store.factories import (
     UserWithPaymentMethodFactory
 )
 
-from apps.music_store.models import Album, LikeTrack, ListenTrack, Track, PaymentMethod, PaymentTransaction
+from apps.music_store.models import Album, ArchiveUpload, CoPurchase, LikeTrack, ListenTrack, Track, PaymentMethod, PaymentTransaction
 from apps.users.factories import UserFactory
 
+from .helpers import relay_outbox_in_process
+
 
 class TestPaymentAccount(TestCase):
     """Test for PaymentAccount and his methods
@@ -259,6 +265,32 @@ class TestAlbumAndTrack(TestCase):
             self.long_track.full_version[:25]
         )
 
+    def test_track_content_is_loaded_lazily(self):
+        with self.assertNumQueries(1):
+            track = Track.objects.get(pk=self.track.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(track.full_version, self.track.full_version)
+
+    def test_track_content_is_saved_with_track(self):
+        track = Track.objects.get(pk=self.track.pk)
+        track.full_version = 'new content'
+        track.save()
+
+        track = Track.objects.select_related('track_content').get(
+            pk=self.track.pk
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(track.full_version, 'new content')
+        self.assertEqual(track.free_version, 'new content')
+
+    def test_bytes_content_is_set_as_text(self):
+        content = 'Пример текста длиннее двадцати пяти символов'
+        track = Track(full_version=content.encode())
+
+        self.assertEqual(track.full_version, content)
+        self.assertEqual(track.free_version, content[:25])
+        self.assertEqual(track.content_hash, Track.get_content_hash(content))
+
     def test_like_track(self):
         self.track.like(user=self.user)
         self.assertTrue(self.track.is_liked(user=self.user))
@@ -336,3 +368,165 @@ class TestListen(TestCase):
             ListenTrack.objects.filter(user=repeat_user).count(),
             repeat_listens
         )
+
+
+class TestCoPurchase(TestCase):
+    """Tests for counters of items bought together"""
+
+    def setUp(self):
+        self.album = AlbumFactory(price=10)
+        self.track = TrackFactory(price=10)
+        self.other_track = TrackFactory(price=10)
+
+    @staticmethod
+    def buy(item, user):
+        """Buy item and count pairs like outbox relay does"""
+        item.buy(user)
+        relay_outbox_in_process()
+
+    def test_first_purchase_has_no_pairs(self):
+        user = UserWithBalanceFactory(balance=100)
+        self.buy(self.track, user)
+        self.assertFalse(CoPurchase.objects.exists())
+
+    def test_pairs_created_in_both_directions(self):
+        user = UserWithBalanceFactory(balance=100)
+        self.buy(self.track, user)
+        self.buy(self.album, user)
+
+        self.assertEqual(
+            CoPurchase.objects.for_item(self.track).get().other,
+            self.album,
+        )
+        self.assertEqual(
+            CoPurchase.objects.for_item(self.album).get().other,
+            self.track,
+        )
+
+    def test_counters_incremented_by_other_users(self):
+        for user in UserWithBalanceFactory.create_batch(2, balance=100):
+            self.buy(self.track, user)
+            self.buy(self.other_track, user)
+
+        co_purchase = CoPurchase.objects.for_item(self.track).get()
+        self.assertEqual(co_purchase.count, 2)
+
+    def test_purchases_relayed_together_are_paired_once(self):
+        user = UserWithBalanceFactory(balance=100)
+        self.track.buy(user)
+        self.album.buy(user)
+        relay_outbox_in_process()
+
+        co_purchase = CoPurchase.objects.for_item(self.track).get()
+        self.assertEqual(co_purchase.count, 1)
+
+    def test_purchase_doesnt_count_pairs_in_request(self):
+        user = UserWithBalanceFactory(balance=100)
+        self.track.buy(user)
+        self.album.buy(user)
+
+        self.assertFalse(CoPurchase.objects.exists())
+
+    def test_number_of_pairs_is_capped(self):
+        user = UserWithBalanceFactory(balance=100)
+        self.buy(self.track, user)
+        self.buy(self.other_track, user)
+
+        with self.settings(CO_PURCHASE_MAX_USER_ITEMS=1):
+            self.buy(self.album, user)
+
+        # album paired only with the latest purchase
+        self.assertEqual(
+            CoPurchase.objects.for_item(self.album).get().other,
+            self.other_track,
+        )
+
+
+class TestArchiveUpload(TestCase):
+    """Tests for chunked upload of archives"""
+
+    def setUp(self):
+        self.content = b'0123456789'
+        self.upload = ArchiveUpload.objects.create(
+            user=UserFactory(),
+            filename='albums.zip',
+            size=len(self.content),
+            chunk_size=4,
+        )
+
+    def save_chunk(self, index, data=None):
+        data = data or self.content[index * 4:(index + 1) * 4]
+        self.upload.save_chunk(
+            index,
+            io.BytesIO(data),
+            hashlib.sha256(data).hexdigest(),
+        )
+
+    def test_chunks_count(self):
+        self.assertEqual(self.upload.chunks_count, 3)
+        self.assertEqual(self.upload.get_chunk_size(2), 2)
+
+    def test_received_chunks(self):
+        self.save_chunk(2)
+        self.save_chunk(0)
+        self.assertEqual(self.upload.received_chunks, [0, 2])
+        self.assertFalse(self.upload.is_complete)
+
+    def test_chunk_with_wrong_checksum(self):
+        with self.assertRaises(ValidationError):
+            self.upload.save_chunk(0, io.BytesIO(b'0123'), 'wrong')
+        self.assertEqual(self.upload.received_chunks, [])
+
+    def test_chunk_with_wrong_size(self):
+        with self.assertRaises(ValidationError):
+            self.save_chunk(0, b'012')
+
+    def test_chunk_index_out_of_range(self):
+        with self.assertRaises(ValidationError):
+            self.save_chunk(3, b'01')
+
+    def test_chunk_with_wrong_declared_length_is_not_read(self):
+        body = io.BytesIO(b'0123')
+        with self.assertRaises(ValidationError):
+            self.upload.save_chunk(0, body, 'checksum', length=2 ** 30)
+        self.assertEqual(body.tell(), 0)
+
+    def test_oversized_chunk_is_read_partially(self):
+        body = io.BytesIO(b'0123' * 1000)
+        with self.assertRaises(ValidationError):
+            self.upload.save_chunk(0, body, 'checksum')
+        # one byte more than the size of chunk
+        self.assertEqual(body.tell(), 5)
+        self.assertEqual(self.upload.received_chunks, [])
+
+    def test_assemble(self):
+        for index in (1, 0, 2, 1):
+            self.save_chunk(index)
+
+        name = self.upload.assemble()
+        with default_storage.open(name) as archive:
+            self.assertEqual(archive.read(), self.content)
+        default_storage.delete(name)
+        self.assertTrue(name.endswith('.zip'))
+        self.assertFalse(self.upload.chunks.exists())
+
+    def test_assembled_archive_keeps_extension(self):
+        self.upload.filename = 'Albums.TAR.GZ'
+        for index in range(3):
+            self.save_chunk(index)
+
+        name = self.upload.assemble()
+        default_storage.delete(name)
+        self.assertTrue(name.endswith('.tar.gz'))
+
+    def test_delete_removes_files(self):
+        self.save_chunk(0)
+        chunk_name = self.upload.chunks.get().name
+
+        self.upload.delete()
+        self.assertFalse(default_storage.exists(chunk_name))
+
+    def test_assemble_not_complete(self):
+        self.save_chunk(0)
+        with self.assertRaises(ValidationError):
+            self.upload.assemble()
@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from .. import events
+from ..factories import TrackFactory, UserWithBalanceFactory
+from ..models import BoughtTrack, OutboxEvent, PaymentTransaction
+from ..outbox import relay_batch, relay_outbox
+
+
+class PurchaseFailed(Exception):
+    """Error of step of purchase inside its transaction"""
+
+
+class TestOutbox(TestCase):
+    """Tests for outbox of purchase side effects"""
+
+    def setUp(self):
+        self.broker = events.get_broker()
+        self.broker.clear()
+        self.user = UserWithBalanceFactory(balance=100)
+        self.tracks = TrackFactory.create_batch(3, price=10)
+
+    def test_purchase_writes_outbox(self):
+        self.tracks[0].buy(self.user)
+
+        event = OutboxEvent.objects.get(destination=OutboxEvent.KAFKA)
+        self.assertEqual(
+            events.Event(*event.payload)[:4],
+            (events.EVENT_PURCHASE, self.user.id, 'track', self.tracks[0].id),
+        )
+        task = OutboxEvent.objects.get(destination=OutboxEvent.CELERY)
+        self.assertEqual(task.name, 'apps.music_store.tasks.add_co_purchase')
+        self.assertEqual(
+            task.payload[:3],
+            [self.user.id, 'music_store.track', self.tracks[0].id],
+        )
+
+    def test_failed_purchase_writes_nothing(self):
+        """Purchase failed inside transaction is rolled back"""
+        with patch.object(events.Event, 'create',
+                          side_effect=PurchaseFailed):
+            with self.assertRaises(PurchaseFailed):
+                self.tracks[0].buy(self.user)
+
+        self.assertFalse(PaymentTransaction.objects.filter(
+            amount__lt=0,
+        ).exists())
+        self.assertFalse(BoughtTrack.objects.exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @patch('apps.music_store.outbox.app.send_task')
+    def test_relay_in_batches(self, send_task):
+        # each purchase writes Kafka event and co-purchase task
+        for track in self.tracks:
+            track.buy(self.user)
+
+        self.assertEqual(relay_batch(batch_size=2), 2)
+        self.assertEqual(OutboxEvent.objects.count(), 4)
+        self.assertEqual(relay_outbox(batch_size=2, time_limit=10), 4)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+        topic = events.get_publisher().topic
+        self.assertEqual(len(self.broker.topics[topic]), 3)
+        self.assertEqual(send_task.call_count, 3)
+
+    @patch('apps.music_store.outbox.app.send_task')
+    def test_events_kept_when_dispatch_fails(self, send_task):
+        self.tracks[0].buy(self.user)
+
+        with patch.object(self.broker, 'send_batch', side_effect=IOError):
+            with self.assertRaises(IOError):
+                relay_batch(batch_size=10)
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+    @patch('apps.music_store.outbox.app.send_task')
+    def test_dispatch_to_celery(self, send_task):
+        OutboxEvent.objects.create(
+            destination=OutboxEvent.CELERY,
+            name='apps.music_store.tasks.build_similar_tracks',
+            payload=[],
+        )
+        relay_batch(batch_size=10)
+
+        send_task.assert_called_once_with(
+            'apps.music_store.tasks.build_similar_tracks', args=[],
+        )
@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from apps.users.factories import UserFactory
+
+from ..factories import LikeTrackFactory, ListenTrackFactory, TrackFactory
+from ..models import SimilarTrack
+from ..recommendations import build_similar_tracks
+
+
+class TestBuildSimilarTracks(TestCase):
+    """Tests for building of similar tracks by co-listening"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = UserFactory.create_batch(3)
+        cls.track_1, cls.track_2, cls.track_3, cls.lonely = \
+            TrackFactory.create_batch(4)
+
+        # track_1 and track_2 are listened by the same users,
+        # track_3 is only liked by one of them
+        for user in cls.users[:2]:
+            ListenTrackFactory(user=user, track=cls.track_1)
+            ListenTrackFactory(user=user, track=cls.track_2)
+        LikeTrackFactory(user=cls.users[0], track=cls.track_3)
+        ListenTrackFactory(user=cls.users[2], track=cls.lonely)
+
+    def test_neighbours_ordered_by_score(self):
+        build_similar_tracks(top_k=5, chunk_size=2, block_size=2)
+
+        neighbours = SimilarTrack.objects.filter(
+            track=self.track_1
+        ).order_by('-score')
+        self.assertEqual(
+            [neighbour.similar for neighbour in neighbours],
+            [self.track_2, self.track_3],
+        )
+
+    def test_track_without_common_listeners(self):
+        build_similar_tracks(top_k=5, chunk_size=2, block_size=2)
+
+        self.assertFalse(
+            SimilarTrack.objects.filter(track=self.lonely).exists()
+        )
+        self.assertFalse(
+            SimilarTrack.objects.filter(similar=self.lonely).exists()
+        )
+
+    def test_top_k_limit(self):
+        build_similar_tracks(top_k=1, chunk_size=2, block_size=2)
+
+        self.assertEqual(
+            SimilarTrack.objects.filter(track=self.track_1).count(),
+            1,
+        )
+
+    def test_rebuild_replaces_neighbours(self):
+        build_similar_tracks()
+        count = build_similar_tracks()
+
+        self.assertEqual(SimilarTrack.objects.count(), count)
@@ -1,14 +1,25 @@
+from datetime import timedelta
 from unittest.mock import Mock, mock_open, patch
 
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.test import TestCase, override_settings
+from django.utils import timezone
 
 from faker import Faker
 
-from ..tasks import get_tracks_from_zip
+from apps.users.factories import UserFactory
+
+from ..models import Album, ArchiveUpload, Track
+from ..tasks import (
+    collect_import_results,
+    delete_expired_archive_uploads,
+    get_tracks_from_zip,
+    import_tracks_chunk,
+    publish_import_result,
+)
 from ..utils import AlbumUnpacker
-from .test_utils import mock_unpacker
+from .test_utils import make_zip, mock_unpacker, real_unpacker
 
 
 @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
@@ -36,10 +47,115 @@ class TestGetAlbumsFromZipTask(TestCase):
         archive = Mock()
         unpacker = AlbumUnpacker(archive)
         unpacker.zip_file.open = mock_open(
-            read_data=fake.sentence(30)
+            read_data=fake.sentence(30).encode()
         )
 
-        default_storage.open = mock_open(read_data=fake.sentence(30))
+        default_storage.open = mock_open(
+            read_data=fake.sentence(30).encode()
+        )
 
         result = get_tracks_from_zip.delay(archive)
         self.assertTrue(result.successful())
+
+
+class TestParallelImportTasks(TestCase):
+    """Tests for tasks importing chunks of zip file in parallel"""
+
+    def test_import_tracks_chunk(self):
+        archive = make_zip({
+            'Band - Debut/First.txt': 'first',
+            'Band - Debut/Second.txt': 'second',
+            'Loner - Intro.txt': 'intro',
+        })
+        with real_unpacker(), \
+                patch.object(default_storage, 'open', return_value=archive):
+            counters = import_tracks_chunk(
+                'archive.zip',
+                ['Band - Debut/First.txt', 'Band - Debut/Second.txt'],
+            )
+
+        self.assertEqual(
+            counters,
+            {'albums_added': 1, 'tracks_added': 2, 'skipped': 0},
+        )
+        self.assertTrue(Album.objects.filter(title='Debut').exists())
+        self.assertFalse(Track.objects.filter(title='Intro.txt').exists())
+
+    def test_collect_import_results(self):
+        result = collect_import_results([
+            {'albums_added': 1, 'tracks_added': 2, 'skipped': 0},
+            {'albums_added': 0, 'tracks_added': 3, 'skipped': 1},
+        ])
+        self.assertEqual(
+            result,
+            '1 albums added. 5 tracks added. 1 tracks skipped',
+        )
+
+
+class TestPublishImportResult(TestCase):
+    """Tests for publishing results of import to watchers"""
+
+    @patch('apps.music_store.progress.publish')
+    def test_result_is_published(self, publish):
+        publish_import_result(
+            sender=collect_import_results, task_id='task', state='SUCCESS',
+            retval='Done',
+        )
+        publish.assert_called_once_with('task', 'SUCCESS', 'Done')
+
+    @patch('apps.music_store.progress.publish')
+    def test_replaced_task_is_skipped(self, publish):
+        publish_import_result(
+            sender=get_tracks_from_zip, task_id='task', state='IGNORED',
+            retval=None,
+        )
+        publish.assert_not_called()
+
+    @patch('apps.music_store.progress.publish')
+    def test_failure_of_chunk_is_published_as_result(self, publish):
+        publish_import_result(
+            sender=import_tracks_chunk, task_id='chunk', state='FAILURE',
+            retval=ValueError('Broken archive'),
+            args=('archive.zip', ['track.mp3'], 'task'),
+        )
+        publish.assert_called_once_with('task', 'FAILURE', 'Broken archive')
+
+    @patch('apps.music_store.progress.publish')
+    def test_success_of_chunk_is_skipped(self, publish):
+        publish_import_result(
+            sender=import_tracks_chunk, task_id='chunk', state='SUCCESS',
+            retval={}, args=('archive.zip', ['track.mp3'], 'task'),
+        )
+        publish.assert_not_called()
+
+
+@override_settings(ARCHIVE_UPLOAD_EXPIRATION=60)
+class TestDeleteExpiredArchiveUploads(TestCase):
+    """Tests for cleanup of abandoned and imported archive uploads"""
+
+    def create_upload(self, age):
+        upload = ArchiveUpload.objects.create(
+            user=UserFactory(), filename='albums.zip', size=4, chunk_size=4,
+        )
+        ArchiveUpload.objects.filter(id=upload.id).update(
+            modified=timezone.now() - timedelta(seconds=age),
+        )
+        return upload
+
+    def test_expired_uploads_are_deleted(self):
+        expired = self.create_upload(age=120)
+        expired.archive = default_storage.save(
+            'archive_uploads/expired.zip', ContentFile(b'data'),
+        )
+        ArchiveUpload.objects.filter(id=expired.id).update(
+            archive=expired.archive,
+        )
+        active = self.create_upload(age=10)
+
+        result = delete_expired_archive_uploads()
+
+        self.assertEqual(result, '1 expired archive uploads deleted')
+        self.assertFalse(default_storage.exists(expired.archive))
+        self.assertQuerysetEqual(
+            ArchiveUpload.objects.all(), [active.id], lambda u: u.id,
+        )
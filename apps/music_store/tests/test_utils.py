@@ -1,12 +1,79 @@
+import io
+import tarfile
+import threading
+import uuid
 import zipfile
-from unittest.mock import Mock, mock_open
+from contextlib import contextmanager
+from unittest.mock import Mock, mock_open, patch
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 
+from django_redis import get_redis_connection
 from faker import Faker
 
+from ..factories import AlbumFactory, TrackWithoutAlbumFactory
 from ..models import Album, Track
-from ..utils import AlbumUnpacker, NestedFolderError
+from ..archives import TarReader
+from ..progress import COUNTERS_TEMPLATE
+from ..utils import (
+    AlbumUnpacker,
+    ChunkImportProgress,
+    ImportProgress,
+    NestedFolderError,
+    StreamingImporter,
+)
+
+# originals replaced by `mock_unpacker`, module is imported before any test
+_REAL_ZIP = {
+    'ZipFile': zipfile.ZipFile,
+    'is_zipfile': zipfile.is_zipfile,
+}
+_REAL_UNPACKER = {
+    'nested_check': AlbumUnpacker.nested_check,
+    '_get_track_list': AlbumUnpacker._get_track_list,
+}
+
+
+@contextmanager
+def real_unpacker():
+    """Restore zipfile and AlbumUnpacker replaced by `mock_unpacker`"""
+    with patch.multiple(zipfile, **_REAL_ZIP), \
+            patch.multiple(AlbumUnpacker, **_REAL_UNPACKER):
+        yield
+
+
+def make_zip(files):
+    """Create ZIP archive in memory.
+
+    Args:
+        files (dict): content of files by their names.
+
+    """
+    archive = io.BytesIO()
+    with _REAL_ZIP['ZipFile'](archive, 'w') as zip_file:
+        for filename, content in files.items():
+            zip_file.writestr(filename, content)
+    archive.seek(0)
+    return archive
+
+
+def make_tar(files, mode='w'):
+    """Create tar archive in memory.
+
+    Args:
+        files (dict): content of files by their names.
+        mode (str): mode of `tarfile.open`, like 'w:gz'.
+
+    """
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode=mode) as tar_file:
+        for filename, content in files.items():
+            info = tarfile.TarInfo(filename)
+            info.size = len(content)
+            tar_file.addfile(info, io.BytesIO(content))
+    archive.seek(0)
+    return archive
 
 
 def mock_infolist(obj):
@@ -101,3 +168,268 @@ class TestUploadZIPArchive(TestCase):
 
         self.assertEqual(Track.objects.all().count(), 4)
         self.assertEqual(Album.objects.all().count(), 2)
+
+
+class TestBulkImport(TestCase):
+    """Tests for set-based import of ZIP archive"""
+
+    def setUp(self):
+        self.archive = make_zip({
+            'Loner - Intro.txt': 'intro',
+            'Band - Debut/First.txt': 'first',
+            'Band - Debut/Second.txt': 'second',
+            'Band - Debut/Known.txt': 'known',
+            'Band - Debut/Known copy.txt': 'known',
+            'Band - Second/Third.txt': 'third',
+            'Empty/': '',
+        })
+        AlbumFactory(author='Band', title='Second')
+        TrackWithoutAlbumFactory(author='Band', title='Known.txt')
+
+    def test_bulk_import(self):
+        with real_unpacker():
+            unpacker = AlbumUnpacker(self.archive)
+            result = unpacker.bulk_import()
+
+        self.assertEqual(result, (1, 5))
+        self.assertEqual(unpacker.skipped_tracks_count, 1)
+        self.assertEqual(Album.objects.filter(title='Second').count(), 1)
+
+        track = Track.objects.get(title='First.txt')
+        self.assertEqual(track.album.title, 'Debut')
+        self.assertEqual(track.author, 'Band')
+        self.assertEqual(track.free_version, track.full_version[:25])
+
+    def test_bulk_import_skips_duplicate_content(self):
+        TrackWithoutAlbumFactory(full_version='third')
+        archive = make_zip({
+            'Band - Debut/First.txt': 'first',
+            'Band - Debut/First again.txt': 'first',
+            'Band - Debut/Third.txt': 'third',
+        })
+        with real_unpacker():
+            unpacker = AlbumUnpacker(archive)
+            result = unpacker.bulk_import()
+
+        self.assertEqual(result, (1, 1))
+        self.assertEqual(unpacker.skipped_tracks_count, 2)
+        track = Track.objects.get(title='First.txt')
+        self.assertEqual(
+            track.content_hash,
+            Track.get_content_hash(b'first'),
+        )
+
+    def test_bulk_import_replaces_invalid_utf8(self):
+        archive = make_zip({
+            'Band - Debut/Latin.txt': 'caf\xe9'.encode('latin-1'),
+            'Band - Debut/Latin again.txt': 'caf\xe9'.encode('latin-1'),
+        })
+        with real_unpacker():
+            unpacker = AlbumUnpacker(archive)
+            result = unpacker.bulk_import()
+
+        self.assertEqual(result, (1, 1))
+        track = Track.objects.get(title='Latin.txt')
+        self.assertEqual(track.full_version, 'caf\ufffd')
+        self.assertEqual(
+            track.content_hash,
+            Track.get_content_hash('caf\ufffd'),
+        )
+
+    def test_split_track_list_by_track_count(self):
+        """Tracks of one author are spread over chunks"""
+        with real_unpacker():
+            unpacker = AlbumUnpacker(self.archive)
+            chunks = unpacker.split_track_list(chunk_size=4)
+
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 2])
+        self.assertEqual(sum(chunks, []), unpacker.track_list)
+
+    def test_chunks_of_one_album_import_it_once(self):
+        with real_unpacker():
+            unpacker = AlbumUnpacker(self.archive)
+            for chunk in unpacker.split_track_list(chunk_size=1):
+                AlbumUnpacker(self.archive).bulk_import(track_list=chunk)
+
+        self.assertEqual(Album.objects.filter(title='Debut').count(), 1)
+        self.assertEqual(
+            Track.objects.filter(album__title='Debut').count(), 3,
+        )
+
+    def test_bulk_import_reuses_concurrently_created_album(self):
+        with real_unpacker():
+            unpacker = AlbumUnpacker(self.archive)
+            # album is created after existing albums are resolved
+            with patch.object(AlbumUnpacker, '_filter_by_author_and_title',
+                              side_effect=lambda queryset, keys: (
+                                  queryset.none()
+                                  if queryset.model is Album else
+                                  queryset.filter(author='Band'))):
+                result = unpacker.bulk_import()
+
+        self.assertEqual(result[0], 1)
+        self.assertEqual(Album.objects.filter(title='Second').count(), 1)
+
+    def test_bulk_import_query_count(self):
+        """Number of queries doesn't depend on number of tracks"""
+        with real_unpacker():
+            unpacker = AlbumUnpacker(self.archive)
+            unpacker.bulk_size = 2
+            # albums: select, savepoint, insert, release; tracks: select,
+            # 3 chunks: savepoint, lock, selects of tracks and hashes,
+            # insert of tracks, select of compression dictionary, insert
+            # of contents, release
+            with self.assertNumQueries(29):
+                unpacker.bulk_import()
+
+
+class TestParallelChunksImport(TransactionTestCase):
+    """Tests for chunks of ZIP archive imported in parallel.
+
+    Chunks are imported in threads with their own DB connections, so
+    tracks created by one of them are seen by others after commit.
+
+    """
+
+    def test_chunks_dont_create_the_same_tracks(self):
+        archive = make_zip({
+            'Band - Debut/First.txt': 'first',
+            'Band - Debut/Second.txt': 'second',
+            'Band - Live/First.txt': 'first live',
+            'Band - Live/Second copy.txt': 'second',
+        }).getvalue()
+        chunks = [
+            ['Band - Debut/First.txt', 'Band - Debut/Second.txt'],
+            ['Band - Live/First.txt', 'Band - Live/Second copy.txt'],
+        ]
+        barrier = threading.Barrier(len(chunks))
+        lock_tracks = AlbumUnpacker._lock_tracks
+        errors = []
+
+        def lock_together(keys, hashes):
+            # chunks check existing tracks at the same time
+            barrier.wait(timeout=5)
+            lock_tracks(keys, hashes)
+
+        def import_chunk(track_list):
+            try:
+                unpacker = AlbumUnpacker(io.BytesIO(archive))
+                unpacker.bulk_import(track_list=track_list)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with real_unpacker(), patch.object(
+                AlbumUnpacker, '_lock_tracks', staticmethod(lock_together)):
+            threads = [
+                threading.Thread(target=import_chunk, args=(chunk,))
+                for chunk in chunks
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Track.objects.count(), 2)
+        self.assertEqual(
+            Track.objects.filter(author='Band', title='First.txt').count(),
+            1,
+        )
+        self.assertEqual(
+            Track.objects.filter(
+                content_hash=Track.get_content_hash('second'),
+            ).count(),
+            1,
+        )
+
+
+class TestStreamingImport(TestCase):
+    """Tests for single pass import of tarballs"""
+
+    def setUp(self):
+        self.archive = make_tar({
+            'Loner - Intro.txt': b'intro',
+            'Band - Debut/First.txt': b'first',
+            'Band - Debut/Known.txt': b'known',
+            'Band - Debut/Copy of first.txt': b'first',
+            'Band - Debut/Nested/Track.txt': b'nested',
+            'Band - Second/Third.txt': b'third',
+        }, mode='w:gz')
+        AlbumFactory(author='Band', title='Second')
+        TrackWithoutAlbumFactory(author='Band', title='Known.txt')
+
+    def test_stream_import(self):
+        progress = Mock()
+        with TarReader(self.archive, compression='gz') as reader:
+            importer = StreamingImporter(reader)
+            importer.bulk_size = 2
+            result = importer.stream_import(progress=progress)
+
+        self.assertEqual(result, (1, 3))
+        # existing, duplicate content and nested tracks
+        self.assertEqual(importer.skipped_tracks_count, 3)
+        self.assertEqual(progress.call_args[0], (5,))
+        track = Track.objects.get(title='First.txt')
+        self.assertEqual(track.album.title, 'Debut')
+        self.assertEqual(track.free_version, track.full_version[:25])
+
+    def test_stream_import_replaces_invalid_utf8(self):
+        archive = make_tar({'Band - Debut/Latin.txt': b'caf\xe9'})
+        with TarReader(archive) as reader:
+            result = StreamingImporter(reader).stream_import()
+
+        self.assertEqual(result, (1, 1))
+        track = Track.objects.get(title='Latin.txt')
+        self.assertEqual(track.full_version, 'caf\ufffd')
+
+
+class TestImportProgress(TestCase):
+    """Tests for throttled reporting of import progress"""
+
+    def setUp(self):
+        self.task = Mock()
+        self.unpacker = Mock(total_tracks=100, counters={})
+
+    def test_first_call_is_reported(self):
+        progress = ImportProgress(self.task, self.unpacker, 'UNPACKING',
+                                  interval=60, step=10)
+        progress(1)
+        self.task.update_state.assert_called_once_with(
+            state='UNPACKING',
+            meta={'processed': 1, 'total': 100},
+        )
+
+    def test_reports_are_throttled_by_step(self):
+        progress = ImportProgress(self.task, self.unpacker, 'UNPACKING',
+                                  interval=60, step=10)
+        for processed in range(100):
+            progress(processed)
+        self.assertEqual(self.task.update_state.call_count, 10)
+
+    def test_chunks_report_progress_of_archive(self):
+        task_id = str(uuid.uuid4())
+        self.addCleanup(
+            get_redis_connection('default').delete,
+            COUNTERS_TEMPLATE.format(task_id=task_id),
+        )
+        chunks = [
+            ChunkImportProgress(
+                self.task,
+                Mock(total_tracks=100, counters={'tracks_added': added}),
+                'UNPACKING',
+                task_id,
+                interval=60,
+                step=10,
+            )
+            for added in (2, 3)
+        ]
+        chunks[0](2)
+        chunks[1](3)
+
+        self.task.update_state.assert_called_with(
+            task_id=task_id,
+            state='UNPACKING',
+            meta={'processed': 5, 'total': 100, 'tracks_added': 5},
+        )
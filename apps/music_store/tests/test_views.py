@@ -0,0 +1,81 @@
+import hashlib
+import io
+import json
+import uuid
+from unittest.mock import patch
+
+from django.test import RequestFactory, TestCase
+
+from apps.users.factories import UserFactory
+from libs.testing.utils import run_on_commit_callbacks
+
+from .. import progress
+from ..models import ArchiveUpload
+from ..views import ArchiveUploadCompleteView, TaskProgressView
+
+
+class TestTaskProgressView(TestCase):
+    """Tests for status of import task published by workers"""
+
+    def get_progress(self, task_id):
+        request = RequestFactory().get('/')
+        return TaskProgressView.as_view()(request, task_id=task_id)
+
+    def test_published_status_is_returned(self):
+        task_id = str(uuid.uuid4())
+        progress.publish(task_id, 'UNPACKING', {'processed': 10})
+
+        response = self.get_progress(task_id)
+        self.assertEqual(json.loads(response.content.decode()), {
+            'id': task_id,
+            'status': 'UNPACKING',
+            'result': {'processed': 10},
+        })
+
+    @patch('apps.music_store.views.get_celery_task_status_info')
+    def test_unknown_task_is_not_found(self, get_status_info):
+        response = self.get_progress(str(uuid.uuid4()))
+        self.assertEqual(response.status_code, 404)
+        # result backend isn't queried
+        get_status_info.assert_not_called()
+
+
+@patch('apps.music_store.views.chain')
+class TestArchiveUploadCompleteView(TestCase):
+    """Tests for start of import of uploaded archive"""
+
+    def setUp(self):
+        self.upload = ArchiveUpload.objects.create(
+            user=UserFactory(), filename='albums.zip', size=4, chunk_size=4,
+        )
+
+    def complete(self):
+        request = RequestFactory().post('/')
+        request.user = self.upload.user
+        return ArchiveUploadCompleteView.as_view()(
+            request, upload_id=str(self.upload.id),
+        )
+
+    def test_import_is_started_once(self, chain):
+        self.upload.save_chunk(
+            0, io.BytesIO(b'0123'), hashlib.sha256(b'0123').hexdigest(),
+        )
+        with run_on_commit_callbacks():
+            responses = [self.complete(), self.complete()]
+
+        self.upload.refresh_from_db()
+        self.assertEqual([r.status_code for r in responses], [200, 200])
+        chain.return_value.apply_async.assert_called_once_with(
+            task_id=self.upload.task_id,
+        )
+        # watchers see the task before worker starts it
+        self.assertEqual(
+            progress.get_state(self.upload.task_id)['status'], 'PENDING',
+        )
+
+    def test_incomplete_upload_is_not_imported(self, chain):
+        with run_on_commit_callbacks():
+            response = self.complete()
+
+        self.assertEqual(response.status_code, 400)
+        chain.assert_not_called()
@@ -1,10 +1,18 @@
+import hashlib
+import time
 import zipfile
 from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
 
 from config.celery import app
 from functools import partial
 
+from .archives import ZipReader
 from .models import Album, Track
+from .progress import add_counters, publish as publish_progress
 
 
 class NestedFolderError(Exception):
@@ -17,6 +25,14 @@ TrackData = namedtuple('TrackData', ['author', 'album', 'track'])
 TaskInfo = namedtuple('TaskInfo', ['id', 'status', 'result'])
 
 
+def _get_lock_id(*parts):
+    """Get id of advisory lock (signed 64-bit int) by parts of its name"""
+    digest = hashlib.blake2b(
+        '\0'.join(parts).encode(), digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
 def check_zip_level_of_nesting_files(zip_file, level=1):
     """Check zip archive to nested files on level less or equal to given value.
     Skip empty folders of any nested level
@@ -33,7 +49,211 @@ def check_zip_level_of_nesting_files(zip_file, level=1):
                for info in zip_file.infolist())
 
 
-class AlbumUnpacker:
+class TrackImporter:
+    """Base class for importers of albums and tracks from archives.
+
+    Provides set-based lookup and creation of albums and tracks and
+    parsing of filenames of tracks. Filenames must have format:
+
+        'author - title' or 'title'
+
+    """
+    author_title_delimiter = ' - '
+    default_author = 'Unknown artist'
+    # number of tracks created with single query in bulk import
+    bulk_size = 500
+    # content of tracks is decoded from UTF-8 once on import, invalid bytes
+    # are replaced with U+FFFD instead of failing the whole archive
+    encoding = 'utf-8'
+    decode_errors = 'replace'
+
+    def __init__(self):
+        self.added_albums_count = 0
+        self.added_tracks_count = 0
+        self.skipped_tracks_count = 0
+
+    @property
+    def total_tracks(self):
+        """int: number of tracks to import, None if unknown"""
+        return None
+
+    @property
+    def counters(self):
+        """dict: numbers of added albums, added and skipped tracks"""
+        return {
+            'albums_added': self.added_albums_count,
+            'tracks_added': self.added_tracks_count,
+            'skipped': self.skipped_tracks_count,
+        }
+
+    def _bulk_get_or_create_albums(self, keys):
+        """Get albums by (author, title), create missing ones at once.
+
+        Returns:
+            dict: albums by (author, title).
+
+        """
+        if not keys:
+            return {}
+        albums = self._filter_by_author_and_title(Album.objects.all(), keys)
+        albums = {(album.author, album.title): album for album in albums}
+
+        missing = [
+            Album(author=author, title=title)
+            for author, title in keys if (author, title) not in albums
+        ]
+        try:
+            with transaction.atomic():
+                created = Album.objects.bulk_create(missing)
+        except IntegrityError:
+            # some albums are created by concurrent import
+            created = []
+            for album in missing:
+                album, is_created = Album.objects.get_or_create(
+                    author=album.author,
+                    title=album.title,
+                )
+                if is_created:
+                    created.append(album)
+                else:
+                    albums[album.author, album.title] = album
+        self.added_albums_count += len(created)
+        albums.update(
+            ((album.author, album.title), album) for album in created
+        )
+        return albums
+
+    def _get_existing_tracks(self, keys):
+        """Get (author, title) of tracks which exist already"""
+        if not keys:
+            return set()
+        tracks = self._filter_by_author_and_title(
+            Track.objects.all(), keys,
+        ).values_list('author', 'title')
+        return set(tracks) & keys
+
+    @staticmethod
+    def _lock_tracks(keys, hashes):
+        """Lock (author, title) and content hashes of tracks until commit.
+
+        Tracks have no unique constraints (tracks with the same content
+        are allowed), so imports running in parallel (chunks of archive or
+        different archives) take transaction level advisory locks of the
+        tracks they create. Import waits for the concurrent one creating
+        the same tracks and sees its tracks when checking existing ones.
+        Locks are taken in order of their ids, so imports don't deadlock.
+
+        Args:
+            keys (iterable): (author, title) of tracks.
+            hashes (iterable): content hashes of tracks.
+
+        """
+        lock_ids = {_get_lock_id('track', *key) for key in keys}
+        lock_ids.update(
+            _get_lock_id('content', content_hash) for content_hash in hashes
+        )
+        if not lock_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(pg_advisory_xact_lock(lock_id)) FROM ('
+                '  SELECT unnest(%s::bigint[]) AS lock_id ORDER BY lock_id'
+                ') AS lock_ids',
+                [sorted(lock_ids)],
+            )
+
+    def _create_tracks(self, tracks):
+        """Create tracks skipping existing ones and duplicates of content.
+
+        Tracks are checked and created in transaction holding their locks
+        (see ``_lock_tracks``), so concurrent imports don't create the
+        same tracks.
+
+        Args:
+            tracks (list): not saved tracks with content.
+
+        """
+        keys = {(track.author, track.title) for track in tracks}
+        hashes = [track.content_hash for track in tracks]
+        with transaction.atomic():
+            self._lock_tracks(keys, hashes)
+            existing = self._get_existing_tracks(keys)
+            seen_hashes = self._get_existing_hashes(hashes)
+
+            unique_tracks = []
+            for track in tracks:
+                key = (track.author, track.title)
+                # content may be imported already under another name
+                if key in existing or track.content_hash in seen_hashes:
+                    self.skipped_tracks_count += 1
+                    continue
+                existing.add(key)
+                seen_hashes.add(track.content_hash)
+                unique_tracks.append(track)
+
+            created = Track.objects.bulk_create(unique_tracks)
+        self.added_tracks_count += len(created)
+
+    def _decode_content(self, content):
+        """Decode content of track file to text"""
+        return content.decode(self.encoding, errors=self.decode_errors)
+
+    @staticmethod
+    def _get_existing_hashes(hashes):
+        """Get content hashes of tracks which exist already"""
+        return set(
+            Track.objects.filter(content_hash__in=set(hashes))
+            .values_list('content_hash', flat=True)
+        )
+
+    @staticmethod
+    def _filter_by_author_and_title(queryset, keys):
+        """Filter queryset to objects probably matching (author, title).
+
+        Result must be checked for exact (author, title) pairs.
+
+        """
+        authors, titles = zip(*keys)
+        return queryset.filter(author__in=set(authors), title__in=set(titles))
+
+    def _get_audio_data(self, audio_name):
+        """Get author and title values.
+
+        Args:
+            audio_name (str): Album or Track description in following format:
+                'author_name - title' or 'title'
+
+        Returns:
+            (tuple): author(str) and title(str) if audio_name contain both
+                or self.default_author(str) and title(str)
+                if audio_name contain only title
+
+        """
+        if audio_name.count(self.author_title_delimiter):
+            author, title = audio_name.split(self.author_title_delimiter)
+            return author, title
+        return self.default_author, audio_name
+
+    def _get_track_info(self, filename):
+        """Get author, album title and track title from filename.
+
+        Args:
+            filename (str): filename of track in zip archive.
+
+        """
+        # track file in album directory
+        if filename.count('/') == 1:
+            album, track = filename.split('/')
+            album_author, album_title = self._get_audio_data(album)
+            _, track_title = self._get_audio_data(track)
+            return TrackData(album_author, album_title, track_title)
+        # track without album
+        track_author, track_title = self._get_audio_data(filename)
+
+        return TrackData(track_author, None, track_title)
+
+
+class AlbumUnpacker(TrackImporter):
     """Class for uploading albums and tracks.
 
     Provide handlers to get albums and tracks from uploaded files,
@@ -51,23 +271,25 @@ class AlbumUnpacker:
     Empty folders ignored.
 
     """
-    author_title_delimiter = ' - '
-    default_author = 'Unknown artist'
     # check required structure
     nested_check = partial(check_zip_level_of_nesting_files, level=1)
 
     def __init__(self, archive):
         """
         Args:
-            archive (ZipFile): ZIP archive file with albums and tracks.
+            archive (file|ZipReader): ZIP archive file with albums and
+                tracks or its reader.
         """
-        if not zipfile.is_zipfile(archive):
+        super().__init__()
+        if isinstance(archive, ZipReader):
+            self.zip_file = archive.zip_file
+        elif zipfile.is_zipfile(archive):
+            self.zip_file = zipfile.ZipFile(archive)
+        else:
             raise TypeError(
                 f'{archive} is not a ZIP archive!'
             )
 
-        self.zip_file = zipfile.ZipFile(archive)
-
         if not self.nested_check(self.zip_file):
             raise NestedFolderError(
                 f'{self.zip_file.filename} has folders with files '
@@ -75,8 +297,10 @@ class AlbumUnpacker:
             )
 
         self.track_list = self._get_track_list()
-        self.added_albums_count = 0
-        self.added_tracks_count = 0
+
+    @property
+    def total_tracks(self):
+        return len(self.track_list)
 
     def track_handler(self, track_filename):
         """Handler to get a single track from zip file using its filename.
@@ -120,46 +344,113 @@ class AlbumUnpacker:
 
         return self.added_albums_count, self.added_tracks_count
 
-    def _get_track_list(self):
-        """Get list of tracks from zip file. Exclude empty folders."""
-        return [info.filename for info in self.zip_file.infolist() if
-                not info.is_dir()]
+    def bulk_import(self, track_list=None, progress=None):
+        """Import albums and tracks with set-based queries.
 
-    def _get_audio_data(self, audio_name):
-        """Get author and title values.
+        Archive's central directory is read first, then existing albums and
+        tracks are resolved with one query each and missing ones are created
+        with ``bulk_create`` in chunks of ``bulk_size``. Content of tracks is
+        read chunk by chunk, so only one chunk is kept in memory.
+
+        Tracks with the same content as existing or already imported tracks
+        are skipped. Each member is read once, its hash is computed from
+        the content read for the track. Tracks of chunk are created by
+        ``_create_tracks``, so chunks imported in parallel don't create the
+        same tracks.
 
         Args:
-            audio_name (str): Album or Track description in following format:
-                'author_name - title' or 'title'
+            track_list (list): filenames of tracks to import,
+                all tracks of archive by default.
+            progress (callable): called with number of processed tracks
+                after each chunk.
 
         Returns:
-            (tuple): author(str) and title(str) if audio_name contain both
-                or self.default_author(str) and title(str)
-                if audio_name contain only title
+            tuple: numbers of added albums and tracks.
 
         """
-        if audio_name.count(self.author_title_delimiter):
-            author, title = audio_name.split(self.author_title_delimiter)
-            return author, title
-        return self.default_author, audio_name
+        tracks = []
+        for filename in track_list or self.track_list:
+            track_data = self._get_track_info(filename)
+            if track_data.track:
+                tracks.append((filename, track_data))
+
+        albums = self._bulk_get_or_create_albums(
+            {(data.author, data.album) for _, data in tracks if data.album}
+        )
+        existing = self._get_existing_tracks(
+            {(data.author, data.track) for _, data in tracks}
+        )
+
+        new_tracks = []
+        for filename, track_data in tracks:
+            key = (track_data.author, track_data.track)
+            if key in existing:
+                self.skipped_tracks_count += 1
+                continue
+            # duplicates inside archive are skipped too
+            existing.add(key)
+            new_tracks.append((filename, track_data))
+
+        processed = len(tracks) - len(new_tracks)
+        if progress:
+            progress(processed)
+
+        new_tracks = iter(new_tracks)
+        while True:
+            chunk = list(islice(new_tracks, self.bulk_size))
+            if not chunk:
+                break
+            self._create_tracks([
+                self._build_track(
+                    filename,
+                    track_data,
+                    albums.get((track_data.author, track_data.album)),
+                )
+                for filename, track_data in chunk
+            ])
+            processed += len(chunk)
+            if progress:
+                progress(processed)
 
-    def _get_track_info(self, filename):
-        """Get author, album title and track title from filename.
+        return self.added_albums_count, self.added_tracks_count
+
+    def split_track_list(self, chunk_size):
+        """Split tracks of archive into chunks imported independently.
+
+        Chunks are split by number of tracks only, so archive of a single
+        author is imported by all workers too. Albums created by concurrent
+        chunks are deduplicated by unique author and title (see
+        ``_bulk_get_or_create_albums``).
 
         Args:
-            filename (str): filename of track in zip archive.
+            chunk_size (int): max number of tracks in chunk.
+
+        Returns:
+            list: lists of track filenames.
 
         """
-        # track file in album directory
-        if filename.count('/') == 1:
-            album, track = filename.split('/')
-            album_author, album_title = self._get_audio_data(album)
-            _, track_title = self._get_audio_data(track)
-            return TrackData(album_author, album_title, track_title)
-        # track without album
-        track_author, track_title = self._get_audio_data(filename)
+        return [
+            self.track_list[start:start + chunk_size]
+            for start in range(0, len(self.track_list), chunk_size)
+        ]
+
+    def _build_track(self, filename, track_data, album):
+        """Get not saved Track with content of the file"""
+        with self.zip_file.open(filename) as track_file:
+            content = self._decode_content(track_file.read())
+        track = Track(
+            author=track_data.author,
+            title=track_data.track,
+            album=album,
+            full_version=content,
+        )
+        track.fill_derived_fields()
+        return track
 
-        return TrackData(track_author, None, track_title)
+    def _get_track_list(self):
+        """Get list of tracks from zip file. Exclude empty folders."""
+        return [info.filename for info in self.zip_file.infolist() if
+                not info.is_dir()]
 
     def _add_track(self, track_file, track_data):
         """Create Track from file if it does not exist.
@@ -184,7 +475,7 @@ class AlbumUnpacker:
         # check duplicates of track
         if not Track.objects.filter(author=track_data.author,
                                     title=track_data.track).exists():
-            content = track_file.read()
+            content = self._decode_content(track_file.read())
             Track.objects.create(
                 author=track_data.author,
                 title=track_data.track,
@@ -194,6 +485,223 @@ class AlbumUnpacker:
             self.added_tracks_count += 1
 
 
+class StreamingImporter(TrackImporter):
+    """Single pass importer of albums and tracks from archive reader.
+
+    Used for archives which can't be seeked, like compressed tarballs.
+    Members are processed in order they are stored in archive and tracks
+    are created in batches of ``bulk_size`` tracks or ``bulk_bytes`` bytes
+    of content, so memory used doesn't depend on size of archive.
+    Batches are committed as they go, so tracks created in a batch are
+    seen as existing by the next ones.
+
+    Members are expected in the same structure as in ZIP archives for
+    ``AlbumUnpacker``, but as structure can't be checked in advance,
+    members in nested folders are skipped.
+
+    """
+    # max size (in bytes) of content of tracks in one batch
+    bulk_bytes = 64 * 2 ** 20
+
+    def __init__(self, reader):
+        """
+        Args:
+            reader (ArchiveReader): reader of archive.
+        """
+        super().__init__()
+        self.reader = reader
+
+    def stream_import(self, progress=None):
+        """Import albums and tracks from members of archive.
+
+        Args:
+            progress (callable): called with number of processed tracks
+                after each batch.
+
+        Returns:
+            tuple: numbers of added albums and tracks.
+
+        """
+        processed = 0
+        batch = []
+        batch_bytes = 0
+        for filename, member in self.reader:
+            track_data = self._get_track_info(filename)
+            if not track_data.track:
+                continue
+            if filename.count('/') > 1:
+                self.skipped_tracks_count += 1
+                continue
+
+            raw_content = member.read()
+            batch.append((track_data, self._decode_content(raw_content)))
+            batch_bytes += len(raw_content)
+            if len(batch) >= self.bulk_size or batch_bytes >= self.bulk_bytes:
+                self._import_batch(batch)
+                processed += len(batch)
+                batch = []
+                batch_bytes = 0
+                if progress:
+                    progress(processed)
+
+        if batch:
+            self._import_batch(batch)
+            processed += len(batch)
+            if progress:
+                progress(processed)
+
+        return self.added_albums_count, self.added_tracks_count
+
+    def _import_batch(self, batch):
+        """Create albums and tracks of batch skipping existing ones"""
+        albums = self._bulk_get_or_create_albums(
+            {(data.author, data.album) for data, _ in batch if data.album}
+        )
+        tracks = []
+        for track_data, content in batch:
+            track = Track(
+                author=track_data.author,
+                title=track_data.track,
+                album=albums.get((track_data.author, track_data.album)),
+                full_version=content,
+            )
+            track.fill_derived_fields()
+            tracks.append(track)
+        self._create_tracks(tracks)
+
+
+class ImportProgress:
+    """Throttled reporter of archive import progress.
+
+    Progress is reported to Celery result backend and published to
+    watchers of the task only when ``interval`` seconds passed or ``step``
+    percents of tracks were processed since the last report.
+
+    """
+
+    def __init__(self, task, unpacker, state, interval=None, step=None):
+        """
+        Args:
+            task (Task): celery task importing archive.
+            unpacker (TrackImporter): importer of archive.
+            state (str): state of task reported with progress.
+            interval (float): min time (in seconds) between reports.
+            step (float): min progress (in percents) between reports.
+        """
+        self.task = task
+        self.unpacker = unpacker
+        self.state = state
+        self.total = unpacker.total_tracks
+        self.interval = interval or settings.ALBUM_IMPORT_PROGRESS_INTERVAL
+        self.step = step or settings.ALBUM_IMPORT_PROGRESS_STEP
+        self.reported_at = None
+        self.reported_percent = 0
+
+    def __call__(self, processed):
+        """Report progress if it's time to do it.
+
+        Args:
+            processed (int): number of processed tracks.
+
+        """
+        now = time.monotonic()
+        # without known total progress is reported by time only
+        percent = 100 * processed / self.total if self.total else 0
+        if (self.reported_at is not None and
+                now - self.reported_at < self.interval and
+                percent - self.reported_percent < self.step):
+            return
+
+        self.report(self.get_meta(processed))
+        self.reported_at = now
+        self.reported_percent = percent
+
+    def report(self, meta):
+        """Report progress to result backend and watchers of task"""
+        self.task.update_state(state=self.state, meta=meta)
+        publish_progress(self.task.request.id, self.state, meta)
+
+    def get_meta(self, processed):
+        """Get structured progress data"""
+        return {
+            'processed': processed,
+            'total': self.total,
+            **self.unpacker.counters,
+        }
+
+
+class ChunkImportProgress(ImportProgress):
+    """Reporter of progress of chunk of archive imported in parallel.
+
+    Counters of chunks are summed up in Redis (see
+    ``progress.add_counters``) and progress of the whole archive is
+    reported as progress of task importing it.
+
+    """
+
+    def __init__(self, task, unpacker, state, task_id, **kwargs):
+        """
+        Args:
+            task (Task): celery task importing chunk.
+            unpacker (AlbumUnpacker): importer of chunk.
+            state (str): state of task reported with progress.
+            task_id (str): id of task importing the whole archive.
+            kwargs: ``interval`` and ``step`` of reports.
+        """
+        super().__init__(task, unpacker, state, **kwargs)
+        self.task_id = task_id
+        # counters of chunk added to totals and totals of all chunks
+        self.added = {}
+        self.totals = {}
+
+    def __call__(self, processed):
+        counters = {'processed': processed, **self.unpacker.counters}
+        totals = add_counters(self.task_id, {
+            name: value - self.added.get(name, 0)
+            for name, value in counters.items()
+        })
+        # not added counters are added with the next call
+        if totals is None:
+            return
+        self.added = counters
+        self.totals = totals
+        super().__call__(totals['processed'])
+
+    def get_meta(self, processed):
+        return {'total': self.total, **self.totals}
+
+    def report(self, meta):
+        self.task.update_state(task_id=self.task_id, state=self.state,
+                               meta=meta)
+        publish_progress(self.task_id, self.state, meta)
+
+
+def iter_album_files(album):
+    """Get files of album tracks named like in imported archives.
+
+    Names are like 'Author - Album/Track', so downloaded album may be
+    imported back. Tracks are loaded with their content one by one.
+
+    Args:
+        album (Album): album to get tracks of.
+
+    Yields:
+        tuple: name, modification time and content (bytes) of track file.
+
+    """
+    tracks = album.tracks.select_related('track_content').order_by('title')
+    names = set()
+    for track in tracks.iterator():
+        name = f'{album.author} - {album.title}/{track.title}'
+        copy_number = 1
+        while name in names:
+            copy_number += 1
+            name = f'{album.author} - {album.title}/{track.title} ' \
+                f'({copy_number})'
+        names.add(name)
+        yield name, track.modified, track.full_version.encode()
+
+
 def get_celery_task_status_info(task_id):
     """Return celery task status information as a dict"""
     task_data = app.AsyncResult(task_id)
@@ -202,6 +710,6 @@ def get_celery_task_status_info(task_id):
 
     # if task returned exception, result = error_message
     if isinstance(task_info.result, Exception):
-        task_info.result = str(task_info.result)
+        task_info = task_info._replace(result=str(task_info.result))
 
     return task_info
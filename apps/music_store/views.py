@@ -1,16 +1,36 @@
 import uuid
+from functools import partial
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
-from django.http import JsonResponse, HttpResponseNotFound
-from django.shortcuts import redirect
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.http import HttpResponseNotFound, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.views import View
 from django.views.generic import FormView, TemplateView
 
-from apps.music_store.forms import AlbumUploadArchiveForm
-from .tasks import get_tracks_from_zip
+from celery import chain, states
+
+from apps.music_store.forms import AlbumUploadArchiveForm, ArchiveUploadForm
+from . import progress
+from .models import ArchiveUpload
+from .tasks import assemble_archive_upload, get_tracks_from_zip
 from .utils import get_celery_task_status_info
 
 
+def start_import(signature, task_id):
+    """Start import task with the given id.
+
+    PENDING state is published before task is started, so it never
+    overwrites progress published by worker.
+
+    """
+    progress.publish(task_id, states.PENDING, None)
+    return signature.apply_async(task_id=task_id)
+
+
 class AlbumUploadArchiveView(FormView):
     """View for uploading archive with albums, which consist from tracks."""
     form_class = AlbumUploadArchiveForm
@@ -28,7 +48,8 @@ class AlbumUploadArchiveView(FormView):
         )
 
         # save task_id in session
-        id = get_tracks_from_zip.delay(filepath).task_id
+        id = str(uuid.uuid4())
+        start_import(get_tracks_from_zip.s(filepath), id)
 
         return redirect(
             'admin:album_upload_status',
@@ -42,6 +63,101 @@ class AlbumUploadArchiveView(FormView):
         return context
 
 
+class ArchiveUploadView(View):
+    """View to start chunked upload of archive or get its state.
+
+    Protocol of resumable upload:
+
+        POST upload_archive/chunked/ (filename, size) - start upload,
+            returns upload id and chunk size
+        GET upload_archive/chunked/<id>/ - get indexes of received chunks
+            to resume upload
+        PUT upload_archive/chunked/<id>/<index> - upload chunk, SHA-256 of
+            chunk is sent in `X-Chunk-Checksum` header
+        POST upload_archive/chunked/<id>/complete - assemble archive and
+            start import, returns url of import status page
+
+    """
+
+    def post(self, request, *args, **kwargs):
+        """Start new upload session"""
+        form = ArchiveUploadForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+
+        upload = form.save(commit=False)
+        upload.user = request.user
+        upload.chunk_size = settings.ARCHIVE_UPLOAD_CHUNK_SIZE
+        upload.save()
+        return JsonResponse(upload.get_info(), status=201)
+
+    def get(self, request, *args, **kwargs):
+        """Get state of upload session"""
+        upload = get_object_or_404(
+            ArchiveUpload, id=kwargs['upload_id'], user=request.user,
+        )
+        return JsonResponse(upload.get_info())
+
+
+class ArchiveUploadChunkView(View):
+    """View to upload a single chunk of archive in request body."""
+
+    def put(self, request, *args, **kwargs):
+        upload = get_object_or_404(
+            ArchiveUpload, id=kwargs['upload_id'], user=request.user,
+        )
+        checksum = request.META.get('HTTP_X_CHUNK_CHECKSUM', '')
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({'errors': ['Invalid Content-Length']},
+                                status=400)
+        try:
+            upload.save_chunk(int(kwargs['index']), request, checksum,
+                              length=length)
+        except ValidationError as e:
+            return JsonResponse({'errors': e.messages}, status=400)
+        return JsonResponse(upload.get_info())
+
+
+class ArchiveUploadCompleteView(View):
+    """View to assemble uploaded archive and start its import."""
+
+    def post(self, request, *args, **kwargs):
+        with transaction.atomic():
+            # row is locked, so concurrent requests don't start import twice
+            upload = get_object_or_404(
+                ArchiveUpload.objects.select_for_update(),
+                id=kwargs['upload_id'],
+                user=request.user,
+            )
+            # import is started once, even if request is repeated
+            if not upload.task_id:
+                if not upload.is_complete:
+                    return JsonResponse(
+                        {'errors': ['Not all chunks are uploaded']},
+                        status=400,
+                    )
+                upload.task_id = str(uuid.uuid4())
+                upload.save(update_fields=['task_id', 'modified'])
+                transaction.on_commit(partial(
+                    start_import,
+                    chain(
+                        assemble_archive_upload.si(str(upload.id)),
+                        get_tracks_from_zip.s(),
+                    ),
+                    upload.task_id,
+                ))
+
+        return JsonResponse({
+            'task_id': upload.task_id,
+            'status_url': reverse(
+                'admin:album_upload_status',
+                kwargs={'task_id': upload.task_id},
+            ),
+        })
+
+
 class TaskStatusView(View):
     """View for tracking status of uploading tasks."""
 
@@ -53,6 +169,24 @@ class TaskStatusView(View):
         return JsonResponse(task_data._asdict())
 
 
+class TaskProgressView(View):
+    """Latest status of the celery task published by workers.
+
+    Status is read from Redis at once, so web workers are never held and
+    result backend isn't queried, client polls the view every few seconds.
+    Unknown tasks (like expired ones) aren't found, their status is got
+    from ``TaskStatusView``.
+
+    """
+
+    def get(self, request, *args, **kwargs):
+        task_data = progress.get_state(self.kwargs.get('task_id'))
+        if task_data is None:
+            return JsonResponse({'errors': ['Task is not found']},
+                                status=404)
+        return JsonResponse(task_data)
+
+
 class AlbumUploadStatusView(TemplateView):
     template_name = 'music_store/album/upload_archive_status.html'
 
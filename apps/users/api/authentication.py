@@ -0,0 +1,33 @@
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from ..caches import token_cache, user_cache
+from ..models import AppUser
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication reading tokens and users from object cache.
+
+    Authenticated requests don't query DB while token and its user are
+    cached. Token is invalidated when it's deleted (like on logout) and
+    user is invalidated when it's saved.
+
+    """
+
+    def authenticate_credentials(self, key):
+        try:
+            token = token_cache.get(key)
+            user = user_cache.get(token.user_id)
+        except (Token.DoesNotExist, AppUser.DoesNotExist):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        token.user = user
+        return user, token
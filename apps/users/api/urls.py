@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     CheckUsernameView,
-    LookupUserOptionsView,
+    LookupUsernamesView,
     UserGeoLocationAPIView,
     UsersViewSet,
     UserUploadAvatarAPIView,
@@ -20,5 +20,5 @@ urlpatterns += [
     url(r'^user/location/$', UserGeoLocationAPIView.as_view()),
     url(r'^user/avatar/$', UserUploadAvatarAPIView.as_view()),
     url(r'^check/(?P<username>.*)/$', CheckUsernameView.as_view()),
-    url(r'^lookup/users/$', LookupUserOptionsView.as_view()),
+    url(r'^lookup/users/$', LookupUsernamesView.as_view()),
 ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.http import Http404
 
@@ -12,11 +13,13 @@ from allauth.socialaccount.providers.facebook.views import (
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from rest_auth.registration.views import SocialLoginView
 
+from libs.api.pagination import OrderByModifiedCursorPagination
 from libs.api.serializers.serializers import (
     LocationSerializer,
     UploadSerializer,
 )
 
+from ..caches import username_filter
 from .serializers import auth
 
 AppUser = get_user_model()
@@ -81,14 +84,20 @@ class UserGeoLocationAPIView(APIView):
 class CheckUsernameView(APIView):
     """
     Used to check availability of username
+
+    Username missing in bloom filter is available for sure, so DB is
+    queried only for used usernames and false positives of filter. Lookup
+    ``iexact`` uses index on upper-cased email (see migrations).
     """
 
     def get(self, request, username):
-        UserModel = get_user_model()
+        if (settings.USERNAME_BLOOM_FILTER_ENABLED
+                and not username_filter.might_contain(username)):
+            raise Http404
         params = {
-            '{0}__iexact'.format(UserModel.USERNAME_FIELD): username
+            '{0}__iexact'.format(AppUser.USERNAME_FIELD): username
         }
-        qs = get_user_model().objects.filter(**params)
+        qs = AppUser.objects.filter(**params)
         if not qs.exists():
             raise Http404
         return Response(status=status.HTTP_200_OK)
@@ -103,18 +112,47 @@ class UsersViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
 
-class LookupUserOptionsView(APIView):
+class UsernameCursorPagination(OrderByModifiedCursorPagination):
+    """Cursor pagination of usernames got with ``values_list``.
+
+    Pages are selected by username greater than the last one, so neither
+    offset nor count of all users is computed.
+
     """
-    Lookup class for getting list of available users
+    ordering = 'username'
+    page_size = 20
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        """Get requested page size limited to 1..``max_page_size``"""
+        page_size = super().get_page_size(request)
+        return min(max(page_size, 1), self.max_page_size)
+
+    def _get_position_from_instance(self, instance, ordering):
+        # instances are usernames
+        return instance
+
+
+class LookupUsernamesView(generics.GenericAPIView):
+    """
+    Lookup of usernames starting with ``q`` (case insensitive).
+
+    Prefix search uses index on upper-cased username (see migrations).
     """
 
     permission_classes = (IsAuthenticated,)
+    pagination_class = UsernameCursorPagination
+
+    def get_queryset(self):
+        queryset = AppUser.objects.values_list('username', flat=True)
+        query = self.request.query_params.get('q')
+        if query:
+            queryset = queryset.filter(username__istartswith=query)
+        return queryset
 
     def get(self, request, format=None):
         """
-        Return a list of all users.
+        Return a page of matching usernames.
         """
-        usernames = {
-            user.username: user.username.title()
-            for user in AppUser.objects.all()}
-        return Response(usernames)
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(page)
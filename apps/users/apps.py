@@ -7,3 +7,7 @@ class UsersAppDefaultConfig(AppConfig):
 
     name = 'apps.users'
     verbose_name = 'Users'
+
+    def ready(self):
+        # connect invalidation of cached tokens and users
+        from . import caches  # noqa
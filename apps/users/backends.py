@@ -0,0 +1,40 @@
+"""Authentication backends loading users of sessions without heavy fields.
+
+Backends differ from their parents only by ``get_user``, which is called
+on each request authenticated by session. Sessions created with parents
+are switched to these backends by ``SessionBackendMiddleware``.
+
+"""
+from django.contrib.auth import backends
+
+from allauth.account import auth_backends
+
+from .models import AppUser
+
+# paths of replaced backends stored in sessions and their replacements
+OLD_BACKENDS = {
+    'django.contrib.auth.backends.ModelBackend':
+        'apps.users.backends.ModelBackend',
+    'allauth.account.auth_backends.AuthenticationBackend':
+        'apps.users.backends.AuthenticationBackend',
+}
+
+
+class SlimUserMixin:
+    """Mixin loading user of session with ``AppUserQuerySet.slim``."""
+
+    def get_user(self, user_id):
+        try:
+            user = AppUser.objects.slim().get(pk=user_id)
+        except AppUser.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class ModelBackend(SlimUserMixin, backends.ModelBackend):
+    """Backend to log in by username (like in Django admin)."""
+
+
+class AuthenticationBackend(SlimUserMixin,
+                            auth_backends.AuthenticationBackend):
+    """Backend of ``allauth`` to log in by email."""
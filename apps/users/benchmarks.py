@@ -0,0 +1,66 @@
+"""Benchmarks of users, run with ``benchmark`` management command."""
+import gc
+import time
+import tracemalloc
+
+from django.contrib.gis.geos import Point
+
+from libs.benchmarks import register
+
+from .models import AppUser
+
+
+def _measure_loads(queryset, pk, size):
+    """Load user ``size`` times and measure CPU time and kept memory.
+
+    Loaded users are kept until all of them are loaded, so memory taken
+    by one instance is measured.
+
+    """
+    gc.collect()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    start = time.process_time()
+    users = [queryset.get(pk=pk) for _ in range(size)]
+    cpu_time = time.process_time() - start
+    memory = tracemalloc.get_traced_memory()[0] - memory_before
+    del users
+    return cpu_time, memory
+
+
+@register('user_load', default_size=2000)
+def user_load(size):
+    """Load of user of authenticated request, full row vs slim projection.
+
+    User with location and notifications is loaded ``size`` times like
+    by authentication backend. CPU time includes DB round trips, so it's
+    affected by speed of DB as well.
+
+    """
+    user = AppUser.objects.create(
+        username='benchmark',
+        email='benchmark@example.com',
+        location=Point(30.3, 59.9),
+        notifications={f'event_{number}': 'true' for number in range(20)},
+    )
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        full_time, full_memory = _measure_loads(
+            AppUser.objects.all(), user.pk, size,
+        )
+        slim_time, slim_memory = _measure_loads(
+            AppUser.objects.slim(), user.pk, size,
+        )
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return {
+        'full_cpu_us_per_request': full_time / size * 10 ** 6,
+        'slim_cpu_us_per_request': slim_time / size * 10 ** 6,
+        'full_bytes_per_user': full_memory / size,
+        'slim_bytes_per_user': slim_memory / size,
+        'cpu_saved_percent': (1 - slim_time / full_time) * 100,
+    }
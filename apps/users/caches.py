@@ -0,0 +1,65 @@
+"""Caches of tokens and users of authenticated requests and bloom filter
+of usernames.
+
+Caches are created on start of application (see ``apps.py``), so tokens
+deleted on logout and changed users are invalidated in all processes.
+Usernames of registered users are added to the filter after commit of
+``post_save``.
+
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from libs.bloom import BloomFilter
+from libs.object_cache import ObjectCache
+
+from .models import AppUser
+
+token_cache = ObjectCache(Token, timeout=settings.AUTH_CACHE_TIMEOUT)
+# heavy fields (geometry, HStore, image) are loaded on access
+user_cache = ObjectCache(
+    AppUser,
+    timeout=settings.AUTH_CACHE_TIMEOUT,
+    queryset=AppUser.objects.slim(),
+)
+
+# emails are compared like with ``iexact`` lookup (upper-cased)
+username_filter = BloomFilter(
+    'bloom:users:username',
+    capacity=settings.USERNAME_BLOOM_FILTER_CAPACITY,
+    error_rate=settings.USERNAME_BLOOM_FILTER_ERROR_RATE,
+    normalize=str.upper,
+)
+
+
+def rebuild_username_filter():
+    """Rebuild filter of usernames of all users.
+
+    Usernames of users registered or changed while filter is built are
+    added to the new filter by ``add_username_to_filter``.
+
+    """
+    username_filter.rebuild(
+        AppUser.objects.values_list(
+            AppUser.USERNAME_FIELD, flat=True,
+        ).iterator()
+    )
+
+
+@receiver(post_save, sender=AppUser, dispatch_uid='username_filter_add')
+def add_username_to_filter(sender, instance, using, **kwargs):
+    """Add username of registered (or changed) user to filter.
+
+    Username is added after commit, so filter rebuilt concurrently gets
+    it even if user isn't committed yet when usernames are read, and
+    usernames of rolled back users aren't added.
+
+    """
+    if settings.USERNAME_BLOOM_FILTER_ENABLED:
+        username = instance.get_username()
+        transaction.on_commit(lambda: username_filter.add(username),
+                              using=using)
@@ -0,0 +1,19 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+
+from .backends import OLD_BACKENDS
+
+
+class SessionBackendMiddleware(object):
+    """Switch sessions of replaced backends to their slim replacements.
+
+    Session is valid only if its backend is listed in
+    ``AUTHENTICATION_BACKENDS``, so backend stored in session is replaced
+    before user is loaded by ``AuthenticationMiddleware``. Session is saved
+    with the new backend, so it's replaced once.
+
+    """
+
+    def process_request(self, request):
+        backend = request.session.get(BACKEND_SESSION_KEY)
+        if backend in OLD_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = OLD_BACKENDS[backend]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import apps.users.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_appuser_balance'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='appuser',
+            managers=[
+                ('objects', apps.users.models.AppUserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index for case insensitive prefix search of usernames.
+
+    ``username__istartswith`` is compiled to
+    ``UPPER(username::text) LIKE UPPER('prefix%')``, unique index of
+    username can't be used by it. Index is built concurrently, so users
+    aren't locked while it's built.
+
+    """
+    atomic = False
+
+    dependencies = [
+        ('users', '0004_appuser_managers'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+            'users_appuser_username_upper_like '
+            'ON users_appuser (UPPER(username::text) text_pattern_ops);',
+            'DROP INDEX CONCURRENTLY IF EXISTS '
+            'users_appuser_username_upper_like;',
+        ),
+    ]
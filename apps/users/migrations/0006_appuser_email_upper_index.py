@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index for case insensitive search of emails.
+
+    ``email__iexact`` is compiled to ``UPPER(email::text) = UPPER(...)``,
+    unique index of email can't be used by it. Index is built
+    concurrently, so users aren't locked while it's built.
+
+    """
+    atomic = False
+
+    dependencies = [
+        ('users', '0005_appuser_username_prefix_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+            'users_appuser_email_upper '
+            'ON users_appuser (UPPER(email::text));',
+            'DROP INDEX CONCURRENTLY IF EXISTS users_appuser_email_upper;',
+        ),
+    ]
@@ -1,7 +1,8 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.contrib.gis.db import models as gis_models
 from django.contrib.postgres.fields import HStoreField
 from django.db import models
+from django.db.models.query import QuerySet
 from django.utils.translation import ugettext_lazy as _
 
 from imagekit import models as imagekitmodels
@@ -31,6 +32,24 @@ def upload_user_media_to(instance, filename):
     )
 
 
+class AppUserQuerySet(QuerySet):
+    """QuerySet of users."""
+
+    def slim(self):
+        """Load users without heavy fields.
+
+        Location is parsed into GEOS point and notifications into dict on
+        load, but most of requests need only id, email, balance and
+        flags of user. Deferred fields are loaded on access.
+
+        """
+        return self.defer(*AppUser.HEAVY_FIELDS)
+
+
+class AppUserManager(UserManager.from_queryset(AppUserQuerySet)):
+    """Manager of users with methods of ``AppUserQuerySet``."""
+
+
 class AppUser(AbstractUser):
     """Custom user model.
 
@@ -90,6 +109,11 @@ class AppUser(AbstractUser):
     # is done by email
     REQUIRED_FIELDS = ['username']
 
+    # fields deferred by ``AppUserQuerySet.slim``
+    HEAVY_FIELDS = ('avatar', 'location', 'location_updated', 'notifications')
+
+    objects = AppUserManager()
+
     class Meta:
         verbose_name = _('User')
         verbose_name_plural = _('Users')
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from . import caches
+
+
+@shared_task
+def rebuild_username_filter():
+    """Rebuild bloom filter of usernames to drop deleted and changed ones"""
+    caches.rebuild_username_filter()
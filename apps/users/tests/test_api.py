@@ -1,6 +1,7 @@
 import tempfile
 import unittest
 from operator import methodcaller
+from unittest.mock import patch
 
 from django.test import override_settings
 
@@ -16,11 +17,16 @@ from faker import Faker
 
 from PIL import Image
 
+from libs.testing.utils import run_on_commit_callbacks
+
 from ..api.views import (
     CheckUsernameView,
+    LookupUsernamesView,
     UserGeoLocationAPIView,
     UserUploadAvatarAPIView,
+    UsernameCursorPagination,
 )
+from ..caches import rebuild_username_filter, username_filter
 from ..factories import UserFactory
 
 fake = Faker()
@@ -204,3 +210,87 @@ class TestAPIUser(APITestCase):
         response = self.client.post(url, data, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class TestLookupUsernames(APITestCase):
+    """Tests for prefix search of usernames"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = UserFactory(username='zed')
+        for username in ('alice', 'Alan', 'albert', 'bob'):
+            UserFactory(username=username)
+
+    def _lookup(self, **params):
+        request = self.factory.get('/api/v1/auth/lookup/users/', params)
+        force_authenticate(request, user=self.user)
+        return LookupUsernamesView.as_view()(request)
+
+    def test_usernames_are_found_by_prefix(self):
+        response = self._lookup(q='al')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'],
+                         ['Alan', 'albert', 'alice'])
+
+    def test_usernames_are_paginated(self):
+        response = self._lookup(q='al', pageSize=2)
+        self.assertEqual(response.data['results'], ['Alan', 'albert'])
+
+        response = self._lookup(q='al', pageSize=2,
+                                cursor=response.data['next'])
+        self.assertEqual(response.data['results'], ['alice'])
+        self.assertIsNone(response.data['next'])
+
+    def test_page_size_is_limited(self):
+        response = self._lookup(q='al', pageSize=-1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], ['Alan'])
+
+        with patch.object(UsernameCursorPagination, 'max_page_size', 2):
+            response = self._lookup(q='al', pageSize=10 ** 9)
+        self.assertEqual(response.data['results'], ['Alan', 'albert'])
+
+    def test_lookup_requires_authentication(self):
+        request = self.factory.get('/api/v1/auth/lookup/users/', {'q': 'a'})
+        response = LookupUsernamesView.as_view()(request)
+
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED,
+                                             status.HTTP_403_FORBIDDEN))
+
+
+@override_settings(USERNAME_BLOOM_FILTER_ENABLED=True)
+class TestCheckUsername(APITestCase):
+    """Tests for check of username with bloom filter"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = UserFactory()
+        rebuild_username_filter()
+        self.addCleanup(username_filter.clear)
+
+    def _check(self, username):
+        request = self.factory.get(f'/api/v1/auth/check/{username}/')
+        return CheckUsernameView.as_view()(request, username=username)
+
+    def test_available_username_is_checked_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self._check(fake.email())
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_used_username_is_found(self):
+        response = self._check(self.user.email.upper())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_registered_username_is_added_to_filter(self):
+        with run_on_commit_callbacks():
+            user = UserFactory()
+        response = self._check(user.email)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_username_is_added_to_filter_after_commit(self):
+        with run_on_commit_callbacks():
+            user = UserFactory()
+            # filter is checked within the transaction creating user
+            response = self._check(user.email)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,103 @@
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user,
+)
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from ..api.authentication import CachedTokenAuthentication
+from ..backends import ModelBackend
+from ..caches import token_cache, user_cache
+from ..factories import UserFactory
+from ..middleware import SessionBackendMiddleware
+
+
+@override_settings(OBJECT_CACHE_ENABLED=True)
+class TestCachedTokenAuthentication(TestCase):
+    """Tests for token authentication with cached tokens and users"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.token = Token.objects.create(user=self.user)
+        self.addCleanup(token_cache.invalidate, self.token.pk)
+        self.addCleanup(user_cache.invalidate, self.user.pk)
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self, key=None):
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Token {key or self.token.key}',
+        )
+        return self.authentication.authenticate(request)
+
+    def test_cached_token_is_authenticated_without_queries(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_heavy_fields_are_not_loaded(self):
+        user, token = self.authenticate()
+        self.assertTrue({'location', 'notifications', 'avatar'}
+                        <= user.get_deferred_fields())
+
+    def test_deleted_token_is_rejected(self):
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_unknown_token_is_rejected(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate('unknown')
+
+
+class TestSlimUserBackend(TestCase):
+    """Tests for backend loading user of session without heavy fields"""
+
+    def setUp(self):
+        self.user = UserFactory()
+
+    def test_user_is_loaded_without_heavy_fields(self):
+        user = ModelBackend().get_user(self.user.pk)
+        self.assertEqual(user, self.user)
+        self.assertTrue({'location', 'notifications', 'avatar'}
+                        <= user.get_deferred_fields())
+
+    def test_inactive_user_is_not_loaded(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(ModelBackend().get_user(self.user.pk))
+
+    def test_session_of_old_backend_is_resolved(self):
+        request = RequestFactory().get('/')
+        SessionMiddleware().process_request(request)
+        request.session[SESSION_KEY] = str(self.user.pk)
+        request.session[BACKEND_SESSION_KEY] = (
+            'django.contrib.auth.backends.ModelBackend'
+        )
+        request.session[HASH_SESSION_KEY] = (
+            self.user.get_session_auth_hash()
+        )
+        SessionBackendMiddleware().process_request(request)
+
+        user = get_user(request)
+        self.assertEqual(user, self.user)
+        self.assertTrue({'location', 'notifications', 'avatar'}
+                        <= user.get_deferred_fields())
+        self.assertEqual(request.session[BACKEND_SESSION_KEY],
+                         'apps.users.backends.ModelBackend')
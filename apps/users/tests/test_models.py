@@ -51,3 +51,16 @@ class TestUser(TestCase):
         user = AppUser.objects.filter(email=self.user.email)
 
         self.assertEqual(user.exists(), True)
+
+    def test_slim_user_loads_heavy_fields_on_access(self):
+        """Test for user loaded without heavy fields.
+
+        Deferred location is loaded by extra query.
+
+        """
+        user = AppUser.objects.slim().get(pk=self.user.pk)
+
+        self.assertEqual(user.get_deferred_fields(),
+                         set(AppUser.HEAVY_FIELDS))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.location, self.user.location)
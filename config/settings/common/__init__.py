@@ -31,6 +31,8 @@ from .cors import *
 from .allauth import *
 # Caching Framework (Cacheops)
 from .cacheops import *
+# Django cache backed by Redis
+from .caches import *
 
 
 # REST API settings
@@ -41,6 +43,10 @@ from .drf import *
 # Business Logic Custom Variables and Settings
 # -----------------------------------------------------------------------------
 from .business_logic import *
+# Kafka stream of domain events
+from .kafka import *
+# Celery broker and periodic tasks
+from .celery import *
 
 SITE_ID = 1
 ROOT_URLCONF = 'config.urls'
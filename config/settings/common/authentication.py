@@ -1,12 +1,15 @@
 # Custom model for Auth
 AUTH_USER_MODEL = 'users.AppUser'
 
+# Backends load users of sessions without heavy fields (location,
+# notifications, avatar), they're loaded on access. Sessions of replaced
+# backends are switched to them by SessionBackendMiddleware
 AUTHENTICATION_BACKENDS = (
     # Needed to login by username in Django admin, regardless of `allauth`
-    'django.contrib.auth.backends.ModelBackend',
+    'apps.users.backends.ModelBackend',
 
     # `allauth` specific authentication methods, such as login by e-mail
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'apps.users.backends.AuthenticationBackend',
 )
 
 
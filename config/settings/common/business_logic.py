@@ -1 +1,50 @@
 # This file holds settings specific to the project
+
+# Item-to-item recommendations ("listeners also played")
+# number of neighbours stored for each track
+SIMILAR_TRACKS_TOP_K = 20
+# weight of a 'like' relative to a single listen
+SIMILAR_TRACKS_LIKE_WEIGHT = 3.0
+# number of listens/likes loaded from DB at once
+SIMILAR_TRACKS_CHUNK_SIZE = 500000
+# number of tracks whose similarities are computed at once
+SIMILAR_TRACKS_BLOCK_SIZE = 1000
+
+# "Customers who bought this also bought"
+# number of user's latest purchases paired with a new one
+CO_PURCHASE_MAX_USER_ITEMS = 50
+# number of items returned for an album or track
+CO_PURCHASE_TOP_ITEMS = 10
+
+# number of bytes of track content sent at once by content endpoint
+TRACK_CONTENT_CHUNK_SIZE = 2 ** 16
+# zstd compression level of stored track content
+TRACK_CONTENT_COMPRESSION_LEVEL = 9
+# max size (in bytes) of zstd dictionary trained on track contents
+TRACK_CONTENT_DICTIONARY_SIZE = 110 * 2 ** 10
+
+# Number of tracks in user's "recently played" list
+RECENTLY_PLAYED_SIZE = 50
+# Time (in seconds) since the last listen after which the list of
+# inactive user expires in Redis, it's restored from DB on the next read
+RECENTLY_PLAYED_TIMEOUT = 60 * 60 * 24 * 7
+
+# Outbox of purchase side effects
+# number of events dispatched in one transaction
+OUTBOX_BATCH_SIZE = 500
+# max time (in seconds) of one run of outbox relay
+OUTBOX_RELAY_TIME_LIMIT = 10
+
+# Import of albums from archives
+# min time (in seconds) between reports of import progress
+ALBUM_IMPORT_PROGRESS_INTERVAL = 2
+# min progress (in percents) between reports of import progress
+ALBUM_IMPORT_PROGRESS_STEP = 5
+# max number of tracks imported by one worker, archives with more tracks
+# are imported by several workers in parallel
+ALBUM_IMPORT_CHUNK_SIZE = 2000
+# size (in bytes) of chunks of archives uploaded by admin uploader
+ARCHIVE_UPLOAD_CHUNK_SIZE = 8 * 2 ** 20
+# time (in seconds) after the last change when archive uploads with their
+# chunks and assembled archives are deleted (abandoned or imported ones)
+ARCHIVE_UPLOAD_EXPIRATION = 60 * 60 * 24 * 2
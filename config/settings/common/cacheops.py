@@ -1,4 +1,6 @@
 # Caching with cacheops
+from .testing import TESTING
+
 CACHEOPS_REDIS = {
     'host': 'redis',     # redis-server is on same machine
     'port': 6379,        # default redis port
@@ -8,11 +10,24 @@ CACHEOPS_REDIS = {
     'socket_timeout': 3  # connection timeout in seconds, optional
 }
 
+# cached querysets would outlive test DB and break counting of queries
+CACHEOPS_ENABLED = not TESTING
+
 CACHEOPS = {
-    # Automatically cache any User.objects.get() calls for 15 minutes
+    # Automatically cache any AppUser.objects.get() calls for 15 minutes
     # This includes request.user or post.author access,
-    # where Post.author is a foreign key to auth.User
-    'auth.user': {'ops': 'get', 'timeout': 60*15},
+    # where Post.author is a foreign key to users.AppUser
+    'users.appuser': {'ops': 'get', 'timeout': 60*15},
+
+    # Catalog: gets of tracks and albums, pages of lists and their counts
+    # (used by pagination). Invalidation is automatic on save and delete
+    # of objects, but not on QuerySet.update(), use invalidated_update()
+    'music_store.track': {'ops': ('get', 'fetch', 'count'), 'timeout': 60*15},
+    'music_store.album': {'ops': ('get', 'fetch', 'count'), 'timeout': 60*15},
+
+    # Payment methods are fetched filtered by owner, so each owner has its
+    # own cached querysets invalidated only by changes of the owner's methods
+    'music_store.paymentmethod': {'ops': ('get', 'fetch'), 'timeout': 60*15},
 
     # Automatically cache all gets and queryset fetches
     # to other django.contrib.auth models for an hour
@@ -30,3 +45,8 @@ CACHEOPS = {
     # And since ops is empty by default you can rewrite last line as:
     '*.*': {'timeout': 60*60},
 }
+
+# Record hits, misses and invalidations of cacheops (see libs.cache_stats),
+# dump them with `./manage.py cache_stats`. Each cache read is written to
+# Redis, so stats are enabled only while caching is profiled
+CACHE_STATS_ENABLED = False
@@ -0,0 +1,47 @@
+# Django cache framework backed by Redis (django-redis)
+# Raw connection is available with
+#   django_redis.get_redis_connection('default')
+from .testing import TESTING
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://redis:6379/2',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'SOCKET_TIMEOUT': 3,
+        },
+        'KEY_PREFIX': 'music_store',
+    }
+}
+
+# Two-tier cache of hot catalog objects (see libs.object_cache)
+# cached objects would outlive test DB, so tests of the cache enable it
+OBJECT_CACHE_ENABLED = not TESTING
+# time (in seconds) objects are fresh in Redis
+OBJECT_CACHE_TIMEOUT = 60 * 60
+# time (in seconds) expired objects are served while one request reloads
+# them (stale-while-revalidate)
+OBJECT_CACHE_STALE_TIMEOUT = 60
+# max time (in seconds) of loading object by the request holding its lock
+OBJECT_CACHE_LOCK_TIMEOUT = 5
+# max time (in seconds) requests wait for object loaded by another one
+OBJECT_CACHE_WAIT_TIMEOUT = 0.5
+# max number of objects of each model kept in memory of process
+OBJECT_CACHE_LOCAL_SIZE = 1000
+# time (in seconds) objects are kept in memory of process, it bounds
+# staleness when invalidation is missed
+OBJECT_CACHE_LOCAL_TIMEOUT = 5
+# time (in seconds) tokens and users of authenticated requests are fresh
+# in Redis, they're invalidated on logout and change of user
+AUTH_CACHE_TIMEOUT = 60 * 5
+
+# Bloom filter of usernames (emails) of users answering that username is
+# available without DB (see CheckUsernameView), it's rebuilt by
+# ``rebuild_username_filter`` task, filter isn't used in tests since it
+# would outlive test DB
+USERNAME_BLOOM_FILTER_ENABLED = not TESTING
+# expected number of users, filter of changed size is used after rebuild
+USERNAME_BLOOM_FILTER_CAPACITY = 10 ** 6
+# probability of username falsely reported as used (checked in DB then)
+USERNAME_BLOOM_FILTER_ERROR_RATE = 0.01
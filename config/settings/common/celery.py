@@ -1,2 +1,24 @@
+from celery.schedules import crontab
+
 CELERY_BROKER = 'amqp://guest@rabbitmq/'
 CELERY_BACKEND = 'redis://redis/'
+
+# Periodic tasks (run with `celery beat`)
+CELERY_BEAT_SCHEDULE = {
+    'relay-outbox': {
+        'task': 'apps.music_store.tasks.relay_outbox',
+        'schedule': 2.0,
+    },
+    'build-similar-tracks': {
+        'task': 'apps.music_store.tasks.build_similar_tracks',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'delete-expired-archive-uploads': {
+        'task': 'apps.music_store.tasks.delete_expired_archive_uploads',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'rebuild-username-filter': {
+        'task': 'apps.users.tasks.rebuild_username_filter',
+        'schedule': crontab(minute=30),
+    },
+}
@@ -4,7 +4,7 @@ REST_FRAMEWORK = {
         # SessionAuthentication is also used for CSRF
         # validation on ajax calls from the frontend
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.users.api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_MODEL_SERIALIZER_CLASS':
         'rest_framework.serializers.ModelSerializer',
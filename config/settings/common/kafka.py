@@ -1,6 +1,20 @@
-DATABASES = {
-    'default': {
-        'SERVERS': ['kafka:9092'],
-        'GROUP': 'music_store_exercise_backend'
-    }
+# Kafka stream of domain events (listens, likes, purchases)
+# See ``apps.music_store.events``
+from .testing import TESTING
+
+KAFKA = {
+    'SERVERS': ['kafka:9092'],
+    'GROUP': 'music_store_exercise_backend',
+    'EVENTS_TOPIC': 'music_store.events',
+    'BROKER': 'apps.music_store.events.KafkaBroker',
+    # max number of events sent to broker at once
+    'BATCH_SIZE': 100,
+    # max time (in seconds) event waits for its batch
+    'LINGER': 0.5,
+    # max number of events waiting to be sent, newer events are dropped
+    'QUEUE_SIZE': 10000,
 }
+
+if TESTING:
+    # in-process stand-in, so tests don't need running Kafka
+    KAFKA['BROKER'] = 'apps.music_store.events.InMemoryBroker'
@@ -113,4 +113,7 @@ CACHEOPS_REDIS = {
     'socket_timeout': 3     # connection timeout in seconds, optional
 }
 
+# Django cache
+CACHES['default']['LOCATION'] = 'redis://%REDIS_HOST%:6379/2'
+
 ACCOUNT_EMAIL_VERIFICATION = 'none'
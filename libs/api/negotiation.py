@@ -0,0 +1,19 @@
+from rest_framework.negotiation import BaseContentNegotiation
+
+__all__ = ('IgnoreClientContentNegotiation',)
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Content negotiation for views returning non-API responses.
+
+    Such views (like streams of files) respond with their own content type,
+    so Accept header of client is ignored and errors are rendered with the
+    first renderer instead of failing with "406 Not Acceptable".
+
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -54,6 +54,9 @@ class LibsAppConfig(AppConfig):
 
         To make this work, ``libs`` app should be defined after
         ``rest_framework``
+
+        Also connects recording of cacheops stats if
+        ``settings.CACHE_STATS_ENABLED`` is set.
         """
         field_mapping_settings = getattr(
             settings,
@@ -65,3 +68,7 @@ class LibsAppConfig(AppConfig):
             {import_string(k): import_string(v) for k, v in
              field_mapping_settings.items()}
         )
+
+        if getattr(settings, 'CACHE_STATS_ENABLED', False):
+            from libs import cache_stats
+            cache_stats.connect()
@@ -0,0 +1,45 @@
+"""Registry of benchmarks run with ``benchmark`` management command.
+
+Benchmarks are defined in ``benchmarks`` modules of applications:
+
+    from libs.benchmarks import register
+
+
+    @register('album_import', default_size=2000)
+    def album_import(size):
+        # do something `size` times
+        return {'seconds': elapsed, 'items_per_second': size / elapsed}
+
+Benchmark takes the size of workload and returns dict of metrics.
+Changes made by benchmark in DB are rolled back.
+
+"""
+from collections import namedtuple
+
+from django.utils.module_loading import autodiscover_modules
+
+__all__ = ('register', 'get_benchmarks')
+
+Benchmark = namedtuple('Benchmark', ['name', 'func', 'default_size'])
+
+_registry = {}
+
+
+def register(name, default_size):
+    """Decorator to register benchmark function.
+
+    Args:
+        name (str): name of benchmark used in command line.
+        default_size (int): default size of workload.
+
+    """
+    def decorator(func):
+        _registry[name] = Benchmark(name, func, default_size)
+        return func
+    return decorator
+
+
+def get_benchmarks():
+    """Get registered benchmarks by their names"""
+    autodiscover_modules('benchmarks')
+    return _registry
@@ -0,0 +1,167 @@
+"""Bloom filter kept in Redis bitmap.
+
+Filter answers whether value was added: ``False`` means it definitely
+wasn't, ``True`` means it may have been (false positives happen with
+``error_rate`` probability when filter holds ``capacity`` values). So
+``False`` can be trusted without DB, ``True`` must be checked in DB.
+
+Filter is built from all values at once with ``rebuild`` (values can't be
+removed from it, so it's rebuilt periodically to drop them) and new
+values are added with ``add``. Values added while filter is rebuilt are
+added to the new bitmap too. Filter which isn't built yet (or evicted
+from Redis) contains everything, so it never gives false negatives.
+
+Examples:
+
+    emails = BloomFilter('bloom:emails', capacity=10 ** 6, error_rate=0.01)
+    emails.rebuild(AppUser.objects.values_list('email', flat=True))
+    emails.add('new@example.com')
+    if not emails.might_contain(email):
+        # email is definitely not used
+
+"""
+import hashlib
+import logging
+import math
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+__all__ = ('BloomFilter',)
+
+logger = logging.getLogger(__name__)
+
+# bits are set only in existing bitmaps (built filter and the one being
+# rebuilt), bits set in missing one would make filter of only new values
+ADD_SCRIPT = """
+local added = 0
+for _, key in ipairs(KEYS) do
+    if redis.call('exists', key) == 1 then
+        for _, position in ipairs(ARGV) do
+            redis.call('setbit', key, position, 1)
+        end
+        added = 1
+    end
+end
+return added
+"""
+
+
+class BloomFilter:
+    """Bloom filter of strings kept in Redis.
+
+    Size of filter is a part of its key, so filter of changed capacity or
+    error rate is empty (contains everything) until it's rebuilt.
+
+    Args:
+        key (str): prefix of Redis key of bitmap.
+        capacity (int): expected number of values.
+        error_rate (float): probability of false positive when filter
+            holds ``capacity`` values.
+        normalize (callable): function applied to values before hashing,
+            like ``str.upper`` for case insensitive filter.
+
+    """
+    # max time (in seconds) of rebuild, bitmap of failed rebuild expires
+    rebuild_timeout = 60 * 60
+
+    def __init__(self, key, capacity, error_rate, normalize=None):
+        self.normalize = normalize
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hashes_count = max(1, round(self.size / capacity * math.log(2)))
+        self.key = f'{key}:{self.size}:{self.hashes_count}'
+        # bitmap filled by ``add`` while filter is rebuilt
+        self.new_key = f'{self.key}:new'
+        self._add_script = None
+
+    @property
+    def redis(self):
+        return get_redis_connection('default')
+
+    def get_positions(self, value):
+        """Get positions of bits of value (double hashing)"""
+        if self.normalize is not None:
+            value = self.normalize(value)
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little')
+        return [
+            (first + number * second) % self.size
+            for number in range(self.hashes_count)
+        ]
+
+    def might_contain(self, value):
+        """Check whether value may be in filter.
+
+        Returns ``True`` if filter isn't built or Redis isn't available.
+
+        """
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.exists(self.key)
+        for position in self.get_positions(value):
+            pipeline.getbit(self.key, position)
+        try:
+            exists, *bits = pipeline.execute()
+        except RedisError:
+            logger.warning('Bloom filter %s is not read', self.key,
+                           exc_info=True)
+            return True
+        return not exists or all(bits)
+
+    def add(self, *values):
+        """Add values to filter if it's built or being rebuilt"""
+        positions = [
+            position
+            for value in values
+            for position in self.get_positions(value)
+        ]
+        if not positions:
+            return
+        try:
+            if self._add_script is None:
+                self._add_script = self.redis.register_script(ADD_SCRIPT)
+            self._add_script(keys=[self.key, self.new_key], args=positions)
+        except RedisError:
+            logger.warning('Values are not added to bloom filter %s',
+                           self.key, exc_info=True)
+
+    def rebuild(self, values):
+        """Replace filter with the one built from values.
+
+        Bitmap is built in memory (``size`` bits) and replaces the old one
+        at once, so filter is available while it's rebuilt. Empty new
+        bitmap is created before ``values`` are read, values added while
+        they're read are set in it by ``add`` and merged with the built
+        bitmap on replacement.
+
+        Args:
+            values (iterable): all values of filter.
+
+        """
+        pipeline = self.redis.pipeline()
+        pipeline.delete(self.new_key)
+        pipeline.setbit(self.new_key, self.size - 1, 0)
+        pipeline.expire(self.new_key, self.rebuild_timeout)
+        pipeline.execute()
+
+        bitmap = bytearray(math.ceil(self.size / 8))
+        for value in values:
+            for position in self.get_positions(value):
+                # bit 0 of Redis bitmap is the most significant one
+                bitmap[position // 8] |= 0x80 >> (position % 8)
+
+        built_key = f'{self.key}:built'
+        pipeline = self.redis.pipeline()
+        pipeline.set(built_key, bytes(bitmap))
+        pipeline.bitop('OR', self.new_key, self.new_key, built_key)
+        pipeline.delete(built_key)
+        # renamed key keeps its expiration
+        pipeline.persist(self.new_key)
+        pipeline.rename(self.new_key, self.key)
+        pipeline.execute()
+
+    def clear(self):
+        """Delete filter, so it contains everything until it's rebuilt"""
+        self.redis.delete(self.key, self.new_key)
@@ -0,0 +1,134 @@
+"""Statistics of cacheops reads and invalidations.
+
+Hits and misses are counted per model and per shape of queryset (its SQL
+with placeholders instead of params), invalidations are counted per model.
+Counters are kept in Redis hashes, so stats of all processes are collected
+together and dumped by ``cache_stats`` management command.
+
+Receivers are connected on start of ``libs`` app if
+``settings.CACHE_STATS_ENABLED`` is set.
+
+"""
+import logging
+import sys
+from collections import defaultdict
+
+from django.db.models import QuerySet
+
+from cacheops.signals import cache_invalidated, cache_read
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+__all__ = ('connect', 'get_stats', 'reset_stats')
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'cache_stats:'
+HIT = 'hit'
+MISS = 'miss'
+INVALIDATION = 'invalidation'
+# cacheops operations by names of queryset methods reading cache,
+# ``get()`` reads cache by ``_fetch_all()``
+OPERATIONS = {
+    '_fetch_all': 'fetch',
+    'count': 'count',
+    'exists': 'exists',
+    'aggregate': 'aggregate',
+}
+# max depth of stack between queryset method and signal receiver
+MAX_FRAMES = 10
+
+
+def connect():
+    """Connect receivers of cacheops signals"""
+    cache_read.connect(on_cache_read, dispatch_uid='cache_stats_read')
+    cache_invalidated.connect(on_cache_invalidated,
+                              dispatch_uid='cache_stats_invalidated')
+
+
+def record(label, field):
+    """Increment counter of model in Redis"""
+    try:
+        get_redis_connection('default').hincrby(KEY_PREFIX + label, field)
+    except RedisError:
+        logger.warning('Cache stats of %s are not recorded', label,
+                       exc_info=True)
+
+
+def on_cache_read(sender, func, hit, **kwargs):
+    """Count hit or miss of queryset read from cache"""
+    queryset, operation = _find_queryset()
+    if queryset is None:
+        return
+    sql, params = queryset.query.sql_with_params()
+    record(
+        queryset.model._meta.label_lower,
+        f'{HIT if hit else MISS}|{operation}|{sql}',
+    )
+
+
+def on_cache_invalidated(sender, obj_dict, **kwargs):
+    """Count invalidation of model cache"""
+    # sender is None when the whole cache is flushed
+    if sender is not None:
+        record(sender._meta.label_lower, INVALIDATION)
+
+
+def _find_queryset():
+    """Find queryset which is read from cache in the stack.
+
+    Signals of cacheops don't pass queryset, so it's taken from the frame
+    of queryset method sending the signal.
+
+    Returns:
+        tuple: queryset and cacheops operation, (None, None) if queryset
+            isn't found.
+
+    """
+    frame = sys._getframe(2)
+    for _ in range(MAX_FRAMES):
+        if frame is None:
+            break
+        candidate = frame.f_locals.get('self')
+        operation = OPERATIONS.get(frame.f_code.co_name)
+        if operation and isinstance(candidate, QuerySet):
+            return candidate, operation
+        frame = frame.f_back
+    return None, None
+
+
+def get_stats():
+    """Get counters of all models.
+
+    Returns:
+        dict: stats by model labels, like:
+
+            {'music_store.track': {
+                'invalidations': 10,
+                'shapes': {('fetch', 'SELECT ...'): {'hit': 5, 'miss': 1}},
+            }}
+
+    """
+    redis = get_redis_connection('default')
+    stats = {}
+    for key in redis.scan_iter(match=KEY_PREFIX + '*'):
+        label = key.decode()[len(KEY_PREFIX):]
+        shapes = defaultdict(lambda: {HIT: 0, MISS: 0})
+        invalidations = 0
+        for field, value in redis.hgetall(key).items():
+            field = field.decode()
+            if field == INVALIDATION:
+                invalidations = int(value)
+                continue
+            result, operation, sql = field.split('|', 2)
+            shapes[(operation, sql)][result] = int(value)
+        stats[label] = {'invalidations': invalidations, 'shapes': shapes}
+    return stats
+
+
+def reset_stats():
+    """Delete all counters"""
+    redis = get_redis_connection('default')
+    keys = list(redis.scan_iter(match=KEY_PREFIX + '*'))
+    if keys:
+        redis.delete(*keys)
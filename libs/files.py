@@ -1,5 +1,287 @@
+import io
+import zipfile
+from collections import OrderedDict
+
 from django.core.files import File
 
+from storages.backends.s3boto3 import S3Boto3Storage
+
 
 class JSONFile(File):
     content_type = "application/json"
+
+
+class RangeFile(io.RawIOBase):
+    """Seekable read-only file reading remote object with range requests.
+
+    Object is read by blocks of ``block_size`` bytes, the last
+    ``cache_blocks`` blocks are kept in memory. So formats with index at
+    the end of file (like ZIP) are read without downloading the whole
+    object and memory used doesn't depend on its size.
+
+    Works with boto3 ``s3.Object`` or any object with ``content_length``
+    attribute and ``get(Range='bytes=start-end')`` method returning dict
+    with readable ``Body``.
+
+    Examples:
+
+        remote_file = RangeFile(bucket.Object('archive.zip'))
+        zip_file = zipfile.ZipFile(remote_file)
+
+    """
+
+    def __init__(self, remote_object, block_size=2 ** 20, cache_blocks=16):
+        """
+        Args:
+            remote_object (s3.Object): remote object to read.
+            block_size (int): number of bytes fetched with one request.
+            cache_blocks (int): max number of blocks kept in memory.
+        """
+        super().__init__()
+        self.remote_object = remote_object
+        self.size = remote_object.content_length
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.position = 0
+        self.cache = OrderedDict()
+        # statistics of requests to remote storage
+        self.requests_count = 0
+        self.fetched_bytes = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f'Invalid whence ({whence})')
+
+        if position < 0:
+            raise ValueError(f'Negative seek position {position}')
+        self.position = position
+        return self.position
+
+    def readinto(self, buffer):
+        """Read bytes into buffer from cached or fetched blocks"""
+        view = memoryview(buffer).cast('B')
+        size = min(len(view), max(self.size - self.position, 0))
+        read = 0
+        while read < size:
+            index, offset = divmod(self.position, self.block_size)
+            block = self._get_block(index)
+            chunk = block[offset:offset + size - read]
+            view[read:read + len(chunk)] = chunk
+            read += len(chunk)
+            self.position += len(chunk)
+        return read
+
+    def _get_block(self, index):
+        """Get block from cache or fetch it with range request"""
+        if index in self.cache:
+            self.cache.move_to_end(index)
+            return self.cache[index]
+
+        start = index * self.block_size
+        end = min(start + self.block_size, self.size) - 1
+        response = self.remote_object.get(Range=f'bytes={start}-{end}')
+        block = response['Body'].read()
+        self.requests_count += 1
+        self.fetched_bytes += len(block)
+
+        self.cache[index] = block
+        if len(self.cache) > self.cache_blocks:
+            self.cache.popitem(last=False)
+        return block
+
+
+class StreamFile(io.RawIOBase):
+    """Base class for read-only streams saved to storages.
+
+    Stream can't be rewound, but seeking to the current position is
+    allowed, because storages seek to the start of content before
+    reading it.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if (offset, whence) not in ((self.position, io.SEEK_SET),
+                                    (0, io.SEEK_CUR)):
+            raise io.UnsupportedOperation('Stream can not be rewound')
+        return self.position
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast('B')
+        data = self.read_data(len(view))
+        view[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def read_data(self, size):
+        """Read up to ``size`` bytes, empty bytes at the end of stream"""
+        raise NotImplementedError
+
+
+class HashingFile(StreamFile):
+    """Stream computing hash of data read from wrapped file.
+
+    Examples:
+
+        content = HashingFile(request, hashlib.sha256())
+        storage.save(name, File(content))
+        checksum = content.digest.hexdigest()
+
+    """
+
+    def __init__(self, file, digest, limit=None):
+        """
+        Args:
+            file (file): file to read, like HttpRequest.
+            digest (hash): hash object from ``hashlib``.
+            limit (int): max number of bytes read from file, the rest of
+                it is not read.
+        """
+        super().__init__()
+        self.file = file
+        self.digest = digest
+        self.limit = limit
+
+    def read_data(self, size):
+        if self.limit is not None:
+            size = min(size, self.limit - self.position)
+            if size <= 0:
+                return b''
+        data = self.file.read(size)
+        self.digest.update(data)
+        return data
+
+
+class ConcatenatedFile(StreamFile):
+    """Stream reading files one after another.
+
+    Files are opened lazily and closed as soon as they are read.
+
+    """
+
+    def __init__(self, open_files):
+        """
+        Args:
+            open_files (iterable): callables opening files to read.
+        """
+        super().__init__()
+        self.open_files = iter(open_files)
+        self.current = None
+
+    def read_data(self, size):
+        while True:
+            if self.current is None:
+                open_file = next(self.open_files, None)
+                if open_file is None:
+                    return b''
+                self.current = open_file()
+
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+
+class WriteBuffer(io.RawIOBase):
+    """Non-seekable file keeping written data until it's taken.
+
+    Allows to stream output of writers like ``zipfile.ZipFile`` by parts.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        """Get data written since the last call"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files, compression=zipfile.ZIP_DEFLATED):
+    """Build ZIP archive on the fly.
+
+    Archive is written to non-seekable buffer, so sizes and checksums of
+    members are written after their data (in data descriptors) and ZIP64
+    records are added when archive grows over 4 GB. Only one member is kept
+    in memory at once.
+
+    Examples:
+
+        files = ((name, modified, content) for ... in ...)
+        return StreamingHttpResponse(stream_zip(files))
+
+    Args:
+        files (iterable): tuples of names, modification times (datetime)
+            and contents (bytes) of files.
+        compression (int): compression method, one of ``zipfile``
+            constants.
+
+    Yields:
+        bytes: parts of archive.
+
+    """
+    buffer = WriteBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression) as zip_file:
+        for name, modified, content in files:
+            info = zipfile.ZipInfo(name, date_time=modified.timetuple()[:6])
+            info.compress_type = compression
+            info.external_attr = 0o644 << 16
+            zip_file.writestr(info, content)
+            yield buffer.take()
+    # central directory
+    yield buffer.take()
+
+
+def open_seekable(storage, name):
+    """Open file of storage for random access without full download.
+
+    Files of S3 storage are read with range requests by ``RangeFile``,
+    files of other storages are opened as usual.
+
+    Args:
+        storage (Storage): storage containing the file.
+        name (str): name of file in the storage.
+
+    Returns:
+        file: seekable file opened for reading in binary mode.
+
+    """
+    if isinstance(storage, S3Boto3Storage):
+        key = storage._normalize_name(storage._clean_name(name))
+        return io.BufferedReader(RangeFile(storage.bucket.Object(key)))
+    return storage.open(name)
@@ -0,0 +1,148 @@
+"""Responses sending content with support of conditional and range requests.
+
+Only single byte ranges are served as partial content. Multiple ranges and
+invalid Range headers are ignored as allowed by RFC 7233, so whole content
+is sent for them.
+
+"""
+import re
+from calendar import timegm
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    """Requested range doesn't overlap content"""
+
+
+def parse_range(header, size):
+    """Get bounds of single byte range from Range header.
+
+    Args:
+        header (str): value of Range header, like 'bytes=0-499'.
+        size (int): size of content in bytes.
+
+    Returns:
+        tuple: first and last byte positions (inclusive), None if whole
+            content should be sent.
+
+    Raises:
+        RangeNotSatisfiable: if range doesn't overlap content.
+
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+
+    # suffix range, like 'bytes=-500' for the last 500 bytes
+    if not start:
+        length = int(end)
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+def iter_chunks(data, start, end, chunk_size):
+    """Yield bytes of ``data`` from ``start`` to ``end`` (inclusive)"""
+    view = memoryview(data)
+    for position in range(start, end + 1, chunk_size):
+        yield bytes(view[position:min(position + chunk_size, end + 1)])
+
+
+def _if_range_passes(request, etag, last_modified):
+    """Check If-Range precondition, Range is ignored if it fails"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range == etag:
+        return True
+    if_range_date = parse_http_date_safe(if_range)
+    return if_range_date is not None and if_range_date == last_modified
+
+
+def content_response(request, get_content, etag, last_modified=None,
+                     content_type='application/octet-stream',
+                     chunk_size=2 ** 16):
+    """Get response streaming content in chunks.
+
+    Responds "304 Not Modified" and "412 Precondition Failed" to
+    conditional requests, "206 Partial Content" to requests of single byte
+    range and "416 Range Not Satisfiable" to requests of range out of
+    content.
+
+    Examples:
+
+        return content_response(
+            request, lambda: document.body.encode(),
+            etag=document.checksum, last_modified=document.modified,
+        )
+
+    Args:
+        request (HttpRequest): request of content.
+        get_content (callable): returns content as bytes. It's called only
+            when content is sent, so it isn't loaded for "304 Not Modified".
+        etag (str): strong entity tag of content, without quotes.
+        last_modified (datetime): time of last modification of content.
+        content_type (str): value of Content-Type header.
+        chunk_size (int): number of bytes sent at once.
+
+    Returns:
+        HttpResponse: response to the request.
+
+    """
+    etag = quote_etag(etag)
+    headers = {'ETag': etag, 'Accept-Ranges': 'bytes'}
+    if last_modified is not None:
+        last_modified = timegm(last_modified.utctimetuple())
+        headers['Last-Modified'] = http_date(last_modified)
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified,
+    )
+    if response is None:
+        response = _get_content_response(
+            request, get_content(), etag, last_modified, content_type,
+            chunk_size,
+        )
+
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _get_content_response(request, data, etag, last_modified, content_type,
+                          chunk_size):
+    """Get response with whole content or its requested range"""
+    size = len(data)
+    bounds = None
+    if _if_range_passes(request, etag, last_modified):
+        try:
+            bounds = parse_range(request.META.get('HTTP_RANGE'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = bounds or (0, size - 1)
+    response = StreamingHttpResponse(
+        iter_chunks(data, start, end, chunk_size),
+        content_type=content_type,
+    )
+    response['Content-Length'] = end - start + 1
+    if bounds:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
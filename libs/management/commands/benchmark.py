@@ -0,0 +1,72 @@
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from libs.benchmarks import get_benchmarks
+
+
+class Command(BaseCommand):
+    """Run benchmark registered in ``benchmarks`` module of some app.
+
+    Changes made by benchmark in DB are rolled back.
+
+    Examples:
+
+        ./manage.py benchmark --list
+        ./manage.py benchmark album_import --size 5000
+
+    """
+    help = 'Run benchmark and print its metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Name of benchmark')
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=None,
+            help='Size of workload, benchmark default if not defined',
+        )
+        parser.add_argument(
+            '--trace-memory',
+            action='store_true',
+            default=False,
+            help='Report peak memory allocated by Python (slows down run)',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            default=False,
+            help='List available benchmarks',
+        )
+
+    def handle(self, *args, **options):
+        benchmarks = get_benchmarks()
+        if options['list'] or not options['name']:
+            for name in sorted(benchmarks):
+                self.stdout.write(name)
+            return
+
+        try:
+            benchmark = benchmarks[options['name']]
+        except KeyError:
+            raise CommandError(f'Unknown benchmark {options["name"]}')
+
+        size = options['size'] or benchmark.default_size
+        if options['trace_memory']:
+            tracemalloc.start()
+
+        with transaction.atomic():
+            metrics = benchmark.func(size)
+            transaction.set_rollback(True)
+
+        if options['trace_memory']:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            metrics['peak_python_memory_mb'] = peak / 2 ** 20
+
+        self.stdout.write(f'{benchmark.name} (size={size})')
+        for name, value in metrics.items():
+            if isinstance(value, float):
+                value = f'{value:.3f}'
+            self.stdout.write(f'  {name}: {value}')
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+
+from libs.cache_stats import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    """Dump hits, misses and invalidations of cacheops.
+
+    Stats are printed per model and per shape of queryset, the most read
+    shapes first.
+
+    Examples:
+
+        ./manage.py cache_stats --model music_store.track
+        ./manage.py cache_stats --reset
+
+    """
+    help = 'Dump stats of cacheops per model and per queryset shape'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            default=None,
+            help='Label of model to dump stats of, like music_store.track',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            default=False,
+            help='Delete collected stats',
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_stats()
+            self.stdout.write('Cache stats are reset')
+            return
+
+        stats = get_stats()
+        if options['model']:
+            stats = {
+                label: model_stats for label, model_stats in stats.items()
+                if label == options['model'].lower()
+            }
+
+        for label, model_stats in sorted(stats.items()):
+            shapes = sorted(
+                model_stats['shapes'].items(),
+                key=lambda shape: -sum(shape[1].values()),
+            )
+            hits = sum(counters['hit'] for _, counters in shapes)
+            misses = sum(counters['miss'] for _, counters in shapes)
+            self.stdout.write(
+                f'{label}: {self.format_counters(hits, misses)}, '
+                f'{model_stats["invalidations"]} invalidations'
+            )
+            for (operation, sql), counters in shapes:
+                counters = self.format_counters(
+                    counters['hit'], counters['miss'],
+                )
+                self.stdout.write(f'  {operation} {counters}: {sql}')
+
+    @staticmethod
+    def format_counters(hits, misses):
+        """Format hits and misses with hit rate"""
+        reads = hits + misses
+        hit_rate = hits / reads * 100 if reads else 0
+        return f'{hits} hits, {misses} misses ({hit_rate:.1f}% hit rate)'
@@ -0,0 +1,420 @@
+"""Two-tier cache of model instances by primary key.
+
+Instances are kept in bounded in-process LRU with short TTL in front of
+Redis (``default`` cache). When instance is saved or deleted, it's removed
+from both tiers and invalidation is published to Redis channel, so other
+processes drop it from their LRU as well. TTL of LRU bounds staleness if
+invalidation is missed (e.g. Redis was unavailable). Invalidation bumps
+version of instance, and loaded instance is put to Redis only if its
+version isn't changed since it was read from DB, so old version read
+concurrently with change isn't written back after invalidation.
+
+Misses of popular instances are coalesced (single-flight): only request
+holding short Redis lock of the key loads instance from DB. Concurrent
+requests get expired instance while it's kept in Redis
+(stale-while-revalidate) or wait for the loaded one briefly.
+
+Examples:
+
+    track_cache = ObjectCache(Track)
+    track = track_cache.get(track_id)  # raises Track.DoesNotExist
+
+Caches must be created on start of application (like in ``AppConfig.ready``)
+to invalidate instances changed by any process.
+
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from django_redis import get_redis_connection
+from redis.exceptions import LockError, RedisError
+
+__all__ = ('ObjectCache', 'LocalCache', 'get_stats')
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'object_cache:invalidate'
+# pause (in seconds) before listener reconnects to Redis
+RECONNECT_DELAY = 1
+# pause (in seconds) between checks of instance loaded by another request
+WAIT_INTERVAL = 0.02
+
+# sets entry of instance if its version isn't changed since it was read
+SET_IF_VERSION_SCRIPT = """
+if (redis.call('get', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('set', KEYS[1], ARGV[2], 'ex', ARGV[3])
+return 1
+"""
+
+# lists of caches by labels of their models
+_caches = {}
+
+
+class LocalCache:
+    """Thread-safe in-process LRU cache with TTL of values.
+
+    Args:
+        maxsize (int): max number of kept values.
+        timeout (float): time (in seconds) values are kept.
+
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Get value, None if it's missing or expired"""
+        with self.lock:
+            value, expires = self.values.get(key, (None, 0))
+            if expires < time.monotonic():
+                self.values.pop(key, None)
+                return None
+            self.values.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.values[key] = (value, time.monotonic() + self.timeout)
+            self.values.move_to_end(key)
+            if len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.values.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+class ObjectCache:
+    """Two-tier cache of instances of model by primary key.
+
+    Instances are stored pickled, so each call of ``get`` returns a new
+    instance and changes of it don't affect cached one.
+
+    Attributes:
+        local_hits (int): number of instances found in process.
+        remote_hits (int): number of instances found in Redis.
+        stale_hits (int): number of expired instances returned while
+            another request loads them.
+        coalesced (int): number of instances loaded by another request.
+        misses (int): number of instances loaded from DB.
+        invalidations (int): number of instances removed from cache.
+
+    """
+
+    def __init__(self, model, timeout=None, local_size=None,
+                 local_timeout=None, single_flight=True, queryset=None):
+        """
+        Args:
+            model (Model): class of cached instances.
+            timeout (int): time (in seconds) instances are fresh in Redis.
+            local_size (int): max number of instances kept in process.
+            local_timeout (float): time (in seconds) instances are kept in
+                process.
+            single_flight (bool): coalesce concurrent loads of instance.
+            queryset (QuerySet): queryset instances are loaded from, like
+                one with deferred fields, default manager is used if it's
+                not set.
+        """
+        self.model = model
+        self.queryset = (model._default_manager.all() if queryset is None
+                         else queryset)
+        self.label = model._meta.label_lower
+        self.timeout = timeout or settings.OBJECT_CACHE_TIMEOUT
+        self.stale_timeout = settings.OBJECT_CACHE_STALE_TIMEOUT
+        self.lock_timeout = settings.OBJECT_CACHE_LOCK_TIMEOUT
+        self.wait_timeout = settings.OBJECT_CACHE_WAIT_TIMEOUT
+        self.single_flight = single_flight
+        self.local = LocalCache(
+            maxsize=(settings.OBJECT_CACHE_LOCAL_SIZE if local_size is None
+                     else local_size),
+            timeout=local_timeout or settings.OBJECT_CACHE_LOCAL_TIMEOUT,
+        )
+        self._set_script = None
+        self.local_hits = self.remote_hits = self.misses = 0
+        self.stale_hits = self.coalesced = self.invalidations = 0
+
+        _caches.setdefault(self.label, []).append(self)
+        uid = f'object_cache_{self.label}_{id(self)}'
+        post_save.connect(self._on_change, sender=model, weak=False,
+                          dispatch_uid=f'{uid}_save')
+        post_delete.connect(self._on_change, sender=model, weak=False,
+                            dispatch_uid=f'{uid}_delete')
+
+    def get_key(self, pk):
+        """Get key of instance in Redis"""
+        return f'object_cache:{self.label}:{pk}'
+
+    @staticmethod
+    def get_version_key(key):
+        """Get key of version of instance in Redis"""
+        return f'{key}:version'
+
+    def get(self, pk):
+        """Get instance by primary key.
+
+        Raises:
+            DoesNotExist: if there is no instance with the key.
+            ValidationError: if key isn't valid value of primary key.
+
+        """
+        if not settings.OBJECT_CACHE_ENABLED:
+            return self.queryset.get(pk=pk)
+
+        _start_listener()
+        pk = self.model._meta.pk.to_python(pk)
+        key = self.get_key(pk)
+
+        data = self.local.get(key)
+        if data is not None:
+            self.local_hits += 1
+            return pickle.loads(data)
+
+        entry = self._get_entry(key)
+        if entry is not None and entry[0] > time.time():
+            self.remote_hits += 1
+            data = entry[1]
+        else:
+            data = self._refresh(key, pk, stale=entry and entry[1])
+
+        self.local.set(key, data)
+        return pickle.loads(data)
+
+    def _get_entry(self, key):
+        """Get time of expiration and pickled instance from Redis.
+
+        Entry is kept in Redis for ``stale_timeout`` seconds after it's
+        expired, so it's returned while the instance is reloaded.
+
+        """
+        try:
+            entry = cache.get(key)
+        except RedisError:
+            logger.warning('%s is not read from cache', key, exc_info=True)
+            return None
+        return entry if isinstance(entry, tuple) else None
+
+    def _refresh(self, key, pk, stale=None):
+        """Get expired or missing instance loaded by a single request.
+
+        Args:
+            key (str): key of instance in Redis.
+            pk: primary key of instance.
+            stale (bytes): expired pickled instance.
+
+        """
+        if not self.single_flight:
+            return self._load(key, pk)
+
+        lock = get_redis_connection('default').lock(
+            f'{key}:lock', timeout=self.lock_timeout,
+        )
+        try:
+            acquired = lock.acquire(blocking=False)
+        except RedisError:
+            logger.warning('%s is not locked', key, exc_info=True)
+            return self._load(key, pk)
+
+        if acquired:
+            try:
+                return self._load(key, pk)
+            finally:
+                try:
+                    lock.release()
+                except (LockError, RedisError):
+                    # lock is expired or will expire
+                    pass
+
+        if stale is not None:
+            self.stale_hits += 1
+            return stale
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = self._get_entry(key)
+            if entry is not None:
+                self.coalesced += 1
+                return entry[1]
+        return self._load(key, pk)
+
+    def _load(self, key, pk):
+        """Load instance from DB and put it to Redis.
+
+        Instance is put to Redis only if it isn't invalidated while it's
+        loaded, since the loaded version may be already changed then.
+
+        """
+        self.misses += 1
+        redis = get_redis_connection('default')
+        version_key = self.get_version_key(key)
+        try:
+            # version is read before instance, so change committed after
+            # instance is read changes the version
+            version = redis.get(version_key) or b''
+        except RedisError:
+            logger.warning('%s is not read from cache', version_key,
+                           exc_info=True)
+            version = None
+
+        instance = self.queryset.get(pk=pk)
+        data = pickle.dumps(instance, pickle.HIGHEST_PROTOCOL)
+        if version is None:
+            return data
+        try:
+            if self._set_script is None:
+                self._set_script = redis.register_script(
+                    SET_IF_VERSION_SCRIPT,
+                )
+            self._set_script(
+                keys=[cache.client.make_key(key), version_key],
+                args=[
+                    version,
+                    cache.client.encode((time.time() + self.timeout, data)),
+                    self.timeout + self.stale_timeout,
+                ],
+            )
+        except RedisError:
+            logger.warning('%s is not cached', key, exc_info=True)
+        return data
+
+    def invalidate(self, pk, publish=True):
+        """Remove instance from cache of all processes.
+
+        Args:
+            pk: primary key of instance.
+            publish (bool): notify other processes about invalidation.
+
+        """
+        key = self.get_key(pk)
+        self.invalidations += 1
+        self.local.delete(key)
+        if not publish:
+            return
+        version_key = self.get_version_key(key)
+        try:
+            # version is bumped before instance is deleted, so instance
+            # loaded before invalidation isn't put to Redis after it
+            pipeline = get_redis_connection('default').pipeline()
+            pipeline.incr(version_key)
+            pipeline.expire(version_key, self.timeout + self.stale_timeout)
+            pipeline.execute()
+            cache.delete(key)
+            get_redis_connection('default').publish(
+                INVALIDATION_CHANNEL,
+                json.dumps({'model': self.label, 'pk': str(pk)}),
+            )
+        except RedisError:
+            logger.warning('%s is not invalidated', key, exc_info=True)
+
+    def get_counters(self):
+        """Get counters of cache in this process"""
+        return {
+            'local_hits': self.local_hits,
+            'remote_hits': self.remote_hits,
+            'stale_hits': self.stale_hits,
+            'coalesced': self.coalesced,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+    def get_stats(self):
+        """Get counters of cache in this process and its hit rate"""
+        return _add_hit_rate(self.get_counters())
+
+    def _on_change(self, sender, instance, using, **kwargs):
+        """Invalidate changed instance now and after commit.
+
+        Invalidation after commit removes old version cached by concurrent
+        request before commit.
+
+        """
+        # pk of deleted instance is cleared before commit
+        pk = instance.pk
+        self.invalidate(pk)
+        transaction.on_commit(lambda: self.invalidate(pk), using=using)
+
+
+def _add_hit_rate(counters):
+    """Add rate of requests served without DB to counters"""
+    requests = sum(
+        value for name, value in counters.items() if name != 'invalidations'
+    )
+    hits = requests - counters['misses']
+    counters['hit_rate'] = hits / requests if requests else 0
+    return counters
+
+
+def get_stats():
+    """Get stats of object caches of the process by model labels"""
+    stats = {}
+    for label, caches in _caches.items():
+        counters = Counter()
+        for object_cache in caches:
+            counters.update(object_cache.get_counters())
+        stats[label] = _add_hit_rate(dict(counters))
+    return stats
+
+
+class InvalidationListener(threading.Thread):
+    """Thread removing instances invalidated by other processes."""
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except RedisError:
+                logger.warning('Invalidations of object cache are missed',
+                               exc_info=True)
+                time.sleep(RECONNECT_DELAY)
+
+    @staticmethod
+    def listen():
+        pubsub = get_redis_connection('default').pubsub(
+            ignore_subscribe_messages=True,
+        )
+        pubsub.subscribe(INVALIDATION_CHANNEL)
+        # invalidations published before subscription are missed
+        for caches in _caches.values():
+            for object_cache in caches:
+                object_cache.local.clear()
+
+        for message in pubsub.listen():
+            invalidation = json.loads(message['data'])
+            for object_cache in _caches.get(invalidation['model'], ()):
+                object_cache.invalidate(invalidation['pk'], publish=False)
+
+
+_listener_lock = threading.Lock()
+_listener_pid = None
+
+
+def _start_listener():
+    """Start listener of invalidations once in each process"""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            InvalidationListener(
+                name='object-cache-invalidation', daemon=True,
+            ).start()
+            _listener_pid = os.getpid()
@@ -1,5 +1,8 @@
+import io
 import tempfile
+from contextlib import contextmanager
 
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.utils import timezone
 
 
@@ -20,6 +23,30 @@ def generate_file(size=1024):
     return tmp_file
 
 
+class LocalS3Object:
+    """Local stand-in for boto3 ``s3.Object`` supporting range requests.
+
+    Content is read from local file, so it can be used for files larger
+    than memory. Ranges of all requests are recorded in ``requests``.
+
+    """
+
+    def __init__(self, file):
+        """
+        Args:
+            file (file): seekable file opened in binary mode.
+        """
+        self.file = file
+        self.content_length = file.seek(0, io.SEEK_END)
+        self.requests = []
+
+    def get(self, Range):
+        start, end = map(int, Range.replace('bytes=', '').split('-'))
+        self.requests.append((start, end))
+        self.file.seek(start)
+        return {'Body': io.BytesIO(self.file.read(end - start + 1))}
+
+
 def get_curr_time():
     """Helper function to get current server's time.
 
@@ -29,3 +56,23 @@ def get_curr_time():
     Used actively on uSummit
     """
     return str(timezone.now().strftime('%Y-%m-%d %H:%M:%S.%f'))
+
+
+@contextmanager
+def run_on_commit_callbacks(using=DEFAULT_DB_ALIAS):
+    """Run ``transaction.on_commit`` callbacks registered within the block.
+
+    ``TestCase`` never commits, so callbacks are run on exit from the block
+    as if its transaction was committed.
+
+    Args:
+        using (str): alias of database.
+
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, callback in callbacks:
+        callback()
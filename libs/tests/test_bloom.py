@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase
+
+from libs.bloom import BloomFilter
+
+
+class TestBloomFilter(SimpleTestCase):
+    """Tests for bloom filter kept in Redis"""
+
+    def setUp(self):
+        self.filter = BloomFilter('bloom:test', capacity=100,
+                                  error_rate=0.01, normalize=str.upper)
+        self.addCleanup(self.filter.clear)
+
+    def test_missing_filter_contains_everything(self):
+        self.filter.clear()
+        self.filter.add('first')
+
+        self.assertTrue(self.filter.might_contain('second'))
+
+    def test_rebuilt_filter_contains_only_its_values(self):
+        self.filter.rebuild(['first', 'Second'])
+
+        self.assertTrue(self.filter.might_contain('first'))
+        self.assertTrue(self.filter.might_contain('second'))
+        self.assertFalse(self.filter.might_contain('third'))
+
+    def test_values_are_added_to_built_filter(self):
+        self.filter.rebuild([])
+        self.filter.add('first')
+
+        self.assertTrue(self.filter.might_contain('FIRST'))
+
+    def test_rebuild_drops_old_values(self):
+        self.filter.rebuild(['first'])
+        self.filter.rebuild(['second'])
+
+        self.assertFalse(self.filter.might_contain('first'))
+
+    def test_values_added_while_rebuilding_are_kept(self):
+        def values():
+            yield 'first'
+            self.filter.add('second')
+
+        self.filter.rebuild([])
+        self.filter.rebuild(values())
+
+        self.assertTrue(self.filter.might_contain('first'))
+        self.assertTrue(self.filter.might_contain('second'))
+        self.assertFalse(self.filter.might_contain('third'))
+        self.assertEqual(self.filter.redis.ttl(self.filter.key), -1)
@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+
+from libs.cache_stats import (
+    get_stats,
+    on_cache_invalidated,
+    on_cache_read,
+    reset_stats,
+)
+
+
+class TestCacheStats(TestCase):
+    """Tests for stats of cacheops reads and invalidations"""
+
+    def setUp(self):
+        reset_stats()
+        self.addCleanup(reset_stats)
+
+    @staticmethod
+    def read(queryset, hit):
+        def count(self):
+            """Stand-in of queryset method reading cache"""
+            on_cache_read(sender=None, func=None, hit=hit)
+        count(queryset)
+
+    def test_reads_are_counted_per_shape(self):
+        queryset = Group.objects.filter(name='first')
+        self.read(queryset, hit=False)
+        self.read(Group.objects.filter(name='second'), hit=True)
+        self.read(Group.objects.all(), hit=True)
+        on_cache_invalidated(sender=Group, obj_dict={'id': 1})
+
+        stats = get_stats()['auth.group']
+        sql, params = queryset.query.sql_with_params()
+        self.assertEqual(stats['shapes'][('count', sql)],
+                         {'hit': 1, 'miss': 1})
+        self.assertEqual(len(stats['shapes']), 2)
+        self.assertEqual(stats['invalidations'], 1)
+
+    def test_command_dumps_stats(self):
+        self.read(Group.objects.all(), hit=True)
+
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn('auth.group: 1 hits, 0 misses (100.0% hit rate)',
+                      out.getvalue())
@@ -0,0 +1,53 @@
+"""Tests for ``libs.files`` module
+"""
+import io
+import zipfile
+
+from django.test import TestCase
+
+from libs.files import RangeFile
+from libs.testing.utils import LocalS3Object
+
+
+class TestRangeFile(TestCase):
+    """Tests for ``libs.files.RangeFile`` reading remote objects
+    """
+
+    def setUp(self):
+        self.content = bytes(range(256)) * 40
+        self.remote_object = LocalS3Object(io.BytesIO(self.content))
+
+    def test_read_and_seek(self):
+        remote_file = RangeFile(self.remote_object, block_size=1000)
+        remote_file.seek(990)
+        self.assertEqual(remote_file.read(20), self.content[990:1010])
+        remote_file.seek(-5, io.SEEK_END)
+        self.assertEqual(remote_file.read(), self.content[-5:])
+        self.assertEqual(remote_file.read(10), b'')
+
+    def test_blocks_are_cached(self):
+        remote_file = RangeFile(self.remote_object, block_size=1000)
+        remote_file.read(10)
+        remote_file.seek(0)
+        remote_file.read(10)
+        self.assertEqual(self.remote_object.requests, [(0, 999)])
+
+    def test_cache_is_limited(self):
+        remote_file = RangeFile(self.remote_object, block_size=1000,
+                                cache_blocks=2)
+        remote_file.read()
+        self.assertEqual(len(remote_file.cache), 2)
+        self.assertEqual(remote_file.fetched_bytes, len(self.content))
+
+    def test_zip_member_read_without_full_download(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('big.bin', b'x' * 10 ** 6)
+            zip_file.writestr('small.txt', b'small')
+        remote_object = LocalS3Object(archive)
+
+        remote_file = RangeFile(remote_object, block_size=2 ** 14)
+        with zipfile.ZipFile(io.BufferedReader(remote_file)) as zip_file:
+            self.assertEqual(zip_file.read('small.txt'), b'small')
+
+        self.assertLess(remote_file.fetched_bytes, 10 ** 5)
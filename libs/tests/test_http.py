@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from libs.http import RangeNotSatisfiable, iter_chunks, parse_range
+
+
+class TestParseRange(SimpleTestCase):
+    """Tests for parsing of Range header"""
+
+    def test_range(self):
+        self.assertEqual(parse_range('bytes=10-19', 100), (10, 19))
+
+    def test_open_range(self):
+        self.assertEqual(parse_range('bytes=10-', 100), (10, 99))
+
+    def test_range_is_truncated_to_content(self):
+        self.assertEqual(parse_range('bytes=90-200', 100), (90, 99))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-200', 100), (0, 99))
+
+    def test_unsupported_ranges_are_ignored(self):
+        for header in (None, '', 'bytes=-', 'bytes=20-10', 'items=0-10',
+                       'bytes=0-10,20-30'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 100))
+
+    def test_range_out_of_content(self):
+        for header in ('bytes=100-', 'bytes=-0'):
+            with self.subTest(header=header):
+                with self.assertRaises(RangeNotSatisfiable):
+                    parse_range(header, 100)
+
+    def test_iter_chunks(self):
+        chunks = list(iter_chunks(b'0123456789', 2, 8, chunk_size=3))
+        self.assertEqual(chunks, [b'234', b'567', b'8'])